@@ -0,0 +1 @@
+python -m src %*
\ No newline at end of file
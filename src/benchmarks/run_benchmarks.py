@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import importlib
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from src.benchmarks.synthetic_corpus import SIZES, write_corpus
+from src.data.artifact_catalog import register_artifact
+from src.utils.instrumentation import collect_stages, print_stage_summary
+
+RESULTS_FILE = "data/benchmarks/results.jsonl"
+REGRESSION_THRESHOLD = 1.25
+
+# Stages in pipeline order; each reads what the previous one wrote
+BENCHMARK_STAGES = {
+    "clean": "src.data.clean_data:clean_data",
+    "analyze": "src.data.analyze_data:analyze_data",
+    "text_processing": "src.utils.text_processing:text_processing",
+    "process": "src.data.process_trends:process_trends",
+    "predict": "src.data.predict_trends:predict_trends",
+    "powerbi": "src.reporting.prepare_powerbi:prepare_powerbi_data"
+}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _benchmark_corpus(corpus_file, n_entries, stages, verbose=False):
+    """Run the stages on one corpus inside a scratch working directory; returns their metrics.
+
+    Runs in a fresh worker process so peak RSS belongs to this corpus alone.
+    """
+    work_dir = tempfile.mkdtemp(prefix="forecaster_bench_")
+    os.chdir(work_dir)
+    try:
+        register_artifact("raw", corpus_file, row_count=n_entries, stage="benchmark")
+        with open(os.devnull, "w") as devnull, collect_stages() as metrics:
+            for name in stages:
+                module_name, function_name = BENCHMARK_STAGES[name].split(":")
+                function = getattr(importlib.import_module(module_name), function_name)
+                if verbose:
+                    function()
+                else:
+                    with redirect_stdout(devnull):
+                        function()
+    finally:
+        os.chdir("/")
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return metrics
+
+def _previous_results(results_file):
+    """Latest recorded result per (size, stage)."""
+    previous = {}
+    if not os.path.exists(results_file):
+        return previous
+    with open(results_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                result = json.loads(line)
+                previous[(result["size"], result["stage"])] = result
+    return previous
+
+def run_benchmarks(sizes=("1k", "10k"), stages=tuple(BENCHMARK_STAGES), seed=42, threshold=REGRESSION_THRESHOLD, results_file=RESULTS_FILE, verbose=False):
+    """Time the stages on synthetic corpora, append the results and compare them with the previous run.
+
+    Returns the list of regressions: stages whose wall time grew by more than
+    the threshold factor since the last recorded result for the same size.
+    """
+    previous = _previous_results(results_file)
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    commit = _git_commit()
+    results = []
+    regressions = []
+
+    for size in sizes:
+        n_entries = SIZES[size]
+        corpus_file = os.path.abspath(write_corpus(n_entries, seed))
+        print(f"\nBenchmarking {size} ({n_entries} entries) from {corpus_file}")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            metrics = executor.submit(_benchmark_corpus, corpus_file, n_entries, list(stages), verbose).result()
+        print_stage_summary(metrics)
+
+        for stage_metrics in metrics:
+            result = {
+                "run_id": run_id,
+                "commit": commit,
+                "size": size,
+                "entries": n_entries,
+                "seed": seed,
+                "stage": stage_metrics["stage"],
+                "status": stage_metrics["status"],
+                "wall_seconds": stage_metrics["wall_seconds"],
+                "cpu_seconds": stage_metrics["cpu_seconds"],
+                "peak_rss_mb": stage_metrics["peak_rss_mb"],
+                "records_per_second": stage_metrics["records_per_second"]
+            }
+            results.append(result)
+
+            baseline = previous.get((size, result["stage"]))
+            if baseline and baseline["wall_seconds"] and result["wall_seconds"] > baseline["wall_seconds"] * threshold:
+                regressions.append((result, baseline))
+
+    os.makedirs(os.path.dirname(results_file) or ".", exist_ok=True)
+    with open(results_file, "a", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+    print(f"\nAppended {len(results)} benchmark results to {results_file}")
+
+    if regressions:
+        print(f"\nRegressions (more than {threshold:.2f}x slower than the previous result):")
+        for result, baseline in regressions:
+            print(f"{result['size']:<6} {result['stage']:<16} {baseline['wall_seconds']:.3f}s -> {result['wall_seconds']:.3f}s "
+                  f"({result['wall_seconds'] / baseline['wall_seconds']:.2f}x, was commit {baseline['commit']})")
+    else:
+        print("No regressions against the previous results.")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic Reddit corpora.")
+    parser.add_argument("--sizes", nargs="+", default=["1k", "10k"], choices=sorted(SIZES), help="corpus sizes to run (default: 1k 10k)")
+    parser.add_argument("--stages", nargs="+", default=list(BENCHMARK_STAGES), choices=list(BENCHMARK_STAGES), help="stages to time, in pipeline order")
+    parser.add_argument("--seed", type=int, default=42, help="corpus generator seed")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="slowdown factor reported as a regression")
+    parser.add_argument("--verbose", action="store_true", help="show the stages' own output")
+    args = parser.parse_args(argv)
+    stages = [name for name in BENCHMARK_STAGES if name in args.stages]
+    regressions = run_benchmarks(args.sizes, stages, seed=args.seed, threshold=args.threshold, verbose=args.verbose)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import math
+import random
+import string
+from datetime import datetime, timedelta
+from src.utils.product_registry import load_registry
+
+CORPUS_DIR = "data/benchmarks/corpora"
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Shape of the fetched corpus: well-covered products get about three times the
+# entries of low-data ones, each post brings a few comments, and lengths are
+# long-tailed (a lognormal word count around the median).
+TIER_WEIGHTS = {"high": 3.0, "low": 1.0}
+COMMENTS_PER_POST = 3.5
+POST_WORDS_MEDIAN, POST_WORDS_SIGMA = 45, 0.8
+COMMENT_WORDS_MEDIAN, COMMENT_WORDS_SIGMA = 18, 0.7
+SPAM_RATE = 0.02
+OFF_TOPIC_RATE = 0.03
+URL_RATE = 0.05
+DUPLICATE_RATE = 0.01
+
+FILLER_WORDS = (
+    "i we you it this that the a an and or but so to of in on for with at from by about my our your "
+    "just really very also still even never always maybe think made make bought got gave found tried "
+    "wanted looking looks feels gift friend mom sister wife husband market fair weekend first last "
+    "time year month week price cost shipping order arrived package quality color colors size small "
+    "large piece pieces set pair little bit more less than much some any every other another new old "
+    "local online store seller maker shop craft project hobby learn learning started finished own "
+    "home kitchen room table shelf wall window light summer winter holiday birthday wedding christmas"
+).split()
+POSITIVE_WORDS = "love beautiful gorgeous perfect lovely stunning happy recommend favorite amazing wonderful sturdy".split()
+NEGATIVE_WORDS = "disappointed broke broken cheap flimsy faded ugly overpriced returned terrible smell cracked".split()
+SPAM_PHRASES = ["check out my shop", "buy now at", "click here for", "visit my store", "for sale dm me"]
+OFF_TOPIC_PHRASES = ["the subreddit rules say", "mods removed my post", "join our discord", "reddit is down again"]
+ID_CHARS = string.ascii_lowercase + string.digits
+
+def _word_count(rng, median, sigma):
+    return max(2, int(rng.lognormvariate(math.log(median), sigma)))
+
+def _product_vocabulary(registry):
+    vocabulary = {}
+    for product in registry.products:
+        name = product["name"]
+        vocabulary[name] = {
+            "mentions": [name] + product.get("aliases", []) + product.get("variants", []),
+            "keywords": product.get("boost_keywords", [])
+        }
+    return vocabulary
+
+def _text(rng, words, vocabulary, descriptive_terms):
+    """Filler text seeded with product mentions, product keywords, descriptive terms and sentiment."""
+    tokens = rng.choices(FILLER_WORDS, k=words)
+    inserts = []
+    if rng.random() < 0.85:
+        inserts.append(rng.choice(vocabulary["mentions"]))
+    inserts.extend(rng.sample(vocabulary["keywords"], k=min(len(vocabulary["keywords"]), rng.randint(0, 3))))
+    if rng.random() < 0.4:
+        inserts.append(rng.choice(descriptive_terms))
+    tone = rng.random()
+    if tone < 0.55:
+        inserts.append(rng.choice(POSITIVE_WORDS))
+    elif tone < 0.7:
+        inserts.append(rng.choice(NEGATIVE_WORDS))
+    for word in inserts:
+        tokens.insert(rng.randrange(len(tokens) + 1), word)
+    if rng.random() < SPAM_RATE:
+        tokens.insert(0, rng.choice(SPAM_PHRASES))
+    if rng.random() < OFF_TOPIC_RATE:
+        tokens.append(rng.choice(OFF_TOPIC_PHRASES))
+    if rng.random() < URL_RATE:
+        tokens.append("https://www.etsy.com/listing/" + str(rng.randint(10**8, 10**9)))
+    text = " ".join(tokens)
+    return text[0].upper() + text[1:]
+
+def generate_entries(n_entries, seed=42):
+    """Yield n_entries synthetic raw entries shaped like the output of fetch_data."""
+    rng = random.Random(seed)
+    registry = load_registry()
+    vocabularies = _product_vocabulary(registry)
+    names = registry.names
+    weights = [TIER_WEIGHTS.get(product.get("data_tier"), 1.0) for product in registry.products]
+    descriptive_terms = sorted(registry.descriptive_terms)
+    start = datetime(2023, 1, 1)
+    comment_probability = COMMENTS_PER_POST / (COMMENTS_PER_POST + 1)
+
+    produced = 0
+    last_id = None
+    product = rng.choices(names, weights)[0]
+    post_date = start
+    while produced < n_entries:
+        # Repeated ids happen when the same post is returned for two queries
+        if last_id is not None and rng.random() < DUPLICATE_RATE:
+            entry_id = last_id
+        elif produced and rng.random() < comment_probability:
+            text = _text(rng, _word_count(rng, COMMENT_WORDS_MEDIAN, COMMENT_WORDS_SIGMA), vocabularies[product], descriptive_terms)
+            yield {
+                "id": f"comment_{rng.getrandbits(63) - (1 << 62)}",
+                "product": product,
+                "text": text,
+                "type": "comment",
+                "created_at": (post_date + timedelta(days=rng.randint(0, 30))).strftime("%Y-%m-%d")
+            }
+            produced += 1
+            continue
+        else:
+            product = rng.choices(names, weights)[0]
+            post_date = start + timedelta(days=rng.randint(0, 730))
+            entry_id = "".join(rng.choices(ID_CHARS, k=7))
+        title = _text(rng, rng.randint(4, 12), vocabularies[product], descriptive_terms)
+        body = _text(rng, _word_count(rng, POST_WORDS_MEDIAN, POST_WORDS_SIGMA), vocabularies[product], descriptive_terms)
+        yield {
+            "id": entry_id,
+            "product": product,
+            "text": title + " " + body,
+            "type": "post",
+            "created_at": post_date.strftime("%Y-%m-%d")
+        }
+        last_id = entry_id
+        produced += 1
+
+def write_corpus(n_entries, seed=42, output_file=None):
+    """Write a synthetic corpus as a raw_social_data JSON array, reusing an existing one; returns its path."""
+    if output_file is None:
+        output_file = os.path.join(CORPUS_DIR, f"raw_social_data_synthetic_{n_entries}_seed{seed}.json")
+    if os.path.exists(output_file):
+        return output_file
+
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    temp_file = output_file + ".tmp"
+    # Stream entries to disk so a 1M-entry corpus never sits in memory
+    with open(temp_file, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, entry in enumerate(generate_entries(n_entries, seed)):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps(entry))
+        f.write("\n]")
+    os.replace(temp_file, output_file)
+    print(f"Generated {n_entries} synthetic entries in {output_file}")
+    return output_file
+
+if __name__ == "__main__":
+    for label in sys.argv[1:] or ["1k"]:
+        write_corpus(SIZES[label.lower()])
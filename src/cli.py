@@ -0,0 +1,102 @@
+import sys
+import argparse
+import importlib
+
+# Subcommands map to "module:function" and are imported only when run, so a
+# command pays for praw, pandas, textblob or vaderSentiment only if it uses them.
+COMMANDS = {
+    "fetch": ("src.data.fetch_data:fetch_data", "fetch Reddit posts and comments for every product"),
+    "crawl-plan": ("src.data.crawl_planner:print_crawl_plan", "show which subreddits and queries the next fetch searches, and the API calls saved"),
+    "fetch-top": ("src.data.fetch_top_products:fetch_top_products", "fetch more data for the high-data products"),
+    "fetch-low": ("src.data.fetch_missing_low_data:fetch_missing_low_data", "fetch more data for the low-data products"),
+    "train-relevance": ("src.utils.relevance_model:train_relevance_model", "train the relevance model every filter uses on the latest raw snapshot"),
+    "clean": ("src.data.clean_data:clean_data", "clean the latest raw snapshot"),
+    "analyze": ("src.data.analyze_data:analyze_data", "report product mention relevance of the latest raw snapshot"),
+    "text-analysis": ("src.utils.text_processing:text_processing", "keyword, sentiment and popularity analysis of the latest raw snapshot"),
+    "debug-analysis": ("src.data.debug_analysis:debug_analysis", "print relevance from the latest analysis file"),
+    "sales": ("src.data.sales_ledger:aggregate_sales_ledger", "aggregate the sales ledger into monthly revenue by region"),
+    "process": ("src.data.process_trends:process_trends", "score keywords and sentiment per product"),
+    "predict": ("src.data.predict_trends:predict_trends", "predict trends with bootstrap confidence"),
+    "powerbi": ("src.reporting.prepare_powerbi:prepare_powerbi_data", "write the Power BI file from the latest predictions"),
+    "powerbi-history": ("src.reporting.prepare_powerbi:backfill_powerbi_history", "add every stored prediction run missing from the Power BI history"),
+    "tenants": ("src.pipeline.tenants:run_tenants", "split the shared trends, predictions and Power BI files per tenant (config/tenants.json)"),
+    "import-predictions": ("src.data.prediction_store:import_prediction_files", "add old prediction CSV/JSON files to the history database"),
+    "forecast": ("src.pipeline.api:run_forecast", "run clean, process, predict and Power BI in one process"),
+    "lineage": ("src.data.artifact_catalog:print_lineage", "show which files the latest artifact of a kind came from"),
+    "pipeline": ("src.pipeline.run_pipeline:main", "run the pipeline, skipping unchanged steps (takes the runner's options)"),
+    "benchmark": ("src.benchmarks.run_benchmarks:main", "time the stages on synthetic corpora (takes the benchmark's options)"),
+    "daemon": ("src.pipeline.daemon:main", "stay resident, refresh on new data and serve the latest results (takes the daemon's options)"),
+    "stream": ("src.pipeline.streaming:main", "fold queued posts and comments into live trends in micro-batches (takes the stream's options)"),
+    "serve": ("src.pipeline.service:main", "serve products, trends and predictions over HTTP with FastAPI (takes the service's options)")
+}
+
+# Commands that parse their own arguments
+PASSTHROUGH = {"pipeline", "benchmark", "daemon", "stream", "serve"}
+
+def _resolve(command):
+    module_name, function_name = COMMANDS[command][0].split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="forecaster", description="Micro-entrepreneur trend forecaster.")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+    commands = {name: subparsers.add_parser(name, help=help_text, description=help_text) for name, (_, help_text) in COMMANDS.items()}
+
+    commands["fetch"].add_argument("--no-plan", action="store_true", help="search every subreddit and query, ignoring their yield history")
+    commands["fetch"].add_argument("--refresh", action="store_true", help="search every query again, even if it was searched in the last day")
+    commands["train-relevance"].add_argument("--threshold", type=float, default=0.5, help="relevance score every filter keeps entries at or above")
+    commands["train-relevance"].add_argument("--epochs", type=int, default=500, help="training passes over the labelled entries")
+    commands["process"].add_argument("--workers", type=int, default=1, help="score the cleaned corpus in this many processes")
+    commands["predict"].add_argument("--min-score", type=float, default=0, help="minimum current score to predict a product")
+    commands["predict"].add_argument("--resamples", type=int, default=2000, help="bootstrap resamples for the confidence intervals")
+    commands["powerbi"].add_argument("--min-confidence", type=float, default=50, help="drop predictions below this confidence (%% of bootstrap resamples agreeing on the trend)")
+    commands["powerbi"].add_argument("--format", choices=["csv", "parquet"], default="csv", help="file format of the Power BI history")
+    commands["powerbi-history"].add_argument("--min-confidence", type=float, default=50, help="drop predictions below this confidence (%% of bootstrap resamples agreeing on the trend)")
+    commands["powerbi-history"].add_argument("--format", choices=["csv", "parquet"], default="csv", help="file format of the Power BI history")
+    commands["tenants"].add_argument("--fetch", action="store_true", help="first fetch the products of every tenant, once each")
+    commands["tenants"].add_argument("--forecast", action="store_true", help="first run clean, process and predict once for all tenants")
+    commands["tenants"].add_argument("--no-plan", action="store_true", help="with --fetch, search every subreddit and query")
+    commands["tenants"].add_argument("--min-confidence", type=float, default=50, help="drop predictions below this confidence (%% of bootstrap resamples agreeing on the trend), unless a tenant sets its own")
+    commands["tenants"].add_argument("--format", choices=["csv", "parquet"], default="csv", help="file format of the tenants' Power BI history")
+    commands["forecast"].add_argument("--no-save", action="store_true", help="keep every intermediate in memory only")
+    commands["forecast"].add_argument("--skip-analyze", action="store_true", help="leave out the relevance analysis")
+    commands["forecast"].add_argument("--min-score", type=float, default=0, help="minimum current score to predict a product")
+    commands["forecast"].add_argument("--min-confidence", type=float, default=50, help="drop predictions below this confidence (%% of bootstrap resamples agreeing on the trend)")
+    commands["forecast"].add_argument("--resamples", type=int, default=2000, help="bootstrap resamples for the confidence intervals")
+    commands["lineage"].add_argument("kind", nargs="?", default="powerbi", help="artifact kind, e.g. powerbi, predictions, cleaned (default: powerbi)")
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Hand everything after the command name to commands with their own parser
+    if argv and argv[0] in PASSTHROUGH:
+        return _resolve(argv[0])(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    function = _resolve(args.command)
+    if args.command == "fetch":
+        function(plan_searches=not args.no_plan, refresh=args.refresh)
+    elif args.command == "train-relevance":
+        function(args.threshold, epochs=args.epochs)
+    elif args.command == "process":
+        function(workers=args.workers)
+    elif args.command == "predict":
+        function(args.min_score, n_resamples=args.resamples)
+    elif args.command in ("powerbi", "powerbi-history"):
+        function(args.min_confidence, file_format=args.format)
+    elif args.command == "tenants":
+        function(args.min_confidence, file_format=args.format, fetch=args.fetch, forecast=args.forecast, plan_searches=not args.no_plan)
+    elif args.command == "forecast":
+        function(
+            save=not args.no_save, analyze=not args.skip_analyze, min_score_threshold=args.min_score,
+            min_confidence_threshold=args.min_confidence, n_resamples=args.resamples
+        )
+    elif args.command == "lineage":
+        function(args.kind)
+    else:
+        function()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
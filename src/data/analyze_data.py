@@ -2,112 +2,92 @@ import os
 import json
 from datetime import datetime
 from collections import defaultdict
-
-def analyze_data():
+from src.utils.product_registry import load_registry
+from src.data.artifact_catalog import resolve_input, register_artifact
+from src.utils.instrumentation import instrumented, record_counts
+from src.utils.record_reader import RecordReader, batches
+from src.utils.relevance_model import load_relevance_model
+from src.data.clean_data import clean_text
+
+@instrumented("analyze")
+def analyze_data(data=None, save=True, parent_ids=None):
+    """Report product mention relevance for raw entries (the latest raw file unless passed in) and return the analysis.
+
+    An entry is relevant to its product when it mentions the product and the shared
+    relevance model accepts its cleaned text, the same checks the fetchers apply.
+    """
     # Step 1: Load the latest raw data file
-    input_dir = "data/raw"
-    raw_files = [f for f in os.listdir(input_dir) if f.startswith("raw_social_data_") and f.endswith(".json")]
-    if not raw_files:
-        print("Error: No raw data files found in data/raw/")
-        return
-    latest_file = max(raw_files, key=lambda x: os.path.getmtime(os.path.join(input_dir, x)))
-    input_file = os.path.join(input_dir, latest_file)
-
-    # Load data
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    # Step 2: Overall product mention analysis
-    descriptive_terms = [
-        "handmade", "artisan", "craft", "diy", "organic", "vegan", "natural", "traditional",
-        "authentic", "rustic", "unique", "custom", "for sale", "buy", "shop", "etsy", "made", "create", "design"
-    ]
-    product_keywords = [
-        "soap", "soaps",  "soapbar",
-        "scarf", "scarves", "shawl", "wrap", "shawls",
-        "pottery", "ceramic", "vase", "bowl", "plate", "mug", "cup",
-        "basket", "baskets", "woven", "weave", "weaving", "handwoven",
-        "textile", "saree", "cloth", "fabric", "print", "printed", "textiles",
-        "carving", "sculpture", "wooden", "woodwork", "wood",
-        "jewelry", "necklace", "bracelet", "bead", "beads", "pendant", "ring", "earring", "earrings", "jewellery", "jewel",
-        "bag", "handbag", "purse", "tote", "wallet", "bags",
-        "lamp", "light", "lantern", "lighting",
-        "candle", "candles", "wax", "beeswax", "bee",
-        "tableware", "plates", "bowls", "dishes", "dish",
-        "madhubani", "mithila",
-        "painting", "artwork", "art", "canvas", "sketch", "drawing", "paintings",
-        "studs", "dangles", "hoop", "drop",
-        "brass", "brassy",
-        "vegan", "plantbased",
-        "terracotta", "terra",
-        "embroidered", "embroidery"
-    ]
-
+    if data is None:
+        raw_artifact = resolve_input("raw", "data/raw", "raw_social_data_", ".json")
+        if raw_artifact is None:
+            print("Error: No raw data files found in data/raw/")
+            return
+        input_file = raw_artifact["path"]
+        parent_ids = [raw_artifact["id"]]
+
+        # Records are streamed from the file rather than loaded all at once
+        data = RecordReader(input_file)
+    else:
+        input_file = "in-memory raw data"
+
+    # Step 2: Overall product mention analysis and per-product distribution in one pass
+    registry = load_registry()
+    all_products = registry.names
+
+    total_entries = 0
     matched_entries = 0
-    unmatched_entries = []
-    for entry in data:
-        if not isinstance(entry.get("text", ""), str):
-            continue
-        text = entry["text"].lower()
-        product = entry.get("product", "").strip().lower()
-
-        # Relevance logic: Product-specific keyword OR (descriptive term AND general product keyword)
-        keywords_from_product = product.split()
-        has_product_keywords = any(keyword in text for keyword in keywords_from_product)
-        has_descriptive_terms = any(term in text for term in descriptive_terms)
-        has_general_product_keywords = any(keyword in text for keyword in product_keywords)
-        is_matched = has_product_keywords or (has_descriptive_terms and has_general_product_keywords)
-
-        if is_matched:
-            matched_entries += 1
-        else:
-            unmatched_entries.append(entry)
+    unmatched_entries = []  # Only the first 5 are kept, for the debug printout
+    product_counts = defaultdict(lambda: {"posts": 0, "comments": 0, "relevant_posts": 0, "relevant_comments": 0})
+    model = load_relevance_model()
+    for batch in batches(data, 1000):
+        # The shared relevance model judges the text clean_data would keep, a batch at a time
+        texts = [entry.get("text", "") if isinstance(entry.get("text", ""), str) else "" for entry in batch]
+        accepted = model.predict([clean_text(text) for text in texts])
+        for entry, text, is_accepted in zip(batch, texts, accepted):
+            total_entries += 1
+            if not isinstance(entry.get("text", ""), str):
+                continue
+            hits = registry.scan(text)
+            product = entry.get("product", "").strip().lower()
+            entry_id = entry.get("id", "")
+
+            # Relevance logic: Product-specific keyword OR (descriptive term AND general product keyword)
+            has_product_keywords = registry.mentions_product(hits, product)
+            has_descriptive_terms = registry.has_descriptive_term(hits)
+            has_general_product_keywords = registry.mentions_any_product(hits)
+            is_matched = has_product_keywords or (has_descriptive_terms and has_general_product_keywords)
+
+            if is_matched:
+                matched_entries += 1
+            elif len(unmatched_entries) < 5:
+                unmatched_entries.append(entry)
+
+            # Step 3: Per-product distribution and relevance analysis
+            if not product or not text or not entry_id:
+                continue
+
+            # Determine if it's a post or comment
+            is_comment = entry_id.startswith("comment_")
+            if is_comment:
+                product_counts[product]["comments"] += 1
+            else:
+                product_counts[product]["posts"] += 1
+
+            # Relevant: about the product and accepted by the relevance model, as in the fetchers
+            if is_matched and is_accepted:
+                if is_comment:
+                    product_counts[product]["relevant_comments"] += 1
+                else:
+                    product_counts[product]["relevant_posts"] += 1
 
+    record_counts(records_in=total_entries, records_out=matched_entries)
     print(f"Overall Product Mention Analysis for {input_file}:")
     print("=" * 60)
-    print(f"Total entries: {len(data)}")
+    print(f"Total entries: {total_entries}")
     print(f"Entries matching relevance criteria: {matched_entries}")
-    print(f"Percentage: {(matched_entries / len(data) * 100) if len(data) > 0 else 0:.2f}%")
+    print(f"Percentage: {(matched_entries / total_entries * 100) if total_entries > 0 else 0:.2f}%")
     print("\n")
 
-    # Step 3: Per-product distribution and relevance analysis
-    all_products = [
-        "beaded jewelry", "handmade earrings", "handmade painting", "handmade soap",
-        "leather bag", "handmade brass jewelry", "handmade beeswax candle",
-        "handwoven shawl", "handmade terracotta decor", "handmade wooden utensils",
-        "embroidered textile", "vegan soap"
-    ]
-
-    product_counts = defaultdict(lambda: {"posts": 0, "comments": 0, "relevant_posts": 0, "relevant_comments": 0})
-
-    for entry in data:
-        text = entry.get("text", "").lower()
-        product = entry.get("product", "").strip().lower()
-        entry_id = entry.get("id", "")
-
-        if not product or not text or not entry_id:
-            continue
-
-        # Determine if it's a post or comment
-        is_comment = entry_id.startswith("comment_")
-        if is_comment:
-            product_counts[product]["comments"] += 1
-        else:
-            product_counts[product]["posts"] += 1
-
-        # Relevance detection
-        keywords_from_product = product.split()
-        has_product_keywords = any(keyword in text for keyword in keywords_from_product)
-        has_descriptive_terms = any(term in text for term in descriptive_terms)
-        has_general_product_keywords = any(keyword in text for keyword in product_keywords)
-
-        is_relevant = has_product_keywords or (has_descriptive_terms and has_general_product_keywords)
-        if is_relevant:
-            if is_comment:
-                product_counts[product]["relevant_comments"] += 1
-            else:
-                product_counts[product]["relevant_posts"] += 1
-
     # Ensure all products are in product_counts
     for product in all_products:
         if product not in product_counts:
@@ -141,23 +121,19 @@ def analyze_data():
     # Step 4: Debug entries that are not relevant
     print("\nDebugging: Sample entries not marked as relevant (first 5):")
     print("=" * 60)
-    for entry in unmatched_entries[:5]:
+    for entry in unmatched_entries:
         print(f"Product: {entry.get('product', 'N/A')}")
         print(f"Text: {entry.get('text', '')[:100]}...")
         print("-" * 50)
 
     # Step 5: Save the analysis
-    output_dir = "data/processed"
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, f"data_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-
     analysis_data = {
         "file_analyzed": input_file,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "overall_stats": {
-            "total_posts": len(data),
+            "total_posts": total_entries,
             "entries_matching_relevance_criteria": matched_entries,
-            "percentage_matching": (matched_entries / len(data) * 100) if len(data) > 0 else 0
+            "percentage_matching": (matched_entries / total_entries * 100) if total_entries > 0 else 0
         },
         "product_stats": {
             product: {
@@ -179,9 +155,16 @@ def analyze_data():
         }
     }
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(analysis_data, f, indent=4)
-    print(f"\nSaved analysis to {output_file}")
+    if save:
+        output_dir = "data/processed"
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, f"data_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(analysis_data, f, indent=4)
+        register_artifact("analysis", output_file, parent_ids or [], row_count=len(analysis_data["product_stats"]), stage="analyze")
+        print(f"\nSaved analysis to {output_file}")
+
+    return analysis_data
 
 if __name__ == "__main__":
     analyze_data()
\ No newline at end of file
@@ -0,0 +1,183 @@
+import os
+import sys
+import hashlib
+import sqlite3
+from datetime import datetime
+
+CATALOG_FILE = "data/catalog.db"
+
+def connect(db_file=CATALOG_FILE):
+    """Open the artifact catalog, creating the schema on first use."""
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS artifacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            path TEXT NOT NULL,
+            label TEXT,
+            stage TEXT,
+            row_count INTEGER,
+            sha256 TEXT,
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_artifacts_kind_label ON artifacts (kind, label);
+        CREATE TABLE IF NOT EXISTS artifact_parents (
+            child_id INTEGER NOT NULL REFERENCES artifacts(id),
+            parent_id INTEGER NOT NULL REFERENCES artifacts(id),
+            PRIMARY KEY (child_id, parent_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_artifact_parents_parent ON artifact_parents (parent_id);
+        CREATE TABLE IF NOT EXISTS latest_artifacts (
+            kind TEXT PRIMARY KEY,
+            artifact_id INTEGER NOT NULL REFERENCES artifacts(id)
+        );
+    """)
+    return conn
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def register_artifact(kind, path, parent_ids=(), row_count=None, stage=None, label=None, sha256=None, db_file=CATALOG_FILE):
+    """Record an output artifact with its parents and make it the latest of its kind; returns its id."""
+    if sha256 is None and os.path.isfile(path):
+        sha256 = file_sha256(path)
+    conn = connect(db_file)
+    try:
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO artifacts (kind, path, label, stage, row_count, sha256, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, path, label, stage, row_count, sha256, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            artifact_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO artifact_parents (child_id, parent_id) VALUES (?, ?)",
+                [(artifact_id, parent_id) for parent_id in parent_ids if parent_id is not None]
+            )
+            conn.execute("INSERT OR REPLACE INTO latest_artifacts (kind, artifact_id) VALUES (?, ?)", (kind, artifact_id))
+    finally:
+        conn.close()
+    return artifact_id
+
+def get_artifact(artifact_id, db_file=CATALOG_FILE):
+    conn = connect(db_file)
+    try:
+        row = conn.execute("SELECT * FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+def latest_artifact(kind, db_file=CATALOG_FILE):
+    """Return the newest registered artifact of a kind (a primary-key lookup), or None."""
+    conn = connect(db_file)
+    try:
+        row = conn.execute(
+            "SELECT artifacts.* FROM latest_artifacts JOIN artifacts ON artifacts.id = latest_artifacts.artifact_id "
+            "WHERE latest_artifacts.kind = ?", (kind,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+def find_artifact(kind, label, db_file=CATALOG_FILE):
+    """Return the newest artifact of a kind with the given label (e.g. a prediction run), or None."""
+    conn = connect(db_file)
+    try:
+        row = conn.execute(
+            "SELECT * FROM artifacts WHERE kind = ? AND label = ? ORDER BY id DESC LIMIT 1", (kind, label)
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+def child_artifact(parent_id, kind, db_file=CATALOG_FILE):
+    """Return the newest artifact of a kind made directly from the given parent, or None."""
+    conn = connect(db_file)
+    try:
+        row = conn.execute(
+            "SELECT artifacts.* FROM artifact_parents JOIN artifacts ON artifacts.id = artifact_parents.child_id "
+            "WHERE artifact_parents.parent_id = ? AND artifacts.kind = ? ORDER BY artifacts.id DESC LIMIT 1",
+            (parent_id, kind)
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+def resolve_input(kind, directory, prefix, suffix, db_file=CATALOG_FILE):
+    """Find a stage's input through the catalog.
+
+    Files written before the catalog existed are found once by the old newest-by-mtime
+    scan and registered, so later lookups no longer list the directory.
+    """
+    artifact = latest_artifact(kind, db_file)
+    if artifact is not None and os.path.exists(artifact["path"]):
+        return artifact
+
+    if not os.path.isdir(directory):
+        return None
+    files = [f for f in os.listdir(directory) if f.startswith(prefix) and f.endswith(suffix)]
+    if not files:
+        return None
+    path = os.path.join(directory, max(files, key=lambda x: os.path.getmtime(os.path.join(directory, x))))
+    artifact_id = register_artifact(kind, path, stage="legacy-import", db_file=db_file)
+    return get_artifact(artifact_id, db_file)
+
+def lineage(artifact_id, db_file=CATALOG_FILE):
+    """Return every ancestor of an artifact, nearest first."""
+    conn = connect(db_file)
+    try:
+        rows = conn.execute("""
+            WITH RECURSIVE ancestors(id, depth) AS (
+                SELECT parent_id, 1 FROM artifact_parents WHERE child_id = ?
+                UNION
+                SELECT artifact_parents.parent_id, ancestors.depth + 1
+                FROM artifact_parents JOIN ancestors ON artifact_parents.child_id = ancestors.id
+            )
+            SELECT artifacts.*, MIN(ancestors.depth) AS depth
+            FROM ancestors JOIN artifacts ON artifacts.id = ancestors.id
+            GROUP BY artifacts.id
+            ORDER BY depth, artifacts.id
+        """, (artifact_id,)).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+def descendants(artifact_id, db_file=CATALOG_FILE):
+    """Return every artifact derived from an artifact, nearest first."""
+    conn = connect(db_file)
+    try:
+        rows = conn.execute("""
+            WITH RECURSIVE derived(id, depth) AS (
+                SELECT child_id, 1 FROM artifact_parents WHERE parent_id = ?
+                UNION
+                SELECT artifact_parents.child_id, derived.depth + 1
+                FROM artifact_parents JOIN derived ON artifact_parents.parent_id = derived.id
+            )
+            SELECT artifacts.*, MIN(derived.depth) AS depth
+            FROM derived JOIN artifacts ON artifacts.id = derived.id
+            GROUP BY artifacts.id
+            ORDER BY depth, artifacts.id
+        """, (artifact_id,)).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+def print_lineage(kind="powerbi", db_file=CATALOG_FILE):
+    """Print the ancestry of the latest artifact of a kind, e.g. which raw snapshot produced the Power BI file."""
+    artifact = latest_artifact(kind, db_file)
+    if artifact is None:
+        print(f"Error: No {kind} artifacts registered in {db_file}")
+        return
+    print(f"Lineage of {kind} artifact #{artifact['id']} ({artifact['path']}):")
+    print("-" * 60)
+    for ancestor in lineage(artifact["id"], db_file):
+        label = f" [{ancestor['label']}]" if ancestor["label"] else ""
+        print(f"{'  ' * ancestor['depth']}#{ancestor['id']} {ancestor['kind']}: {ancestor['path']}{label} rows={ancestor['row_count']} sha256={(ancestor['sha256'] or '')[:12]}")
+
+if __name__ == "__main__":
+    print_lineage(sys.argv[1] if len(sys.argv) > 1 else "powerbi")
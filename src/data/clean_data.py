@@ -1,8 +1,13 @@
 import os
-import json
 import re
 from collections import Counter
 from datetime import datetime
+from src.utils.product_registry import load_registry
+from src.data.artifact_catalog import resolve_input, register_artifact
+from src.utils.instrumentation import instrumented, record_counts
+from src.utils.record_reader import RecordReader, JsonArrayWriter, batches
+from src.utils.relevance_model import load_relevance_model
+from src.data.corpus_store import CorpusWriter, corpus_path
 
 def clean_text(text):
     text = re.sub(r'http[s]?://\S+|www\.\S+', '', text)  # Remove URLs
@@ -10,90 +15,124 @@ def clean_text(text):
     text = ' '.join(text.split())  # Normalize whitespace
     return text
 
-def is_relevant_entry(entry):
+def is_relevant_entry(entry, model=None):
+    """True if the entry has a text, product and id and the relevance model accepts its text."""
     if not entry.get("text") or not entry.get("product") or not entry.get("id"):
         return False
-    
-    text = entry["text"].lower()
-    spam_indicators = ["check out my", "buy now", "shop at", "visit my", "click here", "for sale"]
-    if any(indicator in text for indicator in spam_indicators):
-        return False
-    
-    # Increase minimum length to 10 words (approx. 50 characters)
-    if len(text.split()) < 10:
-        return False
-    
-    off_topic_indicators = ["subreddit", "reddit", "discord", "rules", "mods", "post removed"]
-    if any(indicator in text for indicator in off_topic_indicators):
-        return False
-    
-    # Filter out generic comments
-    generic_words = ["nice", "great", "cool", "awesome", "thanks", "love it", "good", "amazing", "wonderful"]
-    generic_count = sum(text.count(word) for word in generic_words)
-    if generic_count > 2:  # Allow up to 2 generic words
-        return False
-    
-    return True
-
-def clean_data():
-    input_dir = "data/raw"
-    raw_files = [f for f in os.listdir(input_dir) if f.startswith("raw_social_data_") and f.endswith(".json")]
-    if not raw_files:
-        print("Error: No raw data files found in data/raw/")
-        return
-    latest_file = max(raw_files, key=lambda x: os.path.getmtime(os.path.join(input_dir, x)))
-    input_file = os.path.join(input_dir, latest_file)
-
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    return (model or load_relevance_model()).is_relevant(entry["text"])
+
+def prepare_entry(entry, registry):
+    """Canonicalize the product and clean the text of one raw entry.
+
+    Returns (product, prepared entry), with the entry None when nothing is
+    left of its text and the product None when it is not a registered product.
+    """
+    product = registry.canonical_name(entry.get("product", ""))
+    if product is None:
+        return None, None
+    entry = dict(entry)  # Leave the caller's raw entries untouched
+    entry["product"] = product
+
+    text = entry.get("text", "")
+    cleaned_text = clean_text(text)
+    if not cleaned_text:
+        return product, None
+    entry["text"] = cleaned_text
+    return product, entry
+
+def clean_entry(entry, registry):
+    """Apply the cleaning rules to one raw entry.
+
+    Returns (product, cleaned entry), with the entry None when it is filtered
+    out and the product None when it is not a registered product.
+    """
+    product, entry = prepare_entry(entry, registry)
+    if entry is None or not is_relevant_entry(entry):
+        return product, None
+    return product, entry
+
+def clean_entries(entries, registry, model=None, batch_size=1000):
+    """clean_entry over a stream of raw entries, scoring the relevance of each batch in one model call."""
+    model = model or load_relevance_model()
+    for batch in batches(entries, batch_size):
+        prepared = [prepare_entry(entry, registry) for entry in batch]
+        candidates = [i for i, (_, entry) in enumerate(prepared) if entry is not None and entry.get("id")]
+        relevant = model.predict([prepared[i][1]["text"] for i in candidates])
+        accepted = {i for i, keep in zip(candidates, relevant) if keep}
+        for i, (product, entry) in enumerate(prepared):
+            yield product, entry if i in accepted else None
+
+@instrumented("clean")
+def clean_data(data=None, save=True, parent_ids=None):
+    """Clean raw entries, loading the latest raw file when none are passed in, and return the cleaned dataset.
+
+    A raw file is streamed record by record; when it is also saved, the cleaned
+    entries are streamed to the output file and the returned dataset reads
+    them back from there instead of holding them in memory.
+    """
+    streaming = data is None and save
+    if data is None:
+        raw_artifact = resolve_input("raw", "data/raw", "raw_social_data_", ".json")
+        if raw_artifact is None:
+            print("Error: No raw data files found in data/raw/")
+            return
+        input_file = raw_artifact["path"]
+        parent_ids = [raw_artifact["id"]]
+        data = RecordReader(input_file)
 
     cleaned_data = []
     seen_ids = set()
-    product_mapping = {
-        "handmade soap": "handmade soap",
-        "vegan soap": "vegan soap",
-        "leather bag": "leather bag",
-        "beaded jewelry": "beaded jewelry",
-        "embroidered textile": "embroidered textile",
-        "handmade beeswax candle": "handmade beeswax candle",
-        "handmade brass jewelry": "handmade brass jewelry",
-        "handmade earrings": "handmade earrings",
-        "handmade painting": "handmade painting",
-        "handmade terracotta decor": "handmade terracotta decor",
-        "handmade wooden utensils": "handmade wooden utensils",
-        "handwoven shawl": "handwoven shawl"
-    }
+    registry = load_registry()
 
-    total_entries = len(data)
+    total_entries = 0
     relevant_entries = 0
     product_counts = Counter()
     product_relevant_counts = Counter()
 
-    for entry in data:
-        entry_id = entry.get("id", "")
-        if entry_id in seen_ids:
-            continue
-        seen_ids.add(entry_id)
-
-        product = entry.get("product", "").strip().lower()
-        if product not in product_mapping:
-            continue
-        entry["product"] = product_mapping[product]
-        product_counts[product] += 1
-
-        text = entry.get("text", "")
-        cleaned_text = clean_text(text)
-        if not cleaned_text:
-            continue
-        entry["text"] = cleaned_text
-
-        if not is_relevant_entry(entry):
-            continue
-
-        cleaned_data.append(entry)
-        relevant_entries += 1
-        product_relevant_counts[product] += 1
-
+    if save:
+        output_dir = "data/cleaned"
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(output_dir, f"cleaned_social_data_{timestamp}.json")
+        temp_file = output_file + ".tmp"
+        out = open(temp_file, "w", encoding="utf-8")
+        writer = JsonArrayWriter(out)
+        # The same entries as a memory-mapped corpus store, for stages that share them across processes
+        corpus = CorpusWriter(corpus_path(output_file))
+
+    def unique_entries():
+        nonlocal total_entries
+        for entry in data:
+            total_entries += 1
+            entry_id = entry.get("id", "")
+            if entry_id in seen_ids:
+                continue
+            seen_ids.add(entry_id)
+            yield entry
+
+    try:
+        for product, entry in clean_entries(unique_entries(), registry):
+            if product is None:
+                continue
+            product_counts[product] += 1
+            if entry is None:
+                continue
+
+            if save:
+                writer.write(entry)
+                corpus.write(entry)
+            if not streaming:
+                cleaned_data.append(entry)
+            relevant_entries += 1
+            product_relevant_counts[product] += 1
+    except Exception:
+        if save:
+            out.close()
+            os.remove(temp_file)
+            corpus.abort()
+        raise
+
+    record_counts(records_in=total_entries, records_out=relevant_entries)
     overall_relevance = (relevant_entries / total_entries * 100) if total_entries > 0 else 0
 
     # Calculate product relevance
@@ -109,21 +148,21 @@ def clean_data():
     for product, relevance in sorted(product_relevance.items()):
         print(f"{product}: {relevance:.2f}%")
 
-    output_dir = "data/cleaned"
-    os.makedirs(output_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = os.path.join(output_dir, f"cleaned_social_data_{timestamp}.json")
+    if save:
+        writer.close(overall_relevance=overall_relevance, product_relevance=product_relevance)
+        out.close()
+        os.replace(temp_file, output_file)
+        corpus.close(overall_relevance=overall_relevance, product_relevance=product_relevance)
+        cleaned_id = register_artifact("cleaned", output_file, parent_ids or [], row_count=relevant_entries, stage="clean")
+        register_artifact("corpus", corpus.directory, [cleaned_id], row_count=relevant_entries, stage="clean")
+        print(f"\nSaved cleaned data to {output_file}")
 
-    # Save cleaned data with correct structure
     output_data = {
-        "entries": cleaned_data,  # Use "entries" instead of "data"
+        "entries": RecordReader(output_file) if streaming else cleaned_data,  # Use "entries" instead of "data"
         "overall_relevance": overall_relevance,
         "product_relevance": product_relevance
     }
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=4)
-
-    print(f"\nSaved cleaned data to {output_file}")
+    return output_data
 
 if __name__ == "__main__":
     clean_data()
\ No newline at end of file
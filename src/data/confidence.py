@@ -0,0 +1,127 @@
+import os
+import csv
+import numpy as np
+
+RISING_THRESHOLD = 2000
+DECLINING_THRESHOLD = 500
+
+# Bootstrap confidence is the share of resamples whose trend direction matches the
+# observed one: products far from a threshold reach 100%, products close to one fall
+# towards 50% (or lower, between the thresholds). Below 50% the reported direction is
+# more likely wrong than right, so reports drop those predictions by default.
+MIN_CONFIDENCE = 50
+
+def compute_trend_scores(post_count, keyword_count, sentiment, approx_income):
+    """Return (trend_score, predicted_score) for scalars or NumPy arrays."""
+    social_score = (post_count * 5) + (keyword_count * 0.5) + (sentiment * 100)
+    income_score = approx_income * 0.1
+    trend_score = (0.7 * social_score) + (0.3 * income_score)
+    growth_rate = np.where(trend_score > RISING_THRESHOLD, 1.05, np.where(trend_score < DECLINING_THRESHOLD, 0.95, 1.0))
+    predicted_score = trend_score * growth_rate
+    if np.ndim(trend_score) == 0:
+        return float(trend_score), float(predicted_score)
+    return trend_score, predicted_score
+
+def trend_directions(trend_score):
+    """Map trend scores to direction codes: 1 Rising, 0 Stable, -1 Declining."""
+    return np.where(trend_score > RISING_THRESHOLD, 1, np.where(trend_score < DECLINING_THRESHOLD, -1, 0))
+
+def entry_scores_from_rows(rows):
+    """Turn (product, is_post, sentiment, keyword_count) rows into product-coded NumPy arrays."""
+    products, product_codes = [], {}
+    codes, is_post, sentiments, keyword_counts = [], [], [], []
+    for product, post, sentiment, keyword_count in rows:
+        if product not in product_codes:
+            product_codes[product] = len(products)
+            products.append(product)
+        codes.append(product_codes[product])
+        is_post.append(post)
+        sentiments.append(sentiment)
+        keyword_counts.append(keyword_count)
+
+    return {
+        "products": products,
+        "codes": np.asarray(codes, dtype=np.int64),
+        "is_post": np.asarray(is_post, dtype=np.float64),
+        "sentiment": np.asarray(sentiments, dtype=np.float64),
+        "keyword_count": np.asarray(keyword_counts, dtype=np.float64)
+    }
+
+def load_entry_scores(input_file="data/processed/entry_scores.csv"):
+    """Load per-entry indicators written by process_trends as NumPy arrays."""
+    if not os.path.exists(input_file):
+        return None
+
+    with open(input_file, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        rows = [(row["product"], int(row["is_post"]), float(row["sentiment"]), int(row["keyword_count"])) for row in reader]
+    return entry_scores_from_rows(rows)
+
+def bootstrap_confidence(entry_scores, approx_income, n_resamples=2000, ci=95.0, seed=None, max_batch_cells=4_000_000):
+    """Bootstrap percentile intervals for current and predicted trend scores.
+
+    Every product's entries are resampled with replacement in the same NumPy
+    batch; per-product totals come from a single ``np.add.reduceat`` over the
+    product-sorted entries, so cost grows with entries x resamples only.
+    ``approx_income`` maps product name to monthly income (held fixed).
+    Returns a dict keyed by product name; its "confidence" is the percentage
+    of resamples that agree with the observed trend direction (see MIN_CONFIDENCE).
+    """
+    products = entry_scores["products"]
+    codes = entry_scores["codes"]
+    if len(codes) == 0:
+        return {}
+
+    # Sort entries so each product occupies one contiguous segment
+    order = np.argsort(codes, kind="stable")
+    columns = [entry_scores[name][order] for name in ("is_post", "sentiment", "keyword_count")]
+    counts = np.bincount(codes, minlength=len(products))
+    present = np.flatnonzero(counts)
+    counts = counts[present]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    slot_starts = np.repeat(starts, counts).astype(np.intp)
+    slot_counts = np.repeat(counts, counts).astype(np.float32)
+    slot_last = slot_starts + np.repeat(counts, counts) - 1
+    incomes = np.array([approx_income.get(products[p], 0.0) for p in present], dtype=np.float64)
+
+    # Point estimates from the observed sample
+    post_totals, sentiment_totals, keyword_totals = (np.add.reduceat(column, starts) for column in columns)
+    point_current, _ = compute_trend_scores(post_totals, keyword_totals, sentiment_totals / counts, incomes)
+    point_direction = trend_directions(point_current)
+
+    rng = np.random.default_rng(seed)
+    n_entries = len(slot_starts)
+    batch_size = max(1, min(n_resamples, max_batch_cells // n_entries))
+    current_samples = np.empty((n_resamples, len(present)))
+    predicted_samples = np.empty((n_resamples, len(present)))
+    agreement = np.zeros(len(present))
+
+    for batch_start in range(0, n_resamples, batch_size):
+        b = min(batch_size, n_resamples - batch_start)
+        # Draw n_p indices inside each product's own segment, for b resamples at once
+        idx = rng.random((b, n_entries), dtype=np.float32)
+        idx *= slot_counts
+        idx = idx.astype(np.intp)
+        idx += slot_starts
+        np.minimum(idx, slot_last, out=idx)  # float32 rounding can land on the segment end
+        post_sums, sentiment_sums, keyword_sums = (np.add.reduceat(np.take(column, idx), starts, axis=1) for column in columns)
+        current, predicted = compute_trend_scores(post_sums, keyword_sums, sentiment_sums / counts, incomes)
+        current_samples[batch_start:batch_start + b] = current
+        predicted_samples[batch_start:batch_start + b] = predicted
+        agreement += (trend_directions(current) == point_direction).sum(axis=0)
+
+    alpha = (100.0 - ci) / 2
+    current_low, current_high = np.percentile(current_samples, [alpha, 100 - alpha], axis=0)
+    predicted_low, predicted_high = np.percentile(predicted_samples, [alpha, 100 - alpha], axis=0)
+    agreement = agreement / n_resamples * 100
+
+    results = {}
+    for i, p in enumerate(present):
+        results[products[p]] = {
+            "current_score_low": float(current_low[i]),
+            "current_score_high": float(current_high[i]),
+            "predicted_score_low": float(predicted_low[i]),
+            "predicted_score_high": float(predicted_high[i]),
+            "confidence": float(agreement[i])
+        }
+    return results
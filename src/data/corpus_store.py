@@ -0,0 +1,130 @@
+import os
+import json
+import mmap
+import shutil
+import numpy as np
+from src.data.trend_aggregation import GrowableArray, to_day
+
+ARRAY_FILES = ("text_offsets", "id_offsets", "product_codes", "is_post", "dates")
+
+def corpus_path(cleaned_file):
+    """The corpus store directory written next to a cleaned JSON file."""
+    return os.path.splitext(cleaned_file)[0] + ".corpus"
+
+class CorpusWriter:
+    """Write cleaned entries as one UTF-8 text blob plus NumPy offset, product-code, post-flag and date arrays.
+
+    Entries go to a temporary directory that replaces ``directory`` on close,
+    so readers never see a half-written store.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.temp_directory = directory + ".tmp"
+        shutil.rmtree(self.temp_directory, ignore_errors=True)
+        os.makedirs(self.temp_directory)
+        self._texts = open(os.path.join(self.temp_directory, "texts.bin"), "wb")
+        self._ids = open(os.path.join(self.temp_directory, "ids.bin"), "wb")
+        self.products = []
+        self._product_codes = {}
+        self._arrays = {
+            "text_offsets": GrowableArray(np.int64),
+            "id_offsets": GrowableArray(np.int64),
+            "product_codes": GrowableArray(np.int32),
+            "is_post": GrowableArray(np.int8),
+            "dates": GrowableArray("datetime64[D]")
+        }
+        self._arrays["text_offsets"].append(0)
+        self._arrays["id_offsets"].append(0)
+        self._text_end = 0
+        self._id_end = 0
+
+    def write(self, entry):
+        product = entry["product"]
+        if product not in self._product_codes:
+            self._product_codes[product] = len(self.products)
+            self.products.append(product)
+        text = entry["text"].encode("utf-8")
+        entry_id = entry["id"].encode("utf-8")
+        self._texts.write(text)
+        self._ids.write(entry_id)
+        self._text_end += len(text)
+        self._id_end += len(entry_id)
+        self._arrays["text_offsets"].append(self._text_end)
+        self._arrays["id_offsets"].append(self._id_end)
+        self._arrays["product_codes"].append(self._product_codes[product])
+        self._arrays["is_post"].append(0 if entry["id"].startswith("comment_") else 1)
+        self._arrays["dates"].append(to_day(entry.get("created_at")))
+
+    def __len__(self):
+        return len(self._arrays["product_codes"])
+
+    def close(self, **metadata):
+        """Finish the store; extra keyword arguments are saved with it (e.g. the relevance figures)."""
+        self._texts.close()
+        self._ids.close()
+        for name, values in self._arrays.items():
+            np.save(os.path.join(self.temp_directory, f"{name}.npy"), values.values())
+        with open(os.path.join(self.temp_directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": len(self), "products": self.products, **metadata}, f)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(self.temp_directory, self.directory)
+
+    def abort(self):
+        self._texts.close()
+        self._ids.close()
+        shutil.rmtree(self.temp_directory, ignore_errors=True)
+
+def _map(path):
+    # mmap refuses empty files; an empty store has nothing to slice anyway
+    if os.path.getsize(path) == 0:
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+class CorpusStore:
+    """Read-only view of a corpus store; the blobs and arrays are memory-mapped, not loaded.
+
+    Processes that open the same store share one copy of it in the page
+    cache. ``text_bytes`` slices the blob without copying; ``text`` decodes.
+    Iterating yields entries in the cleaned-file layout.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            self.metadata = json.load(f)
+        self.products = self.metadata["products"]
+        self._texts = _map(os.path.join(directory, "texts.bin"))
+        self._ids = _map(os.path.join(directory, "ids.bin"))
+        for name in ARRAY_FILES:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+
+    def __len__(self):
+        return self.metadata["count"]
+
+    def text_bytes(self, i):
+        return memoryview(self._texts)[self.text_offsets[i]:self.text_offsets[i + 1]]
+
+    def text(self, i):
+        return str(self.text_bytes(i), "utf-8")
+
+    def entry_id(self, i):
+        return str(memoryview(self._ids)[self.id_offsets[i]:self.id_offsets[i + 1]], "utf-8")
+
+    def product(self, i):
+        return self.products[self.product_codes[i]]
+
+    def entry(self, i):
+        date = self.dates[i]
+        return {
+            "id": self.entry_id(i),
+            "product": self.product(i),
+            "text": self.text(i),
+            "type": "post" if self.is_post[i] else "comment",
+            "created_at": None if np.isnat(date) else str(date)
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.entry(i)
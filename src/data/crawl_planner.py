@@ -0,0 +1,267 @@
+import os
+import math
+import sqlite3
+from datetime import datetime
+
+CRAWL_DB_FILE = "data/cache/crawl_history.db"
+
+# A subreddit is pruned from a product's searches when it has returned at least
+# MIN_RETURNED results of which under MIN_YIELD passed the relevance filter, or
+# when MAX_EMPTY_SEARCHES searches returned nothing from it at all. Pruned
+# subreddits rejoin every REPROBE_EVERY searches of the product, in case they changed.
+MIN_RETURNED = 20
+MIN_YIELD = 0.02
+MAX_EMPTY_SEARCHES = 5
+REPROBE_EVERY = 10
+
+# A query is dropped once MIN_QUERY_SEARCHES searches show that under
+# MIN_NEW_SHARE of its relevant results were posts no earlier query had found
+# (or that it found nothing relevant); it is searched again every REPROBE_EVERY
+# searches of its product. Off-topic results are left out of the share, so a
+# query is judged on its overlap with the others rather than on its noise.
+MIN_QUERY_SEARCHES = 3
+MIN_NEW_SHARE = 0.1
+RESULTS_PER_PAGE = 100  # Reddit listings return at most 100 results per request
+
+def connect(db_file=CRAWL_DB_FILE):
+    """Open the crawl history, creating the schema on first use."""
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS product_searches (
+            product TEXT PRIMARY KEY,
+            searches INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS subreddit_yield (
+            product TEXT NOT NULL,
+            subreddit TEXT NOT NULL,
+            searches INTEGER NOT NULL,
+            returned INTEGER NOT NULL,
+            accepted INTEGER NOT NULL,
+            last_search INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (product, subreddit)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS query_yield (
+            query TEXT NOT NULL,
+            product TEXT NOT NULL,
+            searches INTEGER NOT NULL,
+            returned INTEGER NOT NULL,
+            relevant INTEGER NOT NULL,
+            new_posts INTEGER NOT NULL,
+            api_calls INTEGER NOT NULL,
+            last_search INTEGER NOT NULL,
+            skipped INTEGER NOT NULL,
+            calls_saved REAL NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (query, product)
+        ) WITHOUT ROWID;
+    """)
+    return conn
+
+def search_api_calls(returned, posts_expanded):
+    """Reddit requests one search costs: its listing pages plus one comment fetch per kept post."""
+    return max(1, math.ceil(returned / RESULTS_PER_PAGE)) + posts_expanded
+
+class CrawlPlanner:
+    """Per-product subreddit sets and query lists planned from the yield each has had.
+
+    A subreddit's yield is the share of its search results that passed the
+    relevance filter; ``subreddits`` drops pairs that keep yielding nothing
+    and brings them back now and then. A query's yield is the share of its
+    results that were new posts rather than posts an earlier query already
+    found; ``queries`` runs the most productive queries first and skips the
+    redundant ones. ``record_search`` and ``record_query`` add one search to
+    the history. Subreddit names are matched case-insensitively.
+    """
+
+    def __init__(self, db_file=CRAWL_DB_FILE, min_returned=MIN_RETURNED, min_yield=MIN_YIELD,
+                 max_empty_searches=MAX_EMPTY_SEARCHES, reprobe_every=REPROBE_EVERY,
+                 min_query_searches=MIN_QUERY_SEARCHES, min_new_share=MIN_NEW_SHARE):
+        self.db_file = db_file
+        self.min_returned = min_returned
+        self.min_yield = min_yield
+        self.max_empty_searches = max_empty_searches
+        self.reprobe_every = reprobe_every
+        self.min_query_searches = min_query_searches
+        self.min_new_share = min_new_share
+        conn = connect(db_file)
+        try:
+            self.searches = {row["product"]: row["searches"] for row in conn.execute("SELECT * FROM product_searches")}
+            self.yields = {(row["product"], row["subreddit"]): dict(row) for row in conn.execute("SELECT * FROM subreddit_yield")}
+            self.query_yields = {(row["query"], row["product"]): dict(row) for row in conn.execute("SELECT * FROM query_yield")}
+        finally:
+            conn.close()
+
+    def is_pruned(self, product, subreddit):
+        stats = self.yields.get((product, subreddit.lower()))
+        if stats is None:
+            return False
+        if stats["returned"] >= self.min_returned:
+            return stats["accepted"] / stats["returned"] < self.min_yield
+        return stats["returned"] == 0 and stats["searches"] >= self.max_empty_searches
+
+    def subreddits(self, product, candidates):
+        """The candidates worth searching for a product, in their original order; never an empty list."""
+        searches = self.searches.get(product, 0)
+        plan = []
+        for subreddit in candidates:
+            if self.is_pruned(product, subreddit):
+                last_search = self.yields[(product, subreddit.lower())]["last_search"]
+                if searches - last_search < self.reprobe_every:
+                    continue
+            plan.append(subreddit)
+        return plan or list(candidates)
+
+    def record_search(self, product, subreddits, returned, accepted):
+        """Add one search over ``subreddits``; returned and accepted count results per subreddit name."""
+        returned = {name.lower(): count for name, count in returned.items()}
+        accepted = {name.lower(): count for name, count in accepted.items()}
+        searches = self.searches[product] = self.searches.get(product, 0) + 1
+        updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        changed = []
+        # Results can come from subreddits outside the plan (e.g. renamed ones), so count those too
+        for subreddit in set(name.lower() for name in subreddits) | set(returned):
+            stats = self.yields.setdefault((product, subreddit), {
+                "product": product, "subreddit": subreddit, "searches": 0, "returned": 0, "accepted": 0, "last_search": 0
+            })
+            stats["searches"] += 1
+            stats["returned"] += returned.get(subreddit, 0)
+            stats["accepted"] += accepted.get(subreddit, 0)
+            stats["last_search"] = searches
+            stats["updated_at"] = updated_at
+            changed.append(stats)
+
+        conn = connect(self.db_file)
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO product_searches (product, searches) VALUES (?, ?)", (product, searches))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO subreddit_yield (product, subreddit, searches, returned, accepted, last_search, updated_at) "
+                    "VALUES (:product, :subreddit, :searches, :returned, :accepted, :last_search, :updated_at)",
+                    changed
+                )
+        finally:
+            conn.close()
+
+    def new_share(self, query, product):
+        """Share of a query's relevant results that no earlier query had found, or None before its first search."""
+        stats = self.query_yields.get((query, product))
+        if stats is None or not stats["searches"]:
+            return None
+        return stats["new_posts"] / stats["relevant"] if stats["relevant"] else 0.0
+
+    def is_redundant(self, query, product):
+        stats = self.query_yields.get((query, product))
+        if stats is None or stats["searches"] < self.min_query_searches:
+            return False
+        return self.new_share(query, product) < self.min_new_share
+
+    def queries(self, search_queries):
+        """Split (query, product) pairs into (pairs to search, pairs to skip).
+
+        Products keep their order; within a product, queries without history
+        come first, then the rest by falling new-post share, so the queries
+        that find the most posts get to them first. Every product keeps at
+        least its best query.
+        """
+        by_product = {}
+        for query, product in search_queries:
+            by_product.setdefault(product, []).append(query)
+
+        plan, skipped = [], []
+        for product, queries in by_product.items():
+            shares = {query: self.new_share(query, product) for query in queries}
+            queries = sorted(queries, key=lambda query: -1.0 if shares[query] is None else -shares[query])
+            searches = self.searches.get(product, 0)
+            kept, redundant = [], []
+            for query in queries:
+                stats = self.query_yields.get((query, product))
+                if self.is_redundant(query, product) and searches - stats["last_search"] < self.reprobe_every:
+                    redundant.append((query, product))
+                else:
+                    kept.append((query, product))
+            if not kept:
+                kept.append(redundant.pop(0))  # The best of the redundant queries
+            plan.extend(kept)
+            skipped.extend(redundant)
+        return plan, skipped
+
+    def _save_query(self, stats):
+        stats["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn = connect(self.db_file)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_yield (query, product, searches, returned, relevant, new_posts, api_calls, "
+                    "last_search, skipped, calls_saved, updated_at) VALUES (:query, :product, :searches, :returned, :relevant, "
+                    ":new_posts, :api_calls, :last_search, :skipped, :calls_saved, :updated_at)",
+                    stats
+                )
+        finally:
+            conn.close()
+
+    def _query_stats(self, query, product):
+        return self.query_yields.setdefault((query, product), {
+            "query": query, "product": product, "searches": 0, "returned": 0, "relevant": 0, "new_posts": 0,
+            "api_calls": 0, "last_search": 0, "skipped": 0, "calls_saved": 0.0
+        })
+
+    def record_query(self, query, product, returned, relevant, new_posts, api_calls):
+        """Add one search of a query: results returned, relevant ones, those no earlier query had found, requests made."""
+        stats = self._query_stats(query, product)
+        stats["searches"] += 1
+        stats["returned"] += returned
+        stats["relevant"] += relevant
+        stats["new_posts"] += new_posts
+        stats["api_calls"] += api_calls
+        stats["last_search"] = self.searches.get(product, 0)
+        self._save_query(stats)
+
+    def record_skip(self, query, product):
+        """Note a skipped query; returns the requests saved, estimated from its past searches."""
+        stats = self._query_stats(query, product)
+        saved = stats["api_calls"] / stats["searches"] if stats["searches"] else 0.0
+        stats["skipped"] += 1
+        stats["calls_saved"] += saved
+        self._save_query(stats)
+        return saved
+
+def print_crawl_plan(candidates=None, products=None):
+    """Print, per product, the subreddits and queries the next crawl searches and the ones it leaves out."""
+    from src.data.fetch_data import BASE_SUBREDDITS
+    from src.utils.product_registry import load_registry
+    candidates = candidates or BASE_SUBREDDITS
+    search_queries = load_registry().queries()
+    products = products or list(dict.fromkeys(product for _, product in search_queries))
+    planner = CrawlPlanner()
+
+    print(f"{'Product':<25} {'Searches':<10} {'Subreddits':<12} Pruned (accepted/returned)")
+    print("-" * 80)
+    for product in products:
+        plan = planner.subreddits(product, candidates)
+        pruned = [subreddit for subreddit in candidates if subreddit not in plan]
+        details = []
+        for subreddit in pruned:
+            stats = planner.yields[(product, subreddit.lower())]
+            if stats["returned"]:
+                details.append(f"{subreddit} ({stats['accepted']}/{stats['returned']})")
+        silent = len(pruned) - len(details)
+        if silent:
+            details.append(f"{silent} returning nothing")
+        print(f"{product:<25} {planner.searches.get(product, 0):<10} {f'{len(plan)}/{len(candidates)}':<12} {', '.join(details) or '-'}")
+
+    plan, skipped = planner.queries([(query, product) for query, product in search_queries if product in products])
+    print(f"\n{'Query':<30} {'Product':<25} {'Searches':<10} {'New share':<10} {'Calls/search':<13} {'Next':<6} Calls saved")
+    print("-" * 110)
+    for query, product in plan + skipped:
+        stats = planner.query_yields.get((query, product))
+        share = planner.new_share(query, product)
+        calls = f"{stats['api_calls'] / stats['searches']:.1f}" if stats and stats["searches"] else "-"
+        print(
+            f"{query:<30} {product:<25} {stats['searches'] if stats else 0:<10} {'-' if share is None else f'{share:.0%}':<10} "
+            f"{calls:<13} {'skip' if (query, product) in skipped else 'search':<6} {stats['calls_saved'] if stats else 0:.0f}"
+        )
+    total_saved = sum(stats["calls_saved"] for stats in planner.query_yields.values())
+    print(f"\nSkipped queries have saved about {total_saved:.0f} Reddit API calls so far.")
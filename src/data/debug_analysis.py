@@ -1,15 +1,13 @@
-import os
 import json
+from src.data.artifact_catalog import resolve_input
 
 def debug_analysis():
     # Find the latest analysis file
-    input_dir = "data/processed"
-    analysis_files = [f for f in os.listdir(input_dir) if f.startswith("data_analysis_") and f.endswith(".json")]
-    if not analysis_files:
+    analysis_artifact = resolve_input("analysis", "data/processed", "data_analysis_", ".json")
+    if analysis_artifact is None:
         print("Error: No analysis files found in data/processed/")
         return
-    latest_file = max(analysis_files, key=lambda x: os.path.getmtime(os.path.join(input_dir, x)))
-    input_file = os.path.join(input_dir, latest_file)
+    input_file = analysis_artifact["path"]
     
     # Load data
     with open(input_file, "r") as f:
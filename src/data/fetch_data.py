@@ -4,48 +4,67 @@ import pickle
 import praw
 import time
 from datetime import datetime
+from collections import Counter
 from dotenv import load_dotenv
+from src.utils.product_registry import load_registry
+from src.data.artifact_catalog import register_artifact
+from src.utils.instrumentation import instrumented, record_counts, record_cache
+from src.utils.single_flight import SingleFlight
+from src.data.crawl_planner import CrawlPlanner, search_api_calls
+from src.data.clean_data import clean_text
+from src.utils.relevance_model import load_relevance_model
 
-def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, existing_posts=None, reddit=None):
+# Combined subreddits for all products, updated with new subreddits for low-confidence products
+BASE_SUBREDDITS = (
+    "Crafts+Handmade+Knitting+IndianArt+Artisan+Art+Etsy+HomeDecor+TextileArts+Ceramics+TraditionalArt+"
+    "SouthAsianArt+FiberArts+DIY+Vintage+RedditMade+SmallBusiness+SomethingIMade+HandmadeGifts+"
+    "KnittingPatterns+Crochet+PotteryStudio+CeramicArt+TextileDesign+IndianFashion+VintageDecor+"
+    "CandleMakers+Woodworking+Carving+Soapmakers+NaturalBeauty+ArtMarket+DIYGifts+Crafty+"
+    "ThriftStoreHauls+Frugal+Anticonsumption+SustainableLiving+Minimalism+Decor+InteriorDesign+"
+    "Jewelry+Quilting+Sustainable+Soapmaking+JewelryMaking+Beading+Leathercraft+Watercolor+"
+    "Weaving+TextileArt+Pottery+CeramicsStudio+Metalworking+CandleMaking+Painting+Artists"
+).split("+")
+
+# A batch fetch reuses a query's cached result only while it is younger than this
+QUERY_CACHE_MAX_AGE_SECONDS = 24 * 3600
+
+def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, existing_posts=None, reddit=None, cache_file=None, refresh=False, planner=None, max_age=None):
     if existing_posts is None:
         existing_posts = set()
-    cache_file = f"data/cache/{query.replace(' ', '_')}.pkl"
+    if cache_file is None:
+        cache_file = f"data/cache/{query.replace(' ', '_')}.pkl"
     
-    # Check cache
-    if os.path.exists(cache_file):
+    # Check cache (skipped when refreshing a stale result or when it is older than max_age seconds)
+    if not refresh and os.path.exists(cache_file) and (max_age is None or time.time() - os.path.getmtime(cache_file) <= max_age):
+        record_cache("query_cache", hit=True)
         with open(cache_file, "rb") as f:
             return pickle.load(f)
+    record_cache("query_cache", hit=False)
     
-    # Descriptive terms to ensure relevance
-    descriptive_terms = [
-        "handmade", "artisan", "craft", "diy", "organic", "vegan", "natural", "traditional",
-        "authentic", "rustic", "unique", "custom", "for sale", "buy", "shop", "etsy", "made", "create", "design"
-    ]
-    
-    # Product-specific keywords
-    product_keywords = product_name.lower().split()
+    # Registered product terms and descriptive terms ensure relevance; the relevance model filters out the rest
+    registry = load_registry()
+    model = load_relevance_model()
     
     results, comments = [], []
-    # Combined subreddits for all products, updated with new subreddits for low-confidence products
-    base_subreddits = (
-        "Crafts+Handmade+Knitting+IndianArt+Artisan+Art+Etsy+HomeDecor+TextileArts+Ceramics+TraditionalArt+"
-        "SouthAsianArt+FiberArts+DIY+Vintage+RedditMade+SmallBusiness+SomethingIMade+HandmadeGifts+"
-        "KnittingPatterns+Crochet+PotteryStudio+CeramicArt+TextileDesign+IndianFashion+VintageDecor+"
-        "CandleMakers+Woodworking+Carving+Soapmakers+NaturalBeauty+ArtMarket+DIYGifts+Crafty+"
-        "ThriftStoreHauls+Frugal+Anticonsumption+SustainableLiving+Minimalism+Decor+InteriorDesign+"
-        "Jewelry+Quilting+Sustainable+Soapmaking+JewelryMaking+Beading+Leathercraft+Watercolor+"
-        "Weaving+TextileArt+Pottery+CeramicsStudio+Metalworking+CandleMaking+Painting+Artists"
-    )
+    # The planner leaves out subreddits that have stopped yielding relevant posts for this product
+    subreddits = planner.subreddits(product_name, BASE_SUBREDDITS) if planner is not None else BASE_SUBREDDITS
+    returned, accepted = Counter(), Counter()
     
     try:
-        posts = reddit.subreddit(base_subreddits).search(f'"{query}"', limit=max_posts, sort="relevance", time_filter="all")
-        for post in posts:
-            post_text = post.title + " " + (post.selftext or "")
-            post_lower = post_text.lower()
-            if (post_text not in existing_posts and
-                len(post_text) > 20 and
-                (any(keyword in post_lower for keyword in product_keywords) or
-                 any(term in post_lower for term in descriptive_terms))):
+        posts = list(reddit.subreddit("+".join(subreddits)).search(f'"{query}"', limit=max_posts, sort="relevance", time_filter="all"))
+        post_texts = [post.title + " " + (post.selftext or "") for post in posts]
+        # The relevance model scores the whole result page at once; the registry checks keep posts on-product
+        post_accepted = model.predict([clean_text(text) for text in post_texts])
+        for post, post_text, is_accepted in zip(posts, post_texts, post_accepted):
+            subreddit = post.subreddit.display_name
+            returned[subreddit] += 1
+            post_hits = registry.scan(post_text)
+            relevant = (is_accepted and
+                        (registry.mentions_product(post_hits, product_name) or
+                         registry.has_descriptive_term(post_hits)))
+            if relevant:
+                accepted[subreddit] += 1
+            if relevant and post_text not in existing_posts:
                 results.append({
                     "id": post.id,
                     "product": product_name,
@@ -55,19 +74,27 @@ def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, exis
                 })
                 existing_posts.add(post_text)
                 post.comments.replace_more(limit=0)
-                for comment in post.comments.list()[:max_comments]:
-                    comment_lower = comment.body.lower()
-                    if (len(comment.body) > 20 and
-                        (any(keyword in comment_lower for keyword in product_keywords) or
-                         any(term in comment_lower for term in descriptive_terms)) and
-                        not any(generic in comment_lower for generic in ["nice", "great", "thanks", "love it", "cool", "awesome"])):
-                        comments.append(comment.body)
+                post_comments = [comment.body for comment in post.comments.list()[:max_comments]]
+                comment_accepted = model.predict([clean_text(body) for body in post_comments])
+                for body, is_accepted in zip(post_comments, comment_accepted):
+                    comment_hits = registry.scan(body)
+                    if (is_accepted and
+                        (registry.mentions_product(comment_hits, product_name) or
+                         registry.has_descriptive_term(comment_hits))):
+                        comments.append(body)
+        if planner is not None:
+            planner.record_search(product_name, subreddits, returned, accepted)
+            # Relevant posts missing from results were already found by an earlier query
+            planner.record_query(
+                query, product_name, sum(returned.values()), sum(accepted.values()), len(results),
+                search_api_calls(sum(returned.values()), len(results))
+            )
         time.sleep(2)
     except Exception as e:
         print(f"Error fetching data for {query}: {e}")
         time.sleep(5)
     
-    print(f"Fetched {len(results)} posts and {len(comments)} comments for {query}")
+    print(f"Fetched {len(results)} posts and {len(comments)} comments for {query} from {len(subreddits)} subreddits")
     print(f"Posts for {query}:")
     for i, post in enumerate(results, 1):
         print(f"Post {i}: {post['text'][:100]}...")
@@ -80,96 +107,72 @@ def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, exis
     
     return results, comments
 
-def fetch_data():
-    # Load environment variables
+def reddit_client():
+    """A Reddit client from the REDDIT_* settings in .env."""
     load_dotenv()
-    reddit = praw.Reddit(
+    return praw.Reddit(
         client_id=os.getenv("REDDIT_CLIENT_ID"),
         client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
         username=os.getenv("REDDIT_USERNAME"),
         password=os.getenv("REDDIT_PASSWORD"),
         user_agent=os.getenv("REDDIT_USER_AGENT")
     )
+
+# On-demand lookups (frontend, services) share crawls and serve stale results while refreshing
+LOOKUP_MAX_AGE_SECONDS = 6 * 3600
+_lookups = SingleFlight(max_age=LOOKUP_MAX_AGE_SECONDS)
+
+def lookup_reddit_data(query, product_name, max_posts=10, max_comments=20):
+    """fetch_reddit_data for interactive callers; returns (posts, comments).
+
+    Concurrent lookups of the same query share one crawl. A result older than
+    LOOKUP_MAX_AGE_SECONDS is returned at once while a single background crawl
+    refreshes it. Lookups keep their own cache files, apart from the batch fetch's.
+    """
+    cache_file = f"data/cache/lookup_{query.replace(' ', '_')}_{max_posts}_{max_comments}.pkl"
+
+    def load(stale):
+        # A cache file from an earlier session counts as fetched when it was written
+        fetched_at = os.path.getmtime(cache_file) if not stale and os.path.exists(cache_file) else time.time()
+        result = fetch_reddit_data(
+            query, product_name, max_posts=max_posts, max_comments=max_comments,
+            reddit=reddit_client(), cache_file=cache_file, refresh=stale
+        )
+        return result, fetched_at
+
+    return _lookups.get((query, max_posts, max_comments), load)
+
+@instrumented("fetch")
+def fetch_data(plan_searches=True, products=None, refresh=False):
+    """Fetch every registered query, or only the queries of ``products``.
+
+    With plan_searches, each product searches only its productive
+    subreddits, its queries run best first, and queries that mostly find
+    posts earlier queries already found are skipped. A query cached within
+    QUERY_CACHE_MAX_AGE_SECONDS is not searched again unless ``refresh``.
+    """
+    reddit = reddit_client()
+    planner = CrawlPlanner() if plan_searches else None
     
     # Start fresh
     all_posts = []
     existing_posts = set()
     
     # Define search queries for all products, updated with new queries for low-confidence products
-    search_queries = [
-        # Beaded Jewelry
-        ("beaded jewelry", "beaded jewelry"),
-        ("handmade beaded jewelry", "beaded jewelry"),
-        ("artisan beaded jewelry", "beaded jewelry"),
-        # Handmade Earrings
-        ("handmade earrings", "handmade earrings"),
-        ("artisan earrings", "handmade earrings"),
-        ("handcrafted earrings", "handmade earrings"),
-        # Handmade Painting
-        ("handmade painting", "handmade painting"),
-        ("artisan painting", "handmade painting"),
-        ("handcrafted painting", "handmade painting"),
-        ("handmade art painting", "handmade painting"),
-        ("artisan canvas painting", "handmade painting"),
-        # Handmade Soap
-        ("handmade soap", "handmade soap"),
-        ("artisan soap", "handmade soap"),
-        ("handcrafted soap", "handmade soap"),
-        # Leather Bag
-        ("leather bag", "leather bag"),
-        ("handmade leather bag", "leather bag"),
-        ("artisan leather bag", "leather bag"),
-        # Handmade Brass Jewelry
-        ("Handmade Brass Bangles", "handmade brass jewelry"),
-        ("Brass Necklace", "handmade brass jewelry"),
-        ("Artisan Brass Jewelry", "handmade brass jewelry"),
-        ("handmade brass", "handmade brass jewelry"),
-        ("handmade brass necklace", "handmade brass jewelry"),
-        ("brass artisan jewelry", "handmade brass jewelry"),
-        # Handmade Beeswax Candle
-        ("Handmade Beeswax Candle", "handmade beeswax candle"),
-        ("Beeswax Candle", "handmade beeswax candle"),
-        ("Eco-Friendly Beeswax Candle", "handmade beeswax candle"),
-        ("natural beeswax candle", "handmade beeswax candle"),
-        ("beeswax candle handmade", "handmade beeswax candle"),
-        ("natural candle artisan", "handmade beeswax candle"),
-        # Handwoven Shawl
-        ("Handwoven Shawl", "handwoven shawl"),
-        ("Pashmina Shawl", "handwoven shawl"),
-        ("Traditional Handwoven Shawl", "handwoven shawl"),
-        ("handmade shawl", "handwoven shawl"),
-        ("artisan shawl", "handwoven shawl"),
-        ("handmade pashmina", "handwoven shawl"),
-        # Handmade Terracotta Decor
-        ("Handmade Terracotta Planter", "handmade terracotta decor"),
-        ("Terracotta Figurine", "handmade terracotta decor"),
-        ("Rustic Terracotta Decor", "handmade terracotta decor"),
-        ("terracotta craft", "handmade terracotta decor"),
-        ("handmade terracotta pottery", "handmade terracotta decor"),
-        ("artisan terracotta", "handmade terracotta decor"),
-        # Handmade Wooden Utensils
-        ("Handmade Wooden Spoon", "handmade wooden utensils"),
-        ("Wooden Bowl", "handmade wooden utensils"),
-        ("Eco-Friendly Wooden Utensils", "handmade wooden utensils"),
-        ("handmade wooden kitchen", "handmade wooden utensils"),
-        # Embroidered Textile
-        ("Hand Embroidery", "embroidered textile"),
-        ("Floral Embroidery", "embroidered textile"),
-        ("Minimalist Embroidery", "embroidered textile"),
-        ("embroidered fabric", "embroidered textile"),
-        ("handmade embroidery", "embroidered textile"),
-        ("hand embroidered fabric", "embroidered textile"),
-        ("artisan embroidery textile", "embroidered textile"),
-        # Vegan Soap
-        ("Cold Process Soap", "vegan soap"),
-        ("Essential Oil Soap", "vegan soap"),
-        ("Zero Waste Soap", "vegan soap"),
-    ]
+    search_queries = load_registry().queries()
+    if products is not None:
+        search_queries = [(query, product_name) for query, product_name in search_queries if product_name in products]
+    if planner is not None:
+        search_queries, skipped = planner.queries(search_queries)
+        if skipped:
+            calls_saved = sum(planner.record_skip(query, product_name) for query, product_name in skipped)
+            print(f"Skipping {len(skipped)} queries whose results other queries already found: {', '.join(query for query, _ in skipped)}")
+            print(f"About {calls_saved:.0f} Reddit API calls saved")
     
     # Fetch data for all queries
     for query, product_name in search_queries:
         print(f"Fetching data for {product_name} using query: {query}")
-        posts, comments = fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, existing_posts=existing_posts, reddit=reddit)
+        posts, comments = fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, existing_posts=existing_posts, reddit=reddit, planner=planner, refresh=refresh, max_age=QUERY_CACHE_MAX_AGE_SECONDS)
         all_posts.extend(posts)
         for comment in comments:
             all_posts.append({
@@ -187,7 +190,10 @@ def fetch_data():
     os.makedirs(output_dir, exist_ok=True)
     with open(output_file, "w") as f:
         json.dump(all_posts, f, indent=4)
+    record_counts(records_out=len(all_posts))
+    register_artifact("raw", output_file, row_count=len(all_posts), stage="fetch")
     print(f"Saved {len(all_posts)} posts/comments to {output_file}")
+    return output_file
 
 if __name__ == "__main__":
     fetch_data()
\ No newline at end of file
@@ -5,6 +5,11 @@ import praw
 import time
 from datetime import datetime
 from dotenv import load_dotenv
+from src.utils.product_registry import load_registry
+from src.data.artifact_catalog import register_artifact
+from src.utils.instrumentation import instrumented, record_counts, record_cache
+from src.data.clean_data import clean_text
+from src.utils.relevance_model import load_relevance_model
 
 def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, existing_posts=None, reddit=None):
     if existing_posts is None:
@@ -13,17 +18,14 @@ def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, exis
     
     # Check cache
     if os.path.exists(cache_file):
+        record_cache("query_cache", hit=True)
         with open(cache_file, "rb") as f:
             return pickle.load(f)
+    record_cache("query_cache", hit=False)
     
-    # Descriptive terms to ensure relevance
-    descriptive_terms = [
-        "handmade", "artisan", "craft", "diy", "organic", "vegan", "natural", "traditional",
-        "authentic", "rustic", "unique", "custom", "for sale", "buy", "shop", "etsy", "made", "create", "design"
-    ]
-    
-    # Product-specific keywords
-    product_keywords = product_name.lower().split()
+    # Registered product terms and descriptive terms ensure relevance; the relevance model filters out the rest
+    registry = load_registry()
+    model = load_relevance_model()
     
     results, comments = [], []
     base_subreddits = (
@@ -36,14 +38,15 @@ def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, exis
     )
     
     try:
-        posts = reddit.subreddit(base_subreddits).search(f'"{query}"', limit=max_posts, sort="relevance", time_filter="all")
-        for post in posts:
-            post_text = post.title + " " + (post.selftext or "")
-            post_lower = post_text.lower()
+        posts = list(reddit.subreddit(base_subreddits).search(f'"{query}"', limit=max_posts, sort="relevance", time_filter="all"))
+        post_texts = [post.title + " " + (post.selftext or "") for post in posts]
+        post_accepted = model.predict([clean_text(text) for text in post_texts])
+        for post, post_text, is_accepted in zip(posts, post_texts, post_accepted):
+            post_hits = registry.scan(post_text)
             if (post_text not in existing_posts and
-                len(post_text) > 5 and
-                (any(keyword in post_lower for keyword in product_keywords) or
-                 any(term in post_lower for term in descriptive_terms))):
+                is_accepted and
+                (registry.mentions_product(post_hits, product_name) or
+                 registry.has_descriptive_term(post_hits))):
                 results.append({
                     "id": post.id,
                     "product": product_name,
@@ -52,12 +55,14 @@ def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, exis
                 })
                 existing_posts.add(post_text)
                 post.comments.replace_more(limit=0)
-                for comment in post.comments.list()[:max_comments]:
-                    comment_lower = comment.body.lower()
-                    if (len(comment.body) > 5 and
-                        (any(keyword in comment_lower for keyword in product_keywords) or
-                         any(term in comment_lower for term in descriptive_terms))):
-                        comments.append(comment.body)
+                post_comments = [comment.body for comment in post.comments.list()[:max_comments]]
+                comment_accepted = model.predict([clean_text(body) for body in post_comments])
+                for body, is_accepted in zip(post_comments, comment_accepted):
+                    comment_hits = registry.scan(body)
+                    if (is_accepted and
+                        (registry.mentions_product(comment_hits, product_name) or
+                         registry.has_descriptive_term(comment_hits))):
+                        comments.append(body)
         time.sleep(3)
     except Exception as e:
         print(f"Error fetching data for {query}: {e}")
@@ -76,6 +81,7 @@ def fetch_reddit_data(query, product_name, max_posts=500, max_comments=100, exis
     
     return results, comments
 
+@instrumented("fetch_missing_low_data")
 def fetch_missing_low_data():
     # Load environment variables
     load_dotenv()
@@ -91,43 +97,7 @@ def fetch_missing_low_data():
     all_posts = []
     
     # Define search queries for new alternative products and embroidered textile
-    search_queries = [
-        # Handmade Brass Jewelry (replacing Brass Lamp)
-        ("Handmade Brass Bangles", "handmade brass jewelry"),
-        ("Brass Necklace", "handmade brass jewelry"),
-        ("Artisan Brass Jewelry", "handmade brass jewelry"),
-        ("handmade brass", "handmade brass jewelry"),
-        # Handmade Beeswax Candle (replacing Handmade Candle)
-        ("Handmade Beeswax Candle", "handmade beeswax candle"),
-        ("Beeswax Candle", "handmade beeswax candle"),
-        ("Eco-Friendly Beeswax Candle", "handmade beeswax candle"),
-        ("natural beeswax candle", "handmade beeswax candle"),
-        # Handwoven Shawl (replacing Handmade Scarf)
-        ("Handwoven Shawl", "handwoven shawl"),
-        ("Pashmina Shawl", "handwoven shawl"),
-        ("Traditional Handwoven Shawl", "handwoven shawl"),
-        ("handmade shawl", "handwoven shawl"),
-        # Handmade Terracotta Decor (replacing Pottery)
-        ("Handmade Terracotta Planter", "handmade terracotta decor"),
-        ("Terracotta Figurine", "handmade terracotta decor"),
-        ("Rustic Terracotta Decor", "handmade terracotta decor"),
-        ("terracotta craft", "handmade terracotta decor"),
-        # Handmade Wooden Utensils (replacing Wood Carving)
-        ("Handmade Wooden Spoon", "handmade wooden utensils"),
-        ("Wooden Bowl", "handmade wooden utensils"),
-        ("Eco-Friendly Wooden Utensils", "handmade wooden utensils"),
-        ("handmade wooden kitchen", "handmade wooden utensils"),
-        # Embroidered Textile (keeping for now, with broader keywords)
-        ("Hand Embroidery", "embroidered textile"),
-        ("Floral Embroidery", "embroidered textile"),
-        ("Minimalist Embroidery", "embroidered textile"),
-        ("embroidered fabric", "embroidered textile"),
-        ("handmade embroidery", "embroidered textile"),
-        # Vegan Soap (already sufficient, but included for consistency)
-        ("Cold Process Soap", "vegan soap"),
-        ("Essential Oil Soap", "vegan soap"),
-        ("Zero Waste Soap", "vegan soap"),
-    ]
+    search_queries = load_registry().queries(data_tier="low")
     
     # Fetch data using the new queries
     existing_posts = set()
@@ -150,6 +120,8 @@ def fetch_missing_low_data():
     os.makedirs(output_dir, exist_ok=True)
     with open(output_file, "w") as f:
         json.dump(all_posts, f, indent=4)
+    record_counts(records_out=len(all_posts))
+    register_artifact("raw", output_file, row_count=len(all_posts), stage="fetch_missing_low_data")
     print(f"Saved {len(all_posts)} posts/comments to {output_file}")
 
 if __name__ == "__main__":
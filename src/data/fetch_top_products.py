@@ -5,6 +5,11 @@ import praw
 import time
 from datetime import datetime
 from dotenv import load_dotenv
+from src.utils.product_registry import load_registry
+from src.data.artifact_catalog import register_artifact
+from src.utils.instrumentation import instrumented, record_counts, record_cache
+from src.data.clean_data import clean_text
+from src.utils.relevance_model import load_relevance_model
 
 def fetch_reddit_data(query, product_name, max_posts=300, existing_posts=None, reddit=None):
     if existing_posts is None:
@@ -13,17 +18,14 @@ def fetch_reddit_data(query, product_name, max_posts=300, existing_posts=None, r
     
     # Check cache
     if os.path.exists(cache_file):
+        record_cache("query_cache", hit=True)
         with open(cache_file, "rb") as f:
             return pickle.load(f)
+    record_cache("query_cache", hit=False)
     
-    # Descriptive terms to ensure relevance
-    descriptive_terms = [
-        "handmade", "artisan", "craft", "diy", "organic", "vegan", "natural", "traditional",
-        "authentic", "rustic", "unique", "custom", "for sale", "buy", "shop", "etsy", "made", "create", "design"
-    ]
-    
-    # Product-specific keywords
-    product_keywords = product_name.lower().split()
+    # Registered product terms and descriptive terms ensure relevance; the relevance model filters out the rest
+    registry = load_registry()
+    model = load_relevance_model()
     
     results, comments = [], []
     # Subreddit selection for high-data products
@@ -33,14 +35,15 @@ def fetch_reddit_data(query, product_name, max_posts=300, existing_posts=None, r
     )
     
     try:
-        posts = reddit.subreddit(base_subreddits).search(f'"{query}"', limit=max_posts, sort="relevance", time_filter="all")
-        for post in posts:
-            post_text = post.title + " " + (post.selftext or "")
-            post_lower = post_text.lower()
+        posts = list(reddit.subreddit(base_subreddits).search(f'"{query}"', limit=max_posts, sort="relevance", time_filter="all"))
+        post_texts = [post.title + " " + (post.selftext or "") for post in posts]
+        post_accepted = model.predict([clean_text(text) for text in post_texts])
+        for post, post_text, is_accepted in zip(posts, post_texts, post_accepted):
+            post_hits = registry.scan(post_text)
             if (post_text not in existing_posts and
-                len(post_text) > 20 and
-                (any(keyword in post_lower for keyword in product_keywords) or
-                 any(term in post_lower for term in descriptive_terms))):
+                is_accepted and
+                (registry.mentions_product(post_hits, product_name) or
+                 registry.has_descriptive_term(post_hits))):
                 results.append({
                     "id": post.id,
                     "product": product_name,
@@ -49,13 +52,14 @@ def fetch_reddit_data(query, product_name, max_posts=300, existing_posts=None, r
                 })
                 existing_posts.add(post_text)
                 post.comments.replace_more(limit=0)
-                for comment in post.comments.list()[:30]:
-                    comment_lower = comment.body.lower()
-                    if (len(comment.body) > 20 and
-                        (any(keyword in comment_lower for keyword in product_keywords) or
-                         any(term in comment_lower for term in descriptive_terms)) and
-                        not any(generic in comment_lower for generic in ["nice", "great", "thanks", "love it", "cool", "awesome"])):
-                        comments.append(comment.body)
+                post_comments = [comment.body for comment in post.comments.list()[:30]]
+                comment_accepted = model.predict([clean_text(body) for body in post_comments])
+                for body, is_accepted in zip(post_comments, comment_accepted):
+                    comment_hits = registry.scan(body)
+                    if (is_accepted and
+                        (registry.mentions_product(comment_hits, product_name) or
+                         registry.has_descriptive_term(comment_hits))):
+                        comments.append(body)
         time.sleep(2)
     except Exception as e:
         print(f"Error fetching data for {query}: {e}")
@@ -74,6 +78,7 @@ def fetch_reddit_data(query, product_name, max_posts=300, existing_posts=None, r
     
     return results, comments
 
+@instrumented("fetch_top_products")
 def fetch_top_products():
     # Load environment variables
     load_dotenv()
@@ -90,23 +95,7 @@ def fetch_top_products():
     existing_posts = set()
     
     # Define queries for high-data products only
-    search_queries = [
-        ("beaded jewelry", "beaded jewelry"),
-        ("handmade beaded jewelry", "beaded jewelry"),
-        ("artisan beaded jewelry", "beaded jewelry"),
-        ("handmade earrings", "handmade earrings"),
-        ("artisan earrings", "handmade earrings"),
-        ("handcrafted earrings", "handmade earrings"),
-        ("handmade painting", "handmade painting"),
-        ("artisan painting", "handmade painting"),
-        ("handcrafted painting", "handmade painting"),
-        ("handmade soap", "handmade soap"),
-        ("artisan soap", "handmade soap"),
-        ("handcrafted soap", "handmade soap"),
-        ("leather bag", "leather bag"),
-        ("handmade leather bag", "leather bag"),
-        ("artisan leather bag", "leather bag"),
-    ]
+    search_queries = load_registry().queries(data_tier="high")
     
     # Fetch data for all queries
     for query, product_name in search_queries:
@@ -127,6 +116,8 @@ def fetch_top_products():
     os.makedirs(output_dir, exist_ok=True)
     with open(output_file, "w") as f:
         json.dump(all_posts, f, indent=4)
+    record_counts(records_out=len(all_posts))
+    register_artifact("raw", output_file, row_count=len(all_posts), stage="fetch_top_products")
     print(f"Saved {len(all_posts)} posts/comments to {output_file}")
 
 if __name__ == "__main__":
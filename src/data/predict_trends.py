@@ -1,8 +1,12 @@
 import os
 import csv
-import json
-from datetime import datetime
 import sys
+import json
+import hashlib
+from src.data.prediction_store import save_predictions, DB_FILE
+from src.data.artifact_catalog import latest_artifact, child_artifact, register_artifact
+from src.utils.instrumentation import instrumented, record_counts
+from src.data.confidence import compute_trend_scores, load_entry_scores, entry_scores_from_rows, bootstrap_confidence, RISING_THRESHOLD, DECLINING_THRESHOLD
 
 # ANSI color codes for console output
 class Colors:
@@ -26,23 +30,16 @@ def supports_color():
 USE_COLORS = supports_color()
 
 def predict_trend(post_count, keyword_count, sentiment, approx_income, product_relevance):
-    social_score = (post_count * 5) + (keyword_count * 0.5) + (sentiment * 100)
-    income_score = approx_income * 0.1
-    trend_score = (0.7 * social_score) + (0.3 * income_score)
+    trend_score, predicted_score = compute_trend_scores(post_count, keyword_count, sentiment, approx_income)
 
-    if trend_score > 2000:
-        growth_rate = 1.05
+    if trend_score > RISING_THRESHOLD:
         trend_direction = "Rising"
-    elif trend_score < 500:
-        growth_rate = 0.95
+    elif trend_score < DECLINING_THRESHOLD:
         trend_direction = "Declining"
     else:
-        growth_rate = 1.0
         trend_direction = "Stable"
 
-    predicted_score = trend_score * growth_rate
-
-    # Updated confidence calculation
+    # Heuristic confidence, used when per-entry scores are unavailable for bootstrapping
     base_confidence = 60  # Increased from 50 to 60
     post_factor = min(post_count / 5, 10.0)  # Reduced divisor from 10 to 5, capped at 10%
     keyword_factor = min(keyword_count / 50, 5.0)  # Reduced divisor from 100 to 50, capped at 5%
@@ -55,47 +52,89 @@ def predict_trend(post_count, keyword_count, sentiment, approx_income, product_r
 
     return trend_score, predicted_score, trend_direction, confidence, change_percentage
 
-def predict_trends(min_score_threshold=0):
-    input_file = "data/processed/processed_trends.csv"
-    if not os.path.exists(input_file):
-        print("Error: Processed trends file not found.")
-        return
-
-    expected_columns = ["product", "post_count", "keyword_count", "sentiment", "individual_cost", "estimated_monthly_revenue", "estimated_yearly_revenue", "product_relevance"]
+@instrumented("predict")
+def predict_trends(min_score_threshold=0, n_resamples=2000, trends=None, entry_scores=None, save=True, parent_ids=None):
+    """Predict trends from processed rows (read from processed_trends.csv unless passed in) and return the predictions."""
     trends_data = []
-    try:
-        with open(input_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            if not all(col in reader.fieldnames for col in expected_columns):
-                missing_cols = [col for col in expected_columns if col not in reader.fieldnames]
-                print(f"Error: Missing required columns in {input_file}: {missing_cols}")
-                return
+    trends_artifact = None
+    if trends is not None:
+        # Rows handed over in memory by process_trends are already typed
+        for row in trends:
+            trends_data.append({
+                "product": row["product"],
+                "post_count": row["post_count"],
+                "keyword_count": row["keyword_count"],
+                "sentiment": row["sentiment"],
+                "avg_cost": row["individual_cost"],
+                "approx_income": row["estimated_monthly_revenue"],
+                "product_relevance": row["product_relevance"]
+            })
+    else:
+        # The catalog names the latest processed trends, and through them the entry scores written alongside
+        trends_artifact = latest_artifact("processed_trends")
+        input_file = trends_artifact["path"] if trends_artifact is not None else "data/processed/processed_trends.csv"
+        if not os.path.exists(input_file):
+            print("Error: Processed trends file not found.")
+            return
+
+        expected_columns = ["product", "post_count", "keyword_count", "sentiment", "individual_cost", "estimated_monthly_revenue", "estimated_yearly_revenue", "product_relevance"]
+        try:
+            with open(input_file, "r", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                if not all(col in reader.fieldnames for col in expected_columns):
+                    missing_cols = [col for col in expected_columns if col not in reader.fieldnames]
+                    print(f"Error: Missing required columns in {input_file}: {missing_cols}")
+                    return
             
-            # Debugging: Print all products being loaded
-            print("\nProducts loaded from processed_trends.csv:")
-            print("-" * 40)
-            for row in reader:
-                print(f"Product: {row['product']}")
-                trends_data.append({
-                    "product": row["product"],
-                    "post_count": int(row["post_count"]),
-                    "keyword_count": int(row["keyword_count"]),
-                    "sentiment": float(row["sentiment"]),
-                    "avg_cost": float(row["individual_cost"]),
-                    "approx_income": float(row["estimated_monthly_revenue"]),
-                    "product_relevance": float(row["product_relevance"])
-                })
-    except KeyError as e:
-        print(f"Error: Missing expected column in {input_file}: {e}")
-        return
-    except ValueError as e:
-        print(f"Error: Invalid data format in {input_file}: {e}")
-        return
+                # Debugging: Print all products being loaded
+                print("\nProducts loaded from processed_trends.csv:")
+                print("-" * 40)
+                for row in reader:
+                    print(f"Product: {row['product']}")
+                    trends_data.append({
+                        "product": row["product"],
+                        "post_count": int(row["post_count"]),
+                        "keyword_count": int(row["keyword_count"]),
+                        "sentiment": float(row["sentiment"]),
+                        "avg_cost": float(row["individual_cost"]),
+                        "approx_income": float(row["estimated_monthly_revenue"]),
+                        "product_relevance": float(row["product_relevance"])
+                    })
+        except KeyError as e:
+            print(f"Error: Missing expected column in {input_file}: {e}")
+            return
+        except ValueError as e:
+            print(f"Error: Invalid data format in {input_file}: {e}")
+            return
+
+    # Entry scores read from disk must be the ones registered with these trends; a lone
+    # entry_scores.csv may come from an older process run
+    scores_artifact = None
+    if entry_scores is None and trends_artifact is not None:
+        scores_artifact = child_artifact(trends_artifact["id"], "entry_scores")
+
+    # Inputs read from disk are the ones process_trends registered
+    if parent_ids is None:
+        parent_ids = [artifact["id"] for artifact in (trends_artifact, scores_artifact) if artifact is not None]
 
     # Debugging: Confirm total number of products loaded
     print(f"\nTotal products loaded: {len(trends_data)}")
     print("-" * 40)
 
+    # Bootstrap score intervals from per-entry indicators handed over or saved by process_trends
+    intervals = {}
+    if entry_scores is not None:
+        # process_trends hands over product-coded arrays; other callers may pass rows
+        if not isinstance(entry_scores, dict):
+            entry_scores = entry_scores_from_rows(entry_scores)
+    elif scores_artifact is not None:
+        entry_scores = load_entry_scores(scores_artifact["path"])
+    if entry_scores is not None:
+        approx_incomes = {item["product"]: item["approx_income"] for item in trends_data}
+        intervals = bootstrap_confidence(entry_scores, approx_incomes, n_resamples=n_resamples)
+    else:
+        print("Warning: No entry scores registered with these processed trends. Falling back to heuristic confidence.")
+
     predictions = []
     for item in trends_data:
         product = item["product"]
@@ -114,10 +153,18 @@ def predict_trends(min_score_threshold=0):
             print(f"Skipping {product}: Current score {current_score} below threshold {min_score_threshold}")
             continue
 
+        interval = intervals.get(product)
+        if interval is not None:
+            confidence = interval["confidence"]
+
         predictions.append({
             "product": product,
             "current_score": current_score,
             "predicted_score": predicted_score,
+            "current_score_low": interval["current_score_low"] if interval else current_score,
+            "current_score_high": interval["current_score_high"] if interval else current_score,
+            "predicted_score_low": interval["predicted_score_low"] if interval else predicted_score,
+            "predicted_score_high": interval["predicted_score_high"] if interval else predicted_score,
             "trend_direction": trend_direction,
             "confidence": confidence,
             "change_percentage": change_percentage,
@@ -199,35 +246,23 @@ def predict_trends(min_score_threshold=0):
 
     print(separator)
 
+    print("\nBootstrap 95% Score Intervals:")
+    for pred in predictions:
+        print(f"{pred['product']:<26} current [{pred['current_score_low']:.2f}, {pred['current_score_high']:.2f}]  predicted [{pred['predicted_score_low']:.2f}, {pred['predicted_score_high']:.2f}]")
+
     if not USE_COLORS:
         print("\nNote: Trend colors (Rising: green, Stable: yellow, Declining: red) are not displayed. To enable colors in PowerShell, run: [Console]::OutputEncoding = [System.Text.Encoding]::UTF8")
 
-    # Save predictions to both JSON and CSV
-    output_dir = "data/predictions"
-    os.makedirs(output_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    json_output_file = os.path.join(output_dir, f"trend_predictions_{timestamp}.json")
-    with open(json_output_file, "w", encoding="utf-8") as f:
-        json.dump(predictions, f, indent=4)
-    
-    csv_output_file = os.path.join(output_dir, f"trend_predictions_{timestamp}.csv")
-    with open(csv_output_file, "w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["product", "current_score", "predicted_score", "trend_direction", "change_percentage", "confidence", "avg_cost", "approx_income"])
-        for pred in predictions:
-            writer.writerow([
-                pred["product"],
-                pred["current_score"],
-                pred["predicted_score"],
-                pred["trend_direction"],
-                pred["change_percentage"],
-                pred["confidence"],
-                pred["avg_cost"],
-                pred["approx_income"]
-            ])
-
-    print(f"\nSaved predictions to {json_output_file} (JSON) and {csv_output_file} (CSV)")
+    record_counts(records_in=len(trends_data), records_out=len(predictions))
+
+    # Append this run to the indexed prediction history store
+    if save:
+        run_ts = save_predictions(predictions)
+        payload = json.dumps(predictions, sort_keys=True).encode("utf-8")
+        register_artifact("predictions", DB_FILE, parent_ids, row_count=len(predictions), stage="predict", label=run_ts, sha256=hashlib.sha256(payload).hexdigest())
+        print(f"\nSaved predictions for run {run_ts} to {DB_FILE}")
+
+    return predictions
 
 if __name__ == "__main__":
     predict_trends(min_score_threshold=0)
\ No newline at end of file
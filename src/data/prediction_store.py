@@ -0,0 +1,188 @@
+import os
+import re
+import csv
+import json
+import sqlite3
+from datetime import datetime
+
+DB_FILE = "data/predictions/predictions.db"
+
+# Run timestamps carry microseconds so runs made in the same second stay apart; runs
+# stored before that have none, and still sort before any later run.
+RUN_TS_FORMAT = "%Y%m%d_%H%M%S_%f"
+LEGACY_RUN_TS_FORMAT = "%Y%m%d_%H%M%S"
+
+PREDICTION_COLUMNS = [
+    "product", "current_score", "predicted_score", "trend_direction", "change_percentage", "confidence",
+    "avg_cost", "approx_income", "current_score_low", "current_score_high", "predicted_score_low", "predicted_score_high"
+]
+
+def connect(db_file=DB_FILE):
+    """Open the prediction store, creating the schema on first use."""
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS runs (
+            run_ts TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            source TEXT
+        );
+        CREATE TABLE IF NOT EXISTS predictions (
+            run_ts TEXT NOT NULL REFERENCES runs(run_ts),
+            product TEXT NOT NULL,
+            current_score REAL,
+            predicted_score REAL,
+            trend_direction TEXT,
+            change_percentage REAL,
+            confidence REAL,
+            avg_cost REAL,
+            approx_income REAL,
+            current_score_low REAL,
+            current_score_high REAL,
+            predicted_score_low REAL,
+            predicted_score_high REAL,
+            PRIMARY KEY (run_ts, product)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_predictions_product ON predictions (product, run_ts);
+    """)
+    return conn
+
+def run_time(run_ts):
+    """The time a run was made, from its run timestamp."""
+    return datetime.strptime(run_ts, RUN_TS_FORMAT if len(run_ts) > 15 else LEGACY_RUN_TS_FORMAT)
+
+def save_predictions(predictions, run_ts=None, source="predict_trends", db_file=DB_FILE):
+    """Append one run of predictions to the store and return its run timestamp.
+
+    Runs are never overwritten: a given run_ts that is already stored raises
+    sqlite3.IntegrityError, and a generated one is drawn again on the rare clash.
+    """
+    generated = run_ts is None
+    conn = connect(db_file)
+    try:
+        while True:
+            if generated:
+                run_ts = datetime.now().strftime(RUN_TS_FORMAT)
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT INTO runs (run_ts, created_at, source) VALUES (?, ?, ?)",
+                        (run_ts, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), source)
+                    )
+                    conn.executemany(
+                        f"INSERT INTO predictions (run_ts, {', '.join(PREDICTION_COLUMNS)}) "
+                        f"VALUES (?, {', '.join('?' for _ in PREDICTION_COLUMNS)})",
+                        [[run_ts] + [pred.get(column) for column in PREDICTION_COLUMNS] for pred in predictions]
+                    )
+                return run_ts
+            except sqlite3.IntegrityError:
+                if not generated or conn.execute("SELECT 1 FROM runs WHERE run_ts = ?", (run_ts,)).fetchone() is None:
+                    raise
+    finally:
+        conn.close()
+
+def latest_run(db_file=DB_FILE):
+    """Return the newest run timestamp, or None when the store is empty."""
+    conn = connect(db_file)
+    try:
+        row = conn.execute("SELECT run_ts FROM runs ORDER BY run_ts DESC LIMIT 1").fetchone()
+    finally:
+        conn.close()
+    return row["run_ts"] if row else None
+
+def run_timestamps(db_file=DB_FILE):
+    """Return every stored run timestamp, oldest first."""
+    conn = connect(db_file)
+    try:
+        rows = conn.execute("SELECT run_ts FROM runs ORDER BY run_ts").fetchall()
+    finally:
+        conn.close()
+    return [row["run_ts"] for row in rows]
+
+def load_run(run_ts, db_file=DB_FILE):
+    """Return all predictions of one run, highest predicted score first."""
+    conn = connect(db_file)
+    try:
+        rows = conn.execute(
+            "SELECT * FROM predictions WHERE run_ts = ? ORDER BY predicted_score DESC", (run_ts,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+def latest_predictions(db_file=DB_FILE):
+    """Return (run_ts, predictions) for the newest run, or (None, []) when empty."""
+    run_ts = latest_run(db_file)
+    if run_ts is None:
+        return None, []
+    return run_ts, load_run(run_ts, db_file)
+
+def product_history(product, db_file=DB_FILE):
+    """Return every stored prediction for one product, oldest run first."""
+    conn = connect(db_file)
+    try:
+        rows = conn.execute(
+            "SELECT * FROM predictions WHERE product = ? ORDER BY run_ts", (product,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+def _read_prediction_file(path):
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        for column in PREDICTION_COLUMNS:
+            if column in ("product", "trend_direction") or row.get(column) in (None, ""):
+                continue
+            row[column] = float(row[column])
+    return rows
+
+def import_prediction_files(predictions_dir="data/predictions", db_file=DB_FILE):
+    """Import legacy trend_predictions_<ts>.json/.csv files; returns the number of runs imported."""
+    if not os.path.isdir(predictions_dir):
+        print(f"Error: Predictions directory {predictions_dir} not found.")
+        return 0
+
+    # Prefer the JSON file of each run, falling back to its CSV twin
+    run_files = {}
+    pattern = re.compile(r"^trend_predictions_(\d{8}_\d{6})\.(json|csv)$")
+    for filename in os.listdir(predictions_dir):
+        match = pattern.match(filename)
+        if not match:
+            continue
+        run_ts, extension = match.groups()
+        if extension == "json" or run_ts not in run_files:
+            run_files[run_ts] = os.path.join(predictions_dir, filename)
+
+    conn = connect(db_file)
+    try:
+        existing_runs = {row["run_ts"] for row in conn.execute("SELECT run_ts FROM runs")}
+    finally:
+        conn.close()
+
+    imported = 0
+    for run_ts, path in sorted(run_files.items()):
+        if run_ts in existing_runs:
+            continue
+        try:
+            predictions = _read_prediction_file(path)
+        except (ValueError, KeyError) as e:
+            print(f"Warning: Skipping {path}: {e}")
+            continue
+        try:
+            save_predictions(predictions, run_ts=run_ts, source=os.path.basename(path), db_file=db_file)
+        except sqlite3.IntegrityError as e:
+            print(f"Warning: Skipping {path}: {e}")
+            continue
+        imported += 1
+
+    print(f"Imported {imported} prediction runs into {db_file}")
+    return imported
+
+if __name__ == "__main__":
+    import_prediction_files()
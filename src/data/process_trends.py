@@ -1,72 +1,65 @@
 import os
-import json
 import csv
+import numpy as np
 from datetime import datetime
 from collections import Counter
 import re
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # Added for better sentiment analysis
+from functools import lru_cache
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from src.utils.product_registry import load_registry
+from src.data.sales_ledger import load_monthly_revenue, REVENUE_FILE
+from src.data.artifact_catalog import resolve_input, latest_artifact, register_artifact
+from src.utils.instrumentation import instrumented, record_counts
+from src.utils.record_reader import RecordReader
+from src.data.trend_aggregation import TrendAggregator
+from src.data.corpus_store import CorpusStore, corpus_path
+from src.reporting.trend_cube import save_trend_cube, CUBE_DIR
+
+@lru_cache(maxsize=None)
+def sentiment_analyzer():
+    """One VADER analyzer per process; building it reloads the lexicon files."""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # Deferred so importing this module stays cheap
+    return SentimentIntensityAnalyzer()
 
 def simple_sentiment_analysis(text):
-    analyzer = SentimentIntensityAnalyzer()
-    scores = analyzer.polarity_scores(text)
+    scores = sentiment_analyzer().polarity_scores(text)
     return scores['compound']  # Returns a score from -1 (negative) to 1 (positive)
 
+# Expanded stop words list
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "is", "are", "was", "were", "this", "that", "these", "those",
+    "you", "your", "have", "has", "had", "made", "make", "making", "would", "can", "will",
+    "i", "me", "my", "we", "us", "our", "they", "them", "their",
+    "etsy", "https", "www", "http", "com", "org", "shop", "buy", "sell", "sale",
+    "just", "from", "not", "some", "one", "used", "thank", "all", "she", "teacher", "how",
+    "off", "there", "love", "beautiful", "handcrafted", "original", "missed", "out", "artist",
+    "student", "good", "great", "awesome", "amazing", "wonderful", "nice", "fantastic",
+    "excellent", "bad", "terrible", "awful", "poor", "hate", "disappointing", "horrible",
+    "worst", "cheap", "broken", "like", "what", "people", "think", "who", "cry", "post",
+    "ref", "work", "use", "little", "wondering", "marketplace", "chain", "yarn",
+    "discord", "comments", "subreddit", "social", "asking", "please", "rules", "does",
+    "about", "more", "because", "get", "items", "wholesale", "price", "silver", "beading",
+    "oil", "charms", "reddit", "here", "any", "media", "when", "full", "her", "really",
+    "should", "maya", "anyone", "recognizes", "thriftstorehauls", "maker", "green", "neon",
+    "item", "tutorial", "set", "crafts",
+    # Added more stop words
+    "very", "so", "too", "also", "now", "then", "up", "down", "over", "under",
+    "it", "its", "he", "him", "his", "as", "be", "been", "being",
+    "do", "did", "doing", "say", "said", "go", "went", "gone",
+    "know", "knew", "think", "thought", "feel", "felt"
+})
+
+@lru_cache(maxsize=None)
+def keyword_stop_words(product):
+    """Stop words plus the words naming the product, built once per product."""
+    return STOP_WORDS.union(load_registry().product_words(product))
+
 def extract_keywords(text, product, post_count, num_keywords=5):
-    # Expanded stop words list
-    stop_words = {
-        "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
-        "is", "are", "was", "were", "this", "that", "these", "those",
-        "you", "your", "have", "has", "had", "made", "make", "making", "would", "can", "will",
-        "i", "me", "my", "we", "us", "our", "they", "them", "their",
-        "etsy", "https", "www", "http", "com", "org", "shop", "buy", "sell", "sale",
-        "just", "from", "not", "some", "one", "used", "thank", "all", "she", "teacher", "how",
-        "off", "there", "love", "beautiful", "handcrafted", "original", "missed", "out", "artist",
-        "student", "good", "great", "awesome", "amazing", "wonderful", "nice", "fantastic",
-        "excellent", "bad", "terrible", "awful", "poor", "hate", "disappointing", "horrible",
-        "worst", "cheap", "broken", "like", "what", "people", "think", "who", "cry", "post",
-        "ref", "work", "use", "little", "wondering", "marketplace", "chain", "yarn",
-        "discord", "comments", "subreddit", "social", "asking", "please", "rules", "does",
-        "about", "more", "because", "get", "items", "wholesale", "price", "silver", "beading",
-        "oil", "charms", "reddit", "here", "any", "media", "when", "full", "her", "really",
-        "should", "maya", "anyone", "recognizes", "thriftstorehauls", "maker", "green", "neon",
-        "item", "tutorial", "set", "crafts",
-        # Added more stop words
-        "very", "so", "too", "also", "now", "then", "up", "down", "over", "under",
-        "it", "its", "he", "him", "his", "as", "be", "been", "being",
-        "do", "did", "doing", "say", "said", "go", "went", "gone",
-        "know", "knew", "think", "thought", "feel", "felt"
-    }
-    
-    product_words = set()
-    base_product_words = product.lower().split()
-    for word in base_product_words:
-        product_words.add(word)
-        if word.endswith("y"):
-            product_words.add(word[:-1] + "ies")
-        else:
-            product_words.add(word + "s")
-        if word.startswith("hand"):
-            product_words.add(word[4:])
-            product_words.add("hand")
-        if word == "handmade":
-            product_words.add("crafted")
-        if word == "jewelry":
-            product_words.add("jewellery")
-            product_words.add("earrings")
-            product_words.add("earring")
-        if word == "earrings":
-            product_words.add("earring")
-        if word == "beeswax":
-            product_words.add("wax")
-        if word == "painting":
-            product_words.add("paint")
-            product_words.add("painted")
-        if word == "beaded":
-            product_words.add("bead")
-            product_words.add("beads")
-        if word == "soap":
-            product_words.add("soapmaking")
-    stop_words = stop_words.union(product_words)
+    registry = load_registry()
+    stop_words = keyword_stop_words(product)
 
     words = re.findall(r'\b\w+\b', text.lower())
     words = [word for word in words if word not in stop_words and len(word) > 3]  # Increased min length to 3
@@ -75,24 +68,11 @@ def extract_keywords(text, product, post_count, num_keywords=5):
     min_freq = 1 if post_count < 10 else 2
     word_counts = Counter({word: count for word, count in word_counts.items() if count >= min_freq})
     
-    descriptive_keywords = {
-        "beaded jewelry": ["beads", "necklace", "bracelet", "colors", "style", "design", "gemstone", "pattern"],
-        "embroidered textile": ["patterns", "fabric", "thread", "stitch", "design", "colorful", "cotton", "silk"],
-        "handmade beeswax candle": ["scent", "wick", "glow", "aroma", "natural", "honey", "burn", "eco"],
-        "handmade brass jewelry": ["necklace", "pendant", "shiny", "craft", "vintage", "design", "metal", "polished"],
-        "handmade earrings": ["dangle", "stud", "beads", "style", "design", "drop", "hoop", "lightweight"],
-        "handmade painting": ["canvas", "colors", "brush", "artwork", "style", "frame", "acrylic", "watercolor"],
-        "handmade soap": ["scent", "lather", "organic", "oils", "bar", "natural", "essential", "creamy"],
-        "handmade terracotta decor": ["planter", "pot", "sculpture", "decorative", "rustic", "clay", "painted", "ornament"],
-        "handmade wooden utensils": ["spoon", "bowl", "carved", "kitchen", "natural", "smooth", "fork", "serving"],
-        "handwoven shawl": ["warm", "soft", "traditional", "pattern", "wool", "cotton", "silk", "cozy"],
-        "leather bag": ["stitching", "durable", "design", "strap", "style", "pocket", "zipper", "lining"],
-        "vegan soap": ["organic", "scent", "lather", "natural", "oils", "cold", "process", "recipe"]
-    }
-    
+    boost_keywords = registry.boost_keywords(product)
+
     boosted_counts = Counter()
     for word, count in word_counts.items():
-        if word in descriptive_keywords.get(product, []):
+        if word in boost_keywords:
             boosted_counts[word] = count * 100  # Increased boost factor from 50 to 100
         else:
             boosted_counts[word] = count
@@ -102,41 +82,110 @@ def extract_keywords(text, product, post_count, num_keywords=5):
         top_keywords.append("N/A")
     return top_keywords
 
-def process_trends():
-    # Step 1: Load the latest cleaned data file
-    input_dir = "data/cleaned"
-    cleaned_files = [f for f in os.listdir(input_dir) if f.startswith("cleaned_social_data_") and f.endswith(".json")]
-    if not cleaned_files:
-        print("Error: No cleaned data files found in data/cleaned/")
-        return
-    latest_file = max(cleaned_files, key=lambda x: os.path.getmtime(os.path.join(input_dir, x)))
-    input_file = os.path.join(input_dir, latest_file)
+def load_sales_data(sales_file="data/sales/sales_data.csv"):
+    """Per-product individual costs and aggregated ledger revenue; either may be empty."""
+    sales_data = {}
+    if os.path.exists(sales_file):
+        with open(sales_file, "r", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                product = row["product"].strip().lower()
+                sales_data[product] = {
+                    "individual_cost": float(row["individual_cost"])
+                }
+    else:
+        print("Warning: Sales data file not found. Proceeding without sales data.")
 
-    try:
-        with open(input_file, "r", encoding="utf-8") as f:
-            cleaned_data = json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"Error: Failed to parse JSON in {input_file}. JSONDecodeError: {e}")
-        return
-    except Exception as e:
-        print(f"Error: Failed to read {input_file}. Exception: {e}")
-        return
+    # Regional ledger revenue (aggregated by src.data.sales_ledger) replaces the fixed-volume estimate
+    ledger_revenue = load_monthly_revenue()
+    if ledger_revenue is None:
+        ledger_revenue = {}
+        print("Warning: Aggregated sales ledger not found. Estimating revenue from individual cost.")
+    return sales_data, ledger_revenue
+
+def estimate_revenue(product, sales_data, ledger_revenue):
+    """Return (individual_cost, estimated_monthly_revenue, estimated_yearly_revenue) for a product."""
+    individual_cost = sales_data.get(product, {}).get("individual_cost", 0.0)
+    if product in ledger_revenue:
+        if not individual_cost:
+            individual_cost = round(ledger_revenue[product]["avg_price"], 2)
+        estimated_monthly_revenue = round(ledger_revenue[product]["monthly_revenue"], 2)
+    else:
+        pieces_per_month = 25
+        estimated_monthly_revenue = individual_cost * pieces_per_month
+    return individual_cost, estimated_monthly_revenue, round(estimated_monthly_revenue * 12, 2)
+
+def _score_corpus_shard(corpus_dir, start, stop):
+    """Keywords and sentiment for entries [start, stop) of a corpus store, in a worker process."""
+    store = CorpusStore(corpus_dir)
+    products = [product.strip().lower() for product in store.products]
+    codes = np.asarray(store.product_codes[:stop])
+    is_post = np.asarray(store.is_post[:stop])
+    # Posts before the shard, so extract_keywords' frequency cut-off matches a sequential run
+    post_counts = np.bincount(codes[:start], weights=is_post[:start], minlength=len(products)).astype(int).tolist()
+    scored = []
+    for i in range(start, stop):
+        code = codes[i]
+        if is_post[i]:
+            post_counts[code] += 1
+        text = store.text(i)
+        keywords = extract_keywords(text, products[code], post_counts[code])
+        scored.append((products[code], bool(is_post[i]), keywords, simple_sentiment_analysis(text)))
+    return scored
+
+def _score_corpus(store, workers, shards_per_worker=4):
+    """Score a corpus store across worker processes; yields (product, is_post, keywords, sentiment) in entry order.
+
+    Workers map the store rather than receive the texts, so they share one copy.
+    Entries in a store passed clean_data, so none lack a product, text or id.
+    """
+    bounds = np.linspace(0, len(store), workers * shards_per_worker + 1).astype(int)
+    shards = [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_score_corpus_shard, store.directory, int(start), int(stop)) for start, stop in shards]
+        for future in futures:
+            yield from future.result()
+
+@instrumented("process")
+def process_trends(cleaned_data=None, save=True, parent_ids=None, workers=1):
+    """Score each product's keywords and sentiment; returns {"trends": rows, "entry_scores": product-coded per-entry arrays}."""
+    # Step 1: Load the latest cleaned data file, unless a cleaned dataset was passed in
+    if cleaned_data is None:
+        cleaned_artifact = resolve_input("cleaned", "data/cleaned", "cleaned_social_data_", ".json")
+        if cleaned_artifact is None:
+            print("Error: No cleaned data files found in data/cleaned/")
+            return
+        input_file = cleaned_artifact["path"]
+        parent_ids = [cleaned_artifact["id"]]
+
+        corpus_dir = corpus_path(input_file)
+        if os.path.isdir(corpus_dir):
+            # clean_data's memory-mapped copy of the same entries, shareable with worker processes
+            cleaned_data = CorpusStore(corpus_dir)
+            corpus_artifact = latest_artifact("corpus")
+            if corpus_artifact is not None and corpus_artifact["path"] == corpus_dir:
+                parent_ids.append(corpus_artifact["id"])
+        elif not os.path.exists(input_file):
+            print(f"Error: Failed to read {input_file}. File not found")
+            return
+        else:
+            # Entries are streamed; the relevance fields are read as the reader reaches them
+            cleaned_data = RecordReader(input_file, ("entries", "data"))
+    else:
+        input_file = "in-memory cleaned data"
 
     # Step 2: Handle different possible structures of cleaned_data
-    if isinstance(cleaned_data, dict) and "entries" in cleaned_data:
-        data = cleaned_data["entries"]
-        overall_relevance = cleaned_data.get("overall_relevance", 0.0)
-        product_relevance = cleaned_data.get("product_relevance", {})
+    if isinstance(cleaned_data, CorpusStore):
+        data, layout = cleaned_data, "entries"
+        cleaned_data = data.metadata
+    elif isinstance(cleaned_data, RecordReader):
+        data, layout = cleaned_data, None  # Known once the reader has reached the entries
+    elif isinstance(cleaned_data, dict) and "entries" in cleaned_data:
+        data, layout = cleaned_data["entries"], "entries"
     elif isinstance(cleaned_data, dict) and "data" in cleaned_data:
-        data = cleaned_data["data"]
-        overall_relevance = cleaned_data.get("overall_relevance", 0.0)
-        product_relevance = cleaned_data.get("product_relevance", {})
-        print("Warning: Using 'data' key instead of 'entries' in cleaned data file.")
+        data, layout = cleaned_data["data"], "data"
     elif isinstance(cleaned_data, list):
-        data = cleaned_data
-        overall_relevance = 0.0
-        product_relevance = {}
-        print("Warning: Cleaned data is a flat list. Relevance metrics not available.")
+        data, layout = cleaned_data, "list"
     else:
         print(f"Error: Unexpected structure in cleaned data file. Expected a dict with 'entries' or 'data' or a list, got: {type(cleaned_data)}")
         if isinstance(cleaned_data, dict):
@@ -144,84 +193,210 @@ def process_trends():
         return
 
     # Step 3: Load sales data (now with individual_cost)
-    sales_file = "data/sales/sales_data.csv"
-    sales_data = {}
-    if os.path.exists(sales_file):
-        with open(sales_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                product = row["product"].strip().lower()
-                sales_data[product] = {
-                    "individual_cost": float(row["individual_cost"])
-                }
-    else:
-        print("Warning: Sales data file not found. Proceeding without sales data.")
+    sales_data, ledger_revenue = load_sales_data()
+    parent_ids = list(parent_ids or [])
+    revenue_artifact = latest_artifact("regional_revenue") if ledger_revenue else None
+    if revenue_artifact is not None and revenue_artifact["path"] == REVENUE_FILE:
+        parent_ids.append(revenue_artifact["id"])
 
-    # Step 4: Process data for each product
-    product_stats = {}
-    for entry in data:
-        text = entry.get("text", "")
-        product = entry.get("product", "").strip().lower()
-        entry_id = entry.get("id", "")
+    # Step 4: Process data for each product into integer-coded running totals
+    aggregator = TrendAggregator()
+    entry_count = 0
+    try:
+        if workers > 1 and isinstance(data, CorpusStore):
+            entry_count = len(data)
+            for i, (product, is_post, keywords, sentiment) in enumerate(_score_corpus(data, workers)):
+                code = aggregator.product_code(product)
+                if is_post:
+                    aggregator.posts[code] += 1
+                aggregator.add(code, is_post, keywords, sentiment, data.dates[i])
+        else:
+            for entry in data:
+                entry_count += 1
+                text = entry.get("text", "")
+                product = entry.get("product", "").strip().lower()
+                entry_id = entry.get("id", "")
 
-        if not product or not text or not entry_id:
-            continue
+                if not product or not text or not entry_id:
+                    continue
 
-        if product not in product_stats:
-            product_stats[product] = {"posts": [], "keywords": [], "sentiments": []}
+                code = aggregator.product_code(product)
+                is_comment = entry_id.startswith("comment_")
+                if not is_comment:
+                    aggregator.posts[code] += 1
 
-        is_comment = entry_id.startswith("comment_")
-        if not is_comment:
-            product_stats[product]["posts"].append(text)
+                keywords = extract_keywords(text, product, aggregator.posts[code])
+                sentiment = simple_sentiment_analysis(text)
+                aggregator.add(code, not is_comment, keywords, sentiment, entry.get("created_at"))
+    except ValueError as e:
+        # json.JSONDecodeError is a ValueError, as are the reader's structural errors
+        print(f"Error: Failed to parse JSON in {input_file}. {type(e).__name__}: {e}")
+        return
 
-        keywords = extract_keywords(text, product, len(product_stats[product]["posts"]))
-        product_stats[product]["keywords"].extend(keywords)
+    # The relevance fields follow the entries in a cleaned file, so they are known only now
+    if layout is None:
+        if data.source is None:
+            print("Error: Unexpected structure in cleaned data file. Expected a dict with 'entries' or 'data' or a list")
+            print(f"Available keys: {list(data.metadata.keys())}")
+            return
+        layout = data.source if data.source in ("entries", "data") else "list"
+        cleaned_data = data.metadata
 
-        sentiment = simple_sentiment_analysis(text)
-        product_stats[product]["sentiments"].append(sentiment)
+    if layout == "list":
+        overall_relevance = 0.0
+        product_relevance = {}
+        print("Warning: Cleaned data is a flat list. Relevance metrics not available.")
+    else:
+        overall_relevance = cleaned_data.get("overall_relevance", 0.0)
+        product_relevance = cleaned_data.get("product_relevance", {})
+        if layout == "data":
+            print("Warning: Using 'data' key instead of 'entries' in cleaned data file.")
+
+    record_counts(records_in=entry_count, records_out=len(aggregator))
 
     # Step 5: Summarize results with structured output
-    output_dir = "data/processed"
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, "processed_trends.csv")
-
-    with open(output_file, "w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["product", "post_count", "keyword_count", "top_keywords", "sentiment", "product_relevance", "individual_cost", "estimated_monthly_revenue", "estimated_yearly_revenue"])
-        
-        # Structured console output
-        print(f"\nTotal Number of Products: {len(product_stats)}")
-        print("Processed Products:")
-        print("-" * 50)
-        print(f"{'No.':<5} {'Product':<25} {'Posts':<8} {'Keywords':<10} {'Sentiment':<12} {'Relevance':<10} {'Cost':<8} {'Monthly':<10} {'Yearly':<10}")
-        print("-" * 50)
-
-        for idx, (product, stats) in enumerate(sorted(product_stats.items()), 1):
-            post_count = len(stats["posts"])
-            keyword_counts = Counter(stats["keywords"])
-            top_keywords = ", ".join(word for word, count in keyword_counts.most_common(5) if word != "N/A")
-            keyword_count = len(stats["keywords"])
-            avg_sentiment = sum(stats["sentiments"]) / len(stats["sentiments"]) if stats["sentiments"] else 0.0
-            sentiment_label = "Positive" if avg_sentiment > 0 else "Negative" if avg_sentiment < 0 else "Neutral"
-
-            # Get individual cost and calculate estimated revenue
-            individual_cost = sales_data.get(product, {}).get("individual_cost", 0.0)
-            pieces_per_month = 25
-            estimated_monthly_revenue = individual_cost * pieces_per_month
-            estimated_yearly_revenue = estimated_monthly_revenue * 12
-
-            # Get product relevance
-            prod_relevance = product_relevance.get(product, 0.0)
-
-            # Print structured row with $ for currency
-            print(f"{idx:<5} {product:<25} {post_count:<8} {keyword_count:<10} {sentiment_label:<12} {prod_relevance:<10.2f}% {'$'+str(individual_cost):<8} {'$'+str(estimated_monthly_revenue):<10} {'$'+str(estimated_yearly_revenue):<10}")
-
-            writer.writerow([product, post_count, keyword_count, top_keywords, avg_sentiment, prod_relevance, individual_cost, estimated_monthly_revenue, estimated_yearly_revenue])
+    trend_columns = ["product", "post_count", "keyword_count", "top_keywords", "sentiment", "product_relevance", "individual_cost", "estimated_monthly_revenue", "estimated_yearly_revenue"]
+    trends = []
+
+    summary = aggregator.summarize()
+    products = summary["products"]
 
+    # Structured console output
+    print(f"\nTotal Number of Products: {len(products)}")
+    print("Processed Products:")
+    print("-" * 50)
+    print(f"{'No.':<5} {'Product':<25} {'Posts':<8} {'Keywords':<10} {'Sentiment':<12} {'Relevance':<10} {'Cost':<8} {'Monthly':<10} {'Yearly':<10}")
     print("-" * 50)
+
+    for idx, code in enumerate(sorted(range(len(products)), key=products.__getitem__), 1):
+        product = products[code]
+        post_count = int(summary["posts"][code])
+        top_keywords = ", ".join(word for word in summary["top_keywords"][code] if word != "N/A")
+        keyword_count = int(summary["keyword_count"][code])
+        avg_sentiment = float(summary["avg_sentiment"][code])
+        sentiment_label = "Positive" if avg_sentiment > 0 else "Negative" if avg_sentiment < 0 else "Neutral"
+
+        # Get individual cost and calculate estimated revenue
+        individual_cost, estimated_monthly_revenue, estimated_yearly_revenue = estimate_revenue(product, sales_data, ledger_revenue)
+
+        # Get product relevance
+        prod_relevance = product_relevance.get(product, 0.0)
+
+        # Print structured row with $ for currency
+        print(f"{idx:<5} {product:<25} {post_count:<8} {keyword_count:<10} {sentiment_label:<12} {prod_relevance:<10.2f}% {'$'+str(individual_cost):<8} {'$'+str(estimated_monthly_revenue):<10} {'$'+str(estimated_yearly_revenue):<10}")
+
+        trends.append(dict(zip(trend_columns, [product, post_count, keyword_count, top_keywords, avg_sentiment, prod_relevance, individual_cost, estimated_monthly_revenue, estimated_yearly_revenue])))
+
+    print("-" * 50)
+
     print(f"\nOverall Dataset Relevance: {overall_relevance:.2f}%")
-    print("\nNote: The estimated monthly and yearly revenues are based on selling 20-30 pieces per month (using 25 pieces as the average). Actual income may vary based on the area where the product is sold, resource availability, and average price in that area.")
-    print(f"\nSaved processed trends to {output_file}")
+    if ledger_revenue:
+        print(f"\nNote: Estimated revenues for {len(ledger_revenue)} products come from the regional sales ledger (average month, all regions). Products without ledger sales assume 25 pieces per month.")
+    else:
+        print("\nNote: The estimated monthly and yearly revenues are based on selling 20-30 pieces per month (using 25 pieces as the average). Actual income may vary based on the area where the product is sold, resource availability, and average price in that area.")
+
+    if save:
+        output_dir = "data/processed"
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, "processed_trends.csv")
+        with open(output_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=trend_columns)
+            writer.writeheader()
+            writer.writerows(trends)
+
+        # Per-entry indicators let predict_trends bootstrap confidence intervals
+        entry_scores_file = os.path.join(output_dir, "entry_scores.csv")
+        with open(entry_scores_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["product", "is_post", "sentiment", "keyword_count"])
+            writer.writerows(zip(
+                (products[code] for code in aggregator.entry_products.values()),
+                aggregator.entry_is_post.values().tolist(),
+                aggregator.entry_sentiment.values().tolist(),
+                aggregator.entry_keyword_count.values().tolist()
+            ))
+
+        # Entry scores hang off the trends they were written with, so predict_trends never pairs mismatched files
+        trends_id = register_artifact("processed_trends", output_file, parent_ids, row_count=len(trends), stage="process")
+        register_artifact("entry_scores", entry_scores_file, [trends_id], row_count=len(aggregator), stage="process")
+
+        # Product x day/week/month x post/comment totals, so reports can slice without the entries
+        cube_counts = save_trend_cube(aggregator, parent_ids)
+
+        print(f"\nSaved processed trends to {output_file} and entry scores to {entry_scores_file}")
+        print(f"Saved the trend cube ({cube_counts['day']} day, {cube_counts['week']} week and {cube_counts['month']} month cells) to {CUBE_DIR}")
+
+    return {"trends": trends, "entry_scores": aggregator.entry_scores()}
+
+# Reports for the Streamlit page, memoized per (product, max_posts)
+REPORT_TTL_SECONDS = 3600
+_report_cache = {}
+_report_cache_lock = threading.Lock()
+
+def trend_report(product, max_posts=10):
+    """Fetch, clean and score recent Reddit posts about one product.
+
+    Returns {"keywords", "sentiment", "posts", "comments"}. Reports are reused
+    for REPORT_TTL_SECONDS, so repeated page loads do not refetch.
+    """
+    key = (product.strip().lower(), max_posts)
+    with _report_cache_lock:
+        cached = _report_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+    # Deferred so the batch stages never import praw
+    from src.data.fetch_data import lookup_reddit_data
+    from src.data.clean_data import clean_text, is_relevant_entry
+    product_name = key[0]
+    posts, comments = lookup_reddit_data(product_name, product_name, max_posts=max_posts)
+    entries = posts[:max_posts] + [
+        {"id": f"comment_{hash(comment)}", "product": product_name, "text": comment, "type": "comment"}
+        for comment in comments
+    ]
+
+    keyword_counts = Counter()
+    sentiments = []
+    post_count = 0
+    comment_count = 0
+    for entry in entries:
+        entry = dict(entry, text=clean_text(entry.get("text", "")))
+        if not is_relevant_entry(entry):
+            continue
+        if entry["id"].startswith("comment_"):
+            comment_count += 1
+        else:
+            post_count += 1
+        keyword_counts.update(extract_keywords(entry["text"], product_name, post_count))
+        sentiments.append(simple_sentiment_analysis(entry["text"]))
+
+    report = {
+        "keywords": [word for word, count in keyword_counts.most_common(5) if word != "N/A"],
+        "sentiment": sum(sentiments) / len(sentiments) if sentiments else 0.0,
+        "posts": post_count,
+        "comments": comment_count
+    }
+    with _report_cache_lock:
+        _report_cache[key] = (time.monotonic() + REPORT_TTL_SECONDS, report)
+    return report
+
+def iter_trend_reports(products, max_posts=10, max_workers=4):
+    """Build reports for several products concurrently, yielding (product, report) as each one finishes.
+
+    A product whose fetch fails yields an {"error": message} report instead.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(trend_report, product, max_posts): product for product in products}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], {"error": str(e)}
+
+def generate_trend_report(products, max_posts=10):
+    """Return {product: report} for the given products, in the order they were given."""
+    reports = dict(iter_trend_reports(products, max_posts))
+    return {product: reports[product] for product in products}
 
 if __name__ == "__main__":
     process_trends()
\ No newline at end of file
@@ -0,0 +1,128 @@
+import os
+import csv
+from collections import defaultdict
+from src.utils.product_registry import load_registry
+from src.data.artifact_catalog import register_artifact
+from src.utils.instrumentation import instrumented, record_counts
+
+LEDGER_FILE = "data/sales/sales_ledger.csv"
+REVENUE_FILE = "data/sales/revenue_by_region_month.csv"
+LEDGER_COLUMNS = ["date", "region", "product", "units", "price"]
+GROUP_COLUMNS = ["product", "region", "month"]
+
+@instrumented("sales")
+def aggregate_sales_ledger(ledger_file=LEDGER_FILE, output_file=REVENUE_FILE, chunk_size=250_000):
+    """Stream a transaction ledger in chunks and total units and revenue per product, region and month.
+
+    Only one chunk plus the running per-group totals are held in memory, so
+    the ledger can be far larger than RAM.
+    """
+    if not os.path.exists(ledger_file):
+        print(f"Error: Sales ledger {ledger_file} not found.")
+        return None
+
+    import pandas as pd  # Deferred: process_trends only needs load_monthly_revenue
+
+    registry = load_registry()
+    product_names = {}
+    totals = None
+    rows_read = 0
+    rows_skipped = 0
+    bad_dates = 0
+    bad_date_examples = []
+
+    chunks = pd.read_csv(
+        ledger_file, usecols=LEDGER_COLUMNS, chunksize=chunk_size,
+        dtype={"date": str, "region": str, "product": str, "units": float, "price": float}
+    )
+    for chunk in chunks:
+        rows_read += len(chunk)
+        complete = chunk.dropna(subset=LEDGER_COLUMNS)
+        rows_skipped += len(chunk) - len(complete)
+        chunk = complete
+
+        # ISO dates parse fast; anything else is parsed one by one, and unreadable dates are dropped
+        dates = pd.to_datetime(chunk["date"], errors="coerce", format="ISO8601")
+        retry = dates.isna()
+        if retry.any():
+            dates[retry] = pd.to_datetime(chunk["date"][retry], errors="coerce", format="mixed")
+        unreadable = dates.isna()
+        if unreadable.any():
+            bad_dates += int(unreadable.sum())
+            bad_date_examples.extend(chunk["date"][unreadable].head(5 - len(bad_date_examples)).tolist())
+            chunk, dates = chunk[~unreadable], dates[~unreadable]
+
+        # Canonicalize each distinct product label once, not once per row
+        for label in chunk["product"].unique():
+            if label not in product_names:
+                product_names[label] = registry.canonical_name(label) or label.strip().lower()
+        chunk = chunk.assign(
+            product=chunk["product"].map(product_names),
+            region=chunk["region"].str.strip(),
+            month=dates.dt.strftime("%Y-%m"),
+            revenue=chunk["units"] * chunk["price"],
+            transactions=1
+        )
+
+        partial = chunk.groupby(GROUP_COLUMNS)[["units", "revenue", "transactions"]].sum()
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+
+    if totals is None:
+        print(f"Error: Sales ledger {ledger_file} is empty.")
+        return None
+
+    totals = totals.reset_index().sort_values(GROUP_COLUMNS)
+    record_counts(records_in=rows_read, records_out=len(totals))
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    totals.to_csv(output_file, index=False)
+    ledger_id = register_artifact("sales_ledger", ledger_file, row_count=rows_read, stage="sales")
+    register_artifact("regional_revenue", output_file, [ledger_id], row_count=len(totals), stage="sales")
+
+    print(f"Aggregated {rows_read} ledger rows into {len(totals)} product/region/month groups")
+    if rows_skipped:
+        print(f"Warning: Skipped {rows_skipped} incomplete ledger rows")
+    if bad_dates:
+        print(f"Warning: Skipped {bad_dates} ledger rows with unreadable dates, e.g. {', '.join(map(repr, bad_date_examples))}")
+    print(f"Saved regional revenue to {output_file}")
+    return totals
+
+def load_monthly_revenue(revenue_file=REVENUE_FILE):
+    """Average monthly revenue per product across all regions, from the aggregated ledger.
+
+    Revenue is averaged over every month from the ledger's first to its last,
+    so months in which a product sold nothing count as zero.
+    """
+    if not os.path.exists(revenue_file):
+        return None
+
+    monthly_totals = defaultdict(lambda: defaultdict(float))
+    units = defaultdict(float)
+    revenue = defaultdict(float)
+    regions = defaultdict(set)
+    months_seen = set()
+    with open(revenue_file, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            product = row["product"]
+            monthly_totals[product][row["month"]] += float(row["revenue"])
+            units[product] += float(row["units"])
+            revenue[product] += float(row["revenue"])
+            regions[product].add(row["region"])
+            months_seen.add(row["month"])
+    if not months_seen:
+        return {}
+
+    first_year, first_month = map(int, min(months_seen).split("-"))
+    last_year, last_month = map(int, max(months_seen).split("-"))
+    ledger_months = (last_year - first_year) * 12 + last_month - first_month + 1
+    return {
+        product: {
+            "monthly_revenue": sum(months.values()) / ledger_months,
+            "avg_price": revenue[product] / units[product] if units[product] else 0.0,
+            "regions": len(regions[product])
+        }
+        for product, months in monthly_totals.items()
+    }
+
+if __name__ == "__main__":
+    aggregate_sales_ledger()
@@ -0,0 +1,142 @@
+import numpy as np
+
+class GrowableArray:
+    """Append-only NumPy buffer that doubles its capacity as it fills."""
+
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def append(self, value):
+        if self._size == len(self._data):
+            self._grow(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        end = self._size + len(values)
+        if end > len(self._data):
+            self._grow(end)
+        self._data[self._size:end] = values
+        self._size = end
+
+    def _grow(self, minimum):
+        data = np.empty(max(minimum, 2 * len(self._data)), dtype=self._data.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def __len__(self):
+        return self._size
+
+    def values(self):
+        return self._data[:self._size]
+
+def to_day(value):
+    """A created_at date (string, date or datetime64) as datetime64[D]; NaT when missing or unparsable."""
+    try:
+        return np.datetime64(value or "NaT", "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+def top_per_group(groups, items, n_groups, n_items, n=5):
+    """The n most frequent item codes in each group, ties in order of first appearance (as Counter.most_common).
+
+    ``groups`` and ``items`` are parallel integer arrays with one element per
+    occurrence; returns one list of item codes per group code.
+    """
+    top = [[] for _ in range(n_groups)]
+    if not len(items):
+        return top
+    pairs = np.asarray(groups, dtype=np.int64) * n_items + items
+    unique_pairs, first_seen, counts = np.unique(pairs, return_index=True, return_counts=True)
+    pair_groups = unique_pairs // n_items
+
+    # Group by group code, most frequent first, earliest first among equals
+    order = np.lexsort((first_seen, -counts, pair_groups))
+    pair_groups = pair_groups[order]
+    group_starts = np.searchsorted(pair_groups, pair_groups, side="left")
+    keep = order[np.arange(len(order)) - group_starts < n]
+    for pair in unique_pairs[keep]:
+        top[pair // n_items].append(int(pair % n_items))
+    return top
+
+class TrendAggregator:
+    """Per-product entry, post, keyword and sentiment totals over integer-coded products and keywords.
+
+    Products and keywords are interned to codes as entries arrive; each entry
+    adds a fixed number of integers and one float to preallocated buffers, so
+    memory no longer depends on how long the texts are. ``summarize`` turns
+    the buffers into per-product totals with a few ``np.bincount`` calls.
+    """
+
+    def __init__(self):
+        self.products = []
+        self.product_codes = {}
+        self.vocabulary = []
+        self.keyword_codes = {}
+        self.posts = []  # Running post count per product code, for extract_keywords' frequency cut-off
+        self.entry_products = GrowableArray(np.int32)
+        self.entry_is_post = GrowableArray(np.int8)
+        self.entry_sentiment = GrowableArray(np.float64)
+        self.entry_keyword_count = GrowableArray(np.int32)
+        self.entry_dates = GrowableArray("datetime64[D]")
+        self.keyword_products = GrowableArray(np.int32)
+        self.keyword_ids = GrowableArray(np.int32)
+
+    def product_code(self, product):
+        code = self.product_codes.get(product)
+        if code is None:
+            code = self.product_codes[product] = len(self.products)
+            self.products.append(product)
+            self.posts.append(0)
+        return code
+
+    def keyword_code(self, keyword):
+        code = self.keyword_codes.get(keyword)
+        if code is None:
+            code = self.keyword_codes[keyword] = len(self.vocabulary)
+            self.vocabulary.append(keyword)
+        return code
+
+    def add(self, code, is_post, keywords, sentiment, date=None):
+        """Record one scored entry of the product with the given code, posted on ``date`` if known."""
+        self.entry_products.append(code)
+        self.entry_dates.append(to_day(date))
+        self.entry_is_post.append(1 if is_post else 0)
+        self.entry_sentiment.append(sentiment)
+        self.entry_keyword_count.append(len(keywords))
+        self.keyword_products.extend([code] * len(keywords))
+        self.keyword_ids.extend([self.keyword_code(keyword) for keyword in keywords])
+
+    def __len__(self):
+        return len(self.entry_products)
+
+    def top_keywords(self, n=5):
+        """The n most frequent keywords per product code, ties in order of first appearance (as Counter.most_common)."""
+        top = top_per_group(self.keyword_products.values(), self.keyword_ids.values(), len(self.products), len(self.vocabulary), n)
+        return [[self.vocabulary[code] for code in codes] for codes in top]
+
+    def summarize(self, n_keywords=5):
+        """Return per-product totals as a dict of arrays indexed by product code, plus each product's top keywords."""
+        codes = self.entry_products.values()
+        n_products = len(self.products)
+        entries = np.bincount(codes, minlength=n_products)
+        sentiment_sums = np.bincount(codes, weights=self.entry_sentiment.values(), minlength=n_products)
+        return {
+            "products": self.products,
+            "entries": entries,
+            "posts": np.bincount(codes, weights=self.entry_is_post.values(), minlength=n_products).astype(np.int64),
+            "keyword_count": np.bincount(codes, weights=self.entry_keyword_count.values(), minlength=n_products).astype(np.int64),
+            "avg_sentiment": np.divide(sentiment_sums, entries, out=np.zeros(n_products), where=entries > 0),
+            "top_keywords": self.top_keywords(n_keywords)
+        }
+
+    def entry_scores(self):
+        """Per-entry indicators in the product-coded layout bootstrap_confidence takes."""
+        return {
+            "products": list(self.products),
+            "codes": self.entry_products.values().astype(np.int64),
+            "is_post": self.entry_is_post.values().astype(np.float64),
+            "sentiment": self.entry_sentiment.values().copy(),
+            "keyword_count": self.entry_keyword_count.values().astype(np.float64)
+        }
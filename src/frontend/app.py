@@ -1,6 +1,26 @@
 # src/frontend/app.py
+import os
+import sys
 import streamlit as st
-from data.process_trends import generate_trend_report
+
+# streamlit run puts only this folder on the path; the project root is needed for the src. imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.data.process_trends import iter_trend_reports
+from src.pipeline.daemon import daemon_get
+from src.reporting.prepare_powerbi import load_latest_predictions
+from src.utils.product_registry import load_registry
+
+def latest_forecast():
+    """Predictions by product from a running daemon, or else from the latest saved run ({} without one)."""
+    answer = daemon_get("/predictions")
+    if answer is not None:
+        predictions = answer["predictions"]
+    else:
+        try:
+            _, predictions = load_latest_predictions()
+        except FileNotFoundError:
+            return {}
+    return {prediction["product"]: prediction for prediction in predictions}
 
 st.title("Artisan Market Trend Forecaster")
 st.markdown("Enter artisan products to analyze trends from Reddit posts.")
@@ -9,20 +29,35 @@ products_input = st.text_area("Enter products (one per line)", "Abstract paintin
 max_posts = st.slider("Max posts per product", 1, 20, 10)
 
 if st.button("Generate Trend Report"):
-    products = [p.strip() for p in products_input.split("\n") if p.strip()]
+    products = list(dict.fromkeys(p.strip() for p in products_input.split("\n") if p.strip()))
     if products:
-        with st.spinner("Fetching and processing trends..."):
-            report = generate_trend_report(products, max_posts=max_posts)
-        st.success("Trend report generated!")
-        
-        for product, keywords in report.items():
+        # One section per product, filled in as soon as that product's report is ready
+        sections = {}
+        forecast = latest_forecast()
+        registry = load_registry()
+        for product in products:
             st.subheader(f"Trends for {product}")
-            if keywords:
-                st.write(", ".join(keywords))
+            sections[product] = st.empty()
+            sections[product].info("Fetching and processing trends...")
+
+        for product, report in iter_trend_reports(products, max_posts=max_posts):
+            section = sections[product].container()
+            if "error" in report:
+                section.error(f"Could not fetch trends: {report['error']}")
+            elif report["keywords"]:
+                section.write(", ".join(report["keywords"]))
+                section.caption(f"{report['posts']} posts, {report['comments']} comments, average sentiment {report['sentiment']:.2f}")
             else:
-                st.write("No trends found.")
+                section.write("No trends found.")
+            prediction = forecast.get(registry.canonical_name(product))
+            if prediction is not None:
+                section.caption(
+                    f"Forecast: {prediction['trend_direction']} ({prediction['change_percentage']:+.1f}%), "
+                    f"predicted score {prediction['predicted_score']:.2f}, confidence {prediction['confidence']:.0f}%"
+                )
+        st.success("Trend report generated!")
     else:
         st.error("Please enter at least one product.")
 
 if __name__ == "__main__":
-    st.write("Run with: streamlit run src/frontend/app.py")
\ No newline at end of file
+    st.write("Run with: streamlit run src/frontend/app.py")
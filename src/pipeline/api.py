@@ -0,0 +1,84 @@
+from src.data.artifact_catalog import resolve_input, latest_artifact
+from src.utils.instrumentation import instrumented
+from src.data.analyze_data import analyze_data
+from src.data.clean_data import clean_data
+from src.data.process_trends import process_trends
+from src.data.predict_trends import predict_trends
+from src.reporting.prepare_powerbi import prepare_powerbi_data
+from src.data.confidence import MIN_CONFIDENCE
+from src.utils.record_reader import RecordReader
+
+def load_raw_data(input_file=None):
+    """A streaming reader over a raw snapshot (the latest one by default) and its catalog ids; returns (reader, raw_ids) or (None, []).
+
+    Each pass over the reader streams the file again, so the snapshot is
+    never held in memory as a whole.
+    """
+    raw_ids = []
+    if input_file is None:
+        raw_artifact = resolve_input("raw", "data/raw", "raw_social_data_", ".json")
+        if raw_artifact is None:
+            print("Error: No raw data files found in data/raw/")
+            return None, []
+        input_file = raw_artifact["path"]
+        raw_ids = [raw_artifact["id"]]
+    return RecordReader(input_file), raw_ids
+
+def _saved_ids(kind, save):
+    """Catalog ids of the artifact a stage just saved, for its children's lineage."""
+    artifact = latest_artifact(kind) if save else None
+    return [artifact["id"]] if artifact is not None else []
+
+@instrumented("forecast")
+def run_forecast(raw_data=None, save=True, analyze=True, min_score_threshold=0, min_confidence_threshold=MIN_CONFIDENCE, n_resamples=2000, raw_ids=None):
+    """Run clean -> process -> predict -> Power BI in one process.
+
+    The raw snapshot is streamed (the latest one unless entries are passed
+    in, with ``raw_ids`` naming their catalog artifact for lineage) and
+    parsed once: with ``analyze`` set, analysis and cleaning both need it,
+    so it is read into memory a single time and shared by the two. Each
+    stage hands its result to the next in memory, so every intermediate is
+    written at most once (only when ``save`` is set) and never read back.
+    Returns a dict with every stage's result; stages after a failing one are
+    left out.
+    """
+    if raw_data is None:
+        raw_data, raw_ids = load_raw_data()
+        if raw_data is None:
+            return {}
+    raw_ids = raw_ids or []
+
+    results = {}
+    if analyze:
+        # Analysis and cleaning share one parse of the snapshot instead of each streaming it
+        if isinstance(raw_data, RecordReader):
+            raw_data = list(raw_data)
+        results["analysis"] = analyze_data(raw_data, save=save, parent_ids=raw_ids)
+
+    results["cleaned"] = clean_data(raw_data, save=save, parent_ids=raw_ids)
+    if results["cleaned"] is None:
+        return results
+
+    results["processed"] = process_trends(results["cleaned"], save=save, parent_ids=_saved_ids("cleaned", save))
+    if results["processed"] is None:
+        return results
+
+    results["predictions"] = predict_trends(
+        min_score_threshold, n_resamples=n_resamples,
+        trends=results["processed"]["trends"], entry_scores=results["processed"]["entry_scores"], save=save,
+        parent_ids=_saved_ids("processed_trends", save) + _saved_ids("entry_scores", save)
+    )
+    if results["predictions"] is None:
+        return results
+
+    # A saved run is also added to the Power BI history under its run timestamp
+    predictions_artifact = latest_artifact("predictions") if save else None
+    results["powerbi"] = prepare_powerbi_data(
+        min_confidence_threshold, predictions=results["predictions"], save=save,
+        parent_ids=[predictions_artifact["id"]] if predictions_artifact else [],
+        run_ts=predictions_artifact["label"] if predictions_artifact else None
+    )
+    return results
+
+if __name__ == "__main__":
+    run_forecast()
@@ -0,0 +1,226 @@
+import os
+import io
+import csv
+import sys
+import json
+import time
+import argparse
+import threading
+import urllib.request
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from src.data.artifact_catalog import resolve_input, latest_artifact
+from src.data.sales_ledger import REVENUE_FILE
+from src.utils.product_registry import REGISTRY_FILE, load_registry
+from src.utils.relevance_model import MODEL_FILE as RELEVANCE_MODEL_FILE
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+WATCHED_FILES = [REGISTRY_FILE, REVENUE_FILE, "data/sales/sales_data.csv", RELEVANCE_MODEL_FILE]
+
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+class ForecastDaemon:
+    """Keeps the forecaster resident: analyzers, registry, the latest snapshot's reader and the latest results.
+
+    A refresh reruns the in-process forecast when the catalog has a new raw
+    snapshot or a watched input file changes, and on a fixed schedule if one
+    is set. Results are served over HTTP while the next refresh is computed.
+    """
+
+    def __init__(self, interval_minutes=None, fetch=False, poll_seconds=5, save=True, n_resamples=2000):
+        self.interval_minutes = interval_minutes
+        self.fetch = fetch
+        self.poll_seconds = poll_seconds
+        self.save = save
+        self.n_resamples = n_resamples
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.results = {}
+        self.version = 0
+        self.refreshed_at = None
+        self.run_ts = None
+        self.last_error = None
+        self.raw_id = None
+        self.raw_data = None
+        self.raw_entries = 0
+        self.file_mtimes = {}
+
+    def warm_up(self):
+        """Import the stages and build the sentiment analyzers and registry once."""
+        from src.pipeline import api
+        from src.data.process_trends import sentiment_analyzer
+        self.api = api
+        load_registry()
+        sentiment_analyzer()
+        print("Daemon warmed up: registry, sentiment analyzer and stages loaded")
+
+    def _changes(self):
+        """Describe what changed since the last refresh, or return None if nothing did."""
+        changes = []
+        raw_artifact = resolve_input("raw", "data/raw", "raw_social_data_", ".json")
+        if raw_artifact is not None and raw_artifact["id"] != self.raw_id:
+            changes.append(f"new raw snapshot {raw_artifact['path']}")
+        for path in WATCHED_FILES:
+            if _mtime(path) != self.file_mtimes.get(path):
+                changes.append(f"{path} changed")
+        return ", ".join(changes) or None
+
+    def refresh(self, reason="manual"):
+        # Scheduled, file-triggered and requested refreshes never overlap
+        with self.refresh_lock:
+            self._refresh(reason)
+
+    def _refresh(self, reason):
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Refreshing ({reason})")
+        file_mtimes = {path: _mtime(path) for path in WATCHED_FILES}
+        if file_mtimes[REGISTRY_FILE] != self.file_mtimes.get(REGISTRY_FILE) and self.file_mtimes:
+            # Products changed: recompile the registry and every cache derived from it
+            from src.data.process_trends import keyword_stop_words
+            load_registry.cache_clear()
+            keyword_stop_words.cache_clear()
+            load_registry()
+        self.file_mtimes = file_mtimes
+
+        # The snapshot is streamed again on each refresh until the catalog records a newer one
+        raw_artifact = resolve_input("raw", "data/raw", "raw_social_data_", ".json")
+        if raw_artifact is None and self.raw_data is None:
+            self.last_error = "No raw data registered yet"
+            print(f"Error: {self.last_error}")
+            return
+        try:
+            if raw_artifact is not None and raw_artifact["id"] != self.raw_id:
+                self.raw_data, _ = self.api.load_raw_data(raw_artifact["path"])
+                self.raw_id = raw_artifact["id"]
+                self.raw_entries = raw_artifact["row_count"] or 0
+            results = self.api.run_forecast(
+                raw_data=self.raw_data, save=self.save, n_resamples=self.n_resamples, raw_ids=[self.raw_id]
+            )
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error: Refresh failed: {e}")
+            return
+        # Saved predictions are served with their run timestamp, so readers can tell them from older runs
+        predictions_artifact = latest_artifact("predictions") if self.save and results.get("predictions") is not None else None
+        # Swap in the new results only once they are complete
+        with self.lock:
+            self.results = results
+            self.version += 1
+            self.refreshed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.run_ts = predictions_artifact["label"] if predictions_artifact else None
+            self.last_error = None if results.get("powerbi") is not None else "Forecast stopped before the Power BI step"
+
+    def snapshot(self):
+        with self.lock:
+            return self.version, self.refreshed_at, self.run_ts, self.results
+
+    def status(self):
+        version, refreshed_at, run_ts, results = self.snapshot()
+        return {
+            "version": version,
+            "refreshed_at": refreshed_at,
+            "run_ts": run_ts,
+            "raw_artifact_id": self.raw_id,
+            "entries": self.raw_entries,
+            "products": len(results.get("predictions") or []),
+            "last_error": self.last_error,
+            "interval_minutes": self.interval_minutes,
+            "fetch": self.fetch
+        }
+
+    def run(self, host=DAEMON_HOST, port=DAEMON_PORT):
+        self.warm_up()
+        server = ThreadingHTTPServer((host, port), _handler_for(self))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Serving forecasts on http://{host}:{port} (/status, /predictions, /powerbi, /powerbi.csv, /analysis)")
+
+        self.refresh("startup")
+        next_run = time.monotonic() + self.interval_minutes * 60 if self.interval_minutes else None
+        try:
+            while True:
+                time.sleep(self.poll_seconds)
+                if next_run is not None and time.monotonic() >= next_run:
+                    next_run = time.monotonic() + self.interval_minutes * 60
+                    if self.fetch:
+                        # A fetched snapshot is registered in the catalog and picked up below; every
+                        # query is searched again, since cached results hold no new posts
+                        from src.data.fetch_data import fetch_data
+                        fetch_data(refresh=True)
+                    else:
+                        self.refresh("schedule")
+                        continue
+                reason = self._changes()
+                if reason:
+                    self.refresh(reason)
+        except KeyboardInterrupt:
+            print("\nStopping daemon")
+        finally:
+            server.shutdown()
+
+def _handler_for(daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type="application/json"):
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            version, refreshed_at, run_ts, results = daemon.snapshot()
+            path = self.path.split("?")[0]
+            if path == "/status":
+                return self._send(200, json.dumps(daemon.status()))
+            if path in ("/predictions", "/powerbi", "/analysis"):
+                key = path.strip("/")
+                if results.get(key) is None:
+                    return self._send(503, json.dumps({"error": "No results yet", "last_error": daemon.last_error}))
+                return self._send(200, json.dumps({"version": version, "refreshed_at": refreshed_at, "run_ts": run_ts, key: results[key]}))
+            if path == "/powerbi.csv":
+                rows = results.get("powerbi")
+                if not rows:
+                    return self._send(503, "No results yet\n", "text/plain")
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+                return self._send(200, buffer.getvalue(), "text/csv")
+            return self._send(404, json.dumps({"error": f"Unknown path {path}"}))
+
+        def do_POST(self):
+            if self.path.split("?")[0] != "/refresh":
+                return self._send(404, json.dumps({"error": f"Unknown path {self.path}"}))
+            # Refresh in the background and answer straight away
+            threading.Thread(target=daemon.refresh, args=("requested",), daemon=True).start()
+            return self._send(202, json.dumps({"status": "refresh started"}))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def daemon_get(path, host=DAEMON_HOST, port=DAEMON_PORT, timeout=0.5):
+    """Fetch a JSON endpoint from a running daemon; returns None when no daemon answers or it has no results yet."""
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}{path}", timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the forecaster warm and refresh it on new data.")
+    parser.add_argument("--interval", type=float, default=None, help="also refresh every N minutes")
+    parser.add_argument("--fetch", action="store_true", help="fetch new Reddit data on each scheduled refresh")
+    parser.add_argument("--poll", type=float, default=5, help="seconds between checks for new snapshots and changed files")
+    parser.add_argument("--no-save", action="store_true", help="keep results in memory only")
+    parser.add_argument("--resamples", type=int, default=2000, help="bootstrap resamples for the confidence intervals")
+    parser.add_argument("--host", default=DAEMON_HOST)
+    parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    args = parser.parse_args(argv)
+    ForecastDaemon(args.interval, args.fetch, args.poll, save=not args.no_save, n_resamples=args.resamples).run(args.host, args.port)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
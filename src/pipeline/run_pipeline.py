@@ -0,0 +1,289 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import importlib
+import importlib.util
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from src.utils.product_registry import REGISTRY_FILE, TENANTS_FILE
+from src.utils.relevance_model import MODEL_FILE as RELEVANCE_MODEL_FILE
+from src.data.artifact_catalog import resolve_input
+from src.utils.instrumentation import instrumented, collect_stages, current_metrics, record_cache, record_counts
+
+STATE_FILE = "data/cache/pipeline_state.json"
+
+def latest_file(kind, directory, prefix, suffix):
+    """Path of the latest artifact of a kind from the catalog, or None."""
+    artifact = resolve_input(kind, directory, prefix, suffix)
+    return artifact["path"] if artifact is not None else None
+
+# Each stage declares the function to run, the stages it depends on, the code it is built
+# from, and the files it reads as (required, optional). A stage reruns only when the
+# fingerprint of its code and input files changes; stages marked "always" read the outside
+# world (Reddit) and rerun every time unless skipped. Optional stages with missing inputs
+# are skipped without blocking their dependents.
+STAGES = {
+    "fetch": {
+        "run": "src.data.fetch_data:fetch_data",
+        "deps": [],
+        "always": True,
+        "code": ["src.data.fetch_data", "src.data.crawl_planner", "src.utils.relevance_model", "src.utils.single_flight", "src.utils.product_registry", REGISTRY_FILE],
+        "inputs": lambda: ([], [])
+    },
+    "clean": {
+        "run": "src.data.clean_data:clean_data",
+        "deps": ["fetch"],
+        "code": [
+            "src.data.clean_data", "src.utils.record_reader", "src.utils.relevance_model", "src.data.corpus_store", "src.utils.product_registry",
+            REGISTRY_FILE
+        ],
+        "inputs": lambda: ([latest_file("raw", "data/raw", "raw_social_data_", ".json")], [RELEVANCE_MODEL_FILE])
+    },
+    "analyze": {
+        "run": "src.data.analyze_data:analyze_data",
+        "deps": ["fetch"],
+        "code": ["src.data.analyze_data", "src.utils.record_reader", "src.utils.relevance_model", "src.utils.product_registry", REGISTRY_FILE],
+        "inputs": lambda: ([latest_file("raw", "data/raw", "raw_social_data_", ".json")], [RELEVANCE_MODEL_FILE])
+    },
+    "sales": {
+        "run": "src.data.sales_ledger:aggregate_sales_ledger",
+        "deps": [],
+        "code": ["src.data.sales_ledger", "src.utils.product_registry", REGISTRY_FILE],
+        "inputs": lambda: (["data/sales/sales_ledger.csv"], []),
+        "optional": True
+    },
+    "process": {
+        "run": "src.data.process_trends:process_trends",
+        "deps": ["clean", "sales"],
+        "code": [
+            "src.data.process_trends", "src.data.trend_aggregation", "src.data.corpus_store", "src.utils.record_reader", "src.reporting.trend_cube",
+            "src.data.sales_ledger", "src.utils.product_registry", REGISTRY_FILE
+        ],
+        "inputs": lambda: (
+            [latest_file("cleaned", "data/cleaned", "cleaned_social_data_", ".json")],
+            ["data/sales/sales_data.csv", "data/sales/revenue_by_region_month.csv"]
+        )
+    },
+    "predict": {
+        "run": "src.data.predict_trends:predict_trends",
+        "deps": ["process"],
+        "code": ["src.data.predict_trends", "src.data.confidence", "src.data.prediction_store"],
+        "inputs": lambda: (["data/processed/processed_trends.csv"], ["data/processed/entry_scores.csv"])
+    },
+    "powerbi": {
+        "run": "src.reporting.prepare_powerbi:prepare_powerbi_data",
+        "deps": ["predict"],
+        "code": ["src.reporting.prepare_powerbi", "src.data.prediction_store"],
+        "inputs": lambda: (["data/predictions/predictions.db"], [])
+    },
+    "tenants": {
+        "run": "src.pipeline.tenants:run_tenants",
+        "deps": ["process", "predict"],
+        "code": [
+            "src.pipeline.tenants", "src.reporting.prepare_powerbi", "src.reporting.trend_cube", "src.data.prediction_store",
+            "src.utils.product_registry", REGISTRY_FILE
+        ],
+        # The trend cube is written by process, next to the Power BI files
+        "inputs": lambda: (
+            [TENANTS_FILE, "data/predictions/predictions.db"],
+            ["data/processed/processed_trends.csv", "data/powerbi/cube/keywords.csv"]
+        ),
+        "optional": True
+    }
+}
+
+# When clean has to rerun and every stage after it is wanted too, the chain runs as one
+# in-process forecast that hands each result to the next stage in memory; the files are
+# still written, for the fingerprints and for later runs. Each stage maps to its result key.
+FORECAST_CHAIN = {"clean": "cleaned", "process": "processed", "predict": "predictions", "powerbi": "powerbi"}
+
+def _code_path(name):
+    if os.path.exists(name):
+        return name
+    return importlib.util.find_spec(name).origin
+
+def _hash_file(path, digest):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+def stage_fingerprint(name, stage):
+    """Hash a stage's code and input files; returns (fingerprint, missing required inputs)."""
+    required, optional = stage["inputs"]()
+    missing = [path for path in required if path is None or not os.path.exists(path)]
+    if missing:
+        return None, missing
+
+    digest = hashlib.sha256(name.encode("utf-8"))
+    for module in stage["code"]:
+        digest.update(module.encode("utf-8"))
+        _hash_file(_code_path(module), digest)
+    for path in required + optional:
+        if path is not None and os.path.exists(path):
+            digest.update(path.encode("utf-8"))
+            _hash_file(path, digest)
+    return digest.hexdigest(), []
+
+def _run_stage(target):
+    """Run a stage in a worker process and return its instrumentation metrics."""
+    module_name, function_name = target.split(":")
+    with collect_stages() as stages:
+        result = getattr(importlib.import_module(module_name), function_name)()
+    # Stage functions report errors by printing them and returning None
+    if result is None:
+        raise RuntimeError("the stage returned no result (see its errors above)")
+    return stages
+
+def _run_forecast_chain():
+    """Run the forecast chain in a worker process; returns its metrics and the chain stages that finished."""
+    from src.pipeline.api import run_forecast
+    with collect_stages() as stages:
+        results = run_forecast(analyze=False)
+    return stages, [name for name, key in FORECAST_CHAIN.items() if results.get(key) is not None]
+
+def _load_state(state_file):
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_state(state, state_file):
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+
+def _required_stages(targets):
+    needed = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(STAGES[name]["deps"])
+    return needed
+
+def _finish_stage(name, fingerprint, outcomes, state, state_file):
+    outcomes[name] = "ran"
+    # Record the fingerprint of the inputs the stage actually consumed
+    state[name] = {"fingerprint": fingerprint, "completed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    _save_state(state, state_file)
+    print(f"[{name}] finished")
+
+def _finish_chain(finished, outcomes, fingerprints, state, state_file):
+    """Settle every stage of the forecast chain: finished ones ran, the first other one failed, the rest are blocked."""
+    for name in FORECAST_CHAIN:
+        if name in finished:
+            # Later stages' inputs were written by the chain itself, so they are fingerprinted now
+            fingerprint = fingerprints[name] if name in fingerprints else stage_fingerprint(name, STAGES[name])[0]
+            _finish_stage(name, fingerprint, outcomes, state, state_file)
+        elif not any(outcomes.get(stage) == "failed" for stage in FORECAST_CHAIN):
+            outcomes[name] = "failed"
+            print(f"[{name}] failed (see its errors above)")
+        else:
+            outcomes[name] = "blocked"
+            print(f"[{name}] blocked by an upstream failure")
+
+@instrumented("pipeline")
+def run_pipeline(targets=None, force=(), skip=(), workers=None, state_file=STATE_FILE):
+    """Run the stages needed for the targets, skipping those whose fingerprint is unchanged.
+
+    Independent stages (for example analyze alongside clean and process) run in
+    parallel worker processes. Returns a dict of stage name to outcome.
+    """
+    targets = targets or ["powerbi", "analyze", "tenants"]
+    needed = _required_stages(targets)
+    force = set(force) if force is not True else set(needed)
+    state = _load_state(state_file)
+    outcomes = {}
+    fingerprints = {}
+    running = {}
+    chained = None  # The future of the forecast chain, if it runs
+
+    for name in skip:
+        if name in needed:
+            outcomes[name] = "skipped"
+    chain_wanted = all(name in needed and name not in skip for name in FORECAST_CHAIN)
+
+    print(f"Running pipeline for: {', '.join(sorted(needed))}")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while len(outcomes) < len(needed):
+            progressed = False
+            for name in sorted(needed):
+                if name in outcomes or name in running:
+                    continue
+                deps = STAGES[name]["deps"]
+                if any(outcomes.get(dep) in ("failed", "blocked") for dep in deps if dep in needed):
+                    outcomes[name] = "blocked"
+                    print(f"[{name}] blocked by an upstream failure")
+                    progressed = True
+                    continue
+                if not all(dep in outcomes for dep in deps if dep in needed):
+                    continue
+                # The chain includes process, so it starts once the sales figures process reads are settled
+                if name == "clean" and chain_wanted and "sales" in needed and "sales" not in outcomes:
+                    continue
+
+                progressed = True
+                fingerprint, missing = stage_fingerprint(name, STAGES[name])
+                if fingerprint is None:
+                    optional = STAGES[name].get("optional", False)
+                    outcomes[name] = "skipped" if optional else "blocked"
+                    print(f"[{name}] {'skipped' if optional else 'blocked'}: missing input {missing}")
+                elif name not in force and not STAGES[name].get("always") and state.get(name, {}).get("fingerprint") == fingerprint:
+                    outcomes[name] = "up-to-date"
+                    record_cache("stage_fingerprints", hit=True)
+                    print(f"[{name}] up to date, skipping")
+                else:
+                    record_cache("stage_fingerprints", hit=False)
+                    fingerprints[name] = fingerprint
+                    if name == "clean" and chain_wanted and outcomes.get("sales") not in ("failed", "blocked"):
+                        chained = running[name] = executor.submit(_run_forecast_chain)
+                        print(f"[{name}] started, with {', '.join(list(FORECAST_CHAIN)[1:])} in the same process")
+                        continue
+                    running[name] = executor.submit(_run_stage, STAGES[name]["run"])
+                    print(f"[{name}] started")
+
+            if running and not progressed:
+                done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name, future in list(running.items()):
+                    if future not in done:
+                        continue
+                    del running[name]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        outcomes[name] = "failed"
+                        print(f"[{name}] failed: {e}")
+                        continue
+                    if future is chained:
+                        metrics, finished = result
+                        current_metrics().setdefault("substages", []).extend(metrics)
+                        _finish_chain(finished, outcomes, fingerprints, state, state_file)
+                        continue
+                    current_metrics().setdefault("substages", []).extend(result)
+                    _finish_stage(name, fingerprints[name], outcomes, state, state_file)
+
+    record_counts(records_out=sum(1 for outcome in outcomes.values() if outcome == "ran"))
+    print("\nPipeline summary:")
+    for name in sorted(outcomes):
+        print(f"{name:<10} {outcomes[name]}")
+    return outcomes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the forecaster pipeline, skipping unchanged stages.")
+    parser.add_argument("targets", nargs="*", help=f"stages to bring up to date, from {', '.join(sorted(STAGES))} (default: powerbi analyze tenants)")
+    parser.add_argument("--force", action="append", default=[], choices=sorted(STAGES), help="rerun a stage even if unchanged")
+    parser.add_argument("--force-all", action="store_true", help="rerun every needed stage")
+    parser.add_argument("--skip", action="append", default=[], choices=sorted(STAGES), help="treat a stage as done, e.g. --skip fetch")
+    parser.add_argument("--workers", type=int, default=None, help="parallel worker processes")
+    args = parser.parse_args(argv)
+    unknown = [target for target in args.targets if target not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+    outcomes = run_pipeline(args.targets, force=True if args.force_all else args.force, skip=args.skip, workers=args.workers)
+    return 1 if any(outcome in ("failed", "blocked") for outcome in outcomes.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import os
+import csv
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from src.data.artifact_catalog import latest_artifact
+from src.data.prediction_store import connect, latest_run, DB_FILE
+from src.utils.product_registry import load_registry
+from src.reporting.trend_cube import TrendCube, GRAINS, CUBE_DIR, cube_totals, cube_file
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8000
+TRENDS_FILE = "data/processed/processed_trends.csv"
+TREND_INTS = ("post_count", "keyword_count")
+TREND_FLOATS = ("sentiment", "product_relevance", "individual_cost", "estimated_monthly_revenue", "estimated_yearly_revenue")
+
+class CachedResponse:
+    """A response body serialized once, with the ETag derived from it."""
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+def load_trends(trends_file=TRENDS_FILE):
+    """Read processed_trends.csv into {product: row} with numeric columns typed."""
+    trends = {}
+    if not os.path.exists(trends_file):
+        return trends
+    with open(trends_file, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for column in TREND_INTS:
+                row[column] = int(row[column])
+            for column in TREND_FLOATS:
+                row[column] = float(row[column]) if row[column] != "" else None
+            row["top_keywords"] = [word for word in row["top_keywords"].split(", ") if word]
+            trends[row["product"]] = row
+    return trends
+
+def load_history(db_file=DB_FILE):
+    """Every stored run, oldest first, as a list of {"run_ts", "created_at", "predictions"}."""
+    conn = connect(db_file)
+    try:
+        runs = {row["run_ts"]: {"run_ts": row["run_ts"], "created_at": row["created_at"], "predictions": []}
+                for row in conn.execute("SELECT run_ts, created_at FROM runs ORDER BY run_ts")}
+        for row in conn.execute("SELECT * FROM predictions ORDER BY run_ts, predicted_score DESC"):
+            runs[row["run_ts"]]["predictions"].append(dict(row))
+    finally:
+        conn.close()
+    return list(runs.values())
+
+class TrendSnapshot:
+    """Everything the service answers with, serialized up front for one version of the data."""
+
+    def __init__(self, version, trends, history, cube=None):
+        self.version = version
+        self.cube = cube or TrendCube(None)
+        self.loaded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        latest = history[-1] if history else {"run_ts": None, "created_at": None, "predictions": []}
+        latest_by_product = {pred["product"]: pred for pred in latest["predictions"]}
+        product_names = sorted(set(trends) | set(latest_by_product))
+
+        self.products = CachedResponse({
+            "products": [
+                {
+                    "product": product,
+                    "post_count": trends.get(product, {}).get("post_count"),
+                    "trend_direction": latest_by_product.get(product, {}).get("trend_direction"),
+                    "predicted_score": latest_by_product.get(product, {}).get("predicted_score")
+                }
+                for product in product_names
+            ],
+            "run_ts": latest["run_ts"]
+        })
+        self.trends = {
+            product: CachedResponse({"product": product, "trend": trends.get(product), "prediction": latest_by_product.get(product)})
+            for product in product_names
+        }
+        self.latest = CachedResponse(latest)
+        self.history = CachedResponse({"runs": history})
+        history_by_product = {product: [] for product in product_names}
+        for run in history:
+            for pred in run["predictions"]:
+                history_by_product.setdefault(pred["product"], []).append(dict(pred, created_at=run["created_at"]))
+        self.product_history = {
+            product: CachedResponse({"product": product, "history": rows}) for product, rows in history_by_product.items()
+        }
+
+class TrendStore:
+    """Holds the current snapshot; a refresh builds a new one and swaps the reference in one step.
+
+    Requests read ``store.snapshot`` once and answer from that object, so a
+    refresh never exposes a half-built mix of old and new data.
+    """
+
+    def __init__(self, trends_file=TRENDS_FILE, db_file=DB_FILE, cube_dir=CUBE_DIR):
+        self.trends_file = trends_file
+        self.db_file = db_file
+        self.cube_dir = cube_dir
+        self.snapshot = TrendSnapshot(None, {}, [])
+        self.refresh_lock = threading.Lock()
+
+    def current_version(self):
+        """Identify the data on disk by the latest catalog entries and stored run."""
+        trends_artifact = latest_artifact("processed_trends")
+        predictions_artifact = latest_artifact("predictions")
+        mtime = os.path.getmtime(self.trends_file) if os.path.exists(self.trends_file) else None
+        cube_day_file = cube_file("day", self.cube_dir)
+        cube_mtime = os.path.getmtime(cube_day_file) if os.path.exists(cube_day_file) else None
+        return (
+            trends_artifact["id"] if trends_artifact else None,
+            predictions_artifact["id"] if predictions_artifact else None,
+            latest_run(self.db_file),
+            mtime,
+            cube_mtime
+        )
+
+    def refresh(self, force=False):
+        """Reload when the data changed; returns True if a new snapshot was swapped in."""
+        with self.refresh_lock:
+            version = self.current_version()
+            if not force and version == self.snapshot.version:
+                return False
+            self.snapshot = TrendSnapshot(version, load_trends(self.trends_file), load_history(self.db_file), TrendCube(self.cube_dir))
+            print(f"[{self.snapshot.loaded_at}] Loaded {len(self.snapshot.trends)} products (run {version[2]})")
+            return True
+
+    def watch(self, interval, stop_event):
+        while not stop_event.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error: Refresh failed: {e}")
+
+def _respond(request, cached):
+    """Answer from a cached body, or 304 when the client already holds this version."""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if cached.etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+def _not_found(message):
+    return Response(content=json.dumps({"error": message}), status_code=404, media_type="application/json")
+
+def create_app(store=None, refresh_seconds=10):
+    """Build the FastAPI app; data is loaded at startup and reloaded in the background when it changes."""
+    store = store or TrendStore()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        store.refresh(force=True)
+        stop_event = threading.Event()
+        watcher = threading.Thread(target=store.watch, args=(refresh_seconds, stop_event), daemon=True)
+        watcher.start()
+        yield
+        stop_event.set()
+
+    app = FastAPI(title="Micro-entrepreneur trend forecaster", lifespan=lifespan)
+    app.state.store = store
+
+    @app.get("/products")
+    def products(request: Request):
+        return _respond(request, store.snapshot.products)
+
+    @app.get("/trends/{product}")
+    def trend(product: str, request: Request):
+        snapshot = store.snapshot
+        name = load_registry().canonical_name(product) or product.strip().lower()
+        if name not in snapshot.trends:
+            return _not_found(f"Unknown product {product}")
+        return _respond(request, snapshot.trends[name])
+
+    @app.get("/predictions/latest")
+    def predictions_latest(request: Request):
+        return _respond(request, store.snapshot.latest)
+
+    @app.get("/predictions/history")
+    def predictions_history(request: Request, product: str = None):
+        snapshot = store.snapshot
+        if product is None:
+            return _respond(request, snapshot.history)
+        name = load_registry().canonical_name(product) or product.strip().lower()
+        if name not in snapshot.product_history:
+            return _not_found(f"Unknown product {product}")
+        return _respond(request, snapshot.product_history[name])
+
+    @app.get("/cube/{grain}")
+    def cube(grain: str, request: Request, product: str = None, start: str = None, end: str = None, type: str = None):
+        """Mentions and sentiment per day, week or month, looked up in the precomputed cube."""
+        snapshot = store.snapshot
+        if grain not in GRAINS:
+            return _not_found(f"Unknown grain {grain}, expected one of {', '.join(GRAINS)}")
+        if product is None:
+            products = snapshot.cube.products()
+        else:
+            products = [load_registry().canonical_name(product) or product.strip().lower()]
+            if products[0] not in snapshot.cube.cells[grain]:
+                return _not_found(f"Unknown product {product}")
+        cells = [cell for name in products for cell in snapshot.cube.slice(grain, name, start, end, type)]
+        return _respond(request, CachedResponse({"grain": grain, "cells": cells, "totals": cube_totals(cells)}))
+
+    @app.post("/refresh")
+    def refresh():
+        changed = store.refresh()
+        return {"reloaded": changed, "loaded_at": store.snapshot.loaded_at}
+
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the latest trends and predictions over HTTP.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--refresh-seconds", type=float, default=10, help="how often to check for new trends and predictions")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run(create_app(refresh_seconds=args.refresh_seconds), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
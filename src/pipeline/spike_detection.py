@@ -0,0 +1,178 @@
+import os
+import json
+import math
+import urllib.request
+from datetime import datetime, date
+
+ALERTS_FILE = "data/stream/alerts.jsonl"
+
+# Daily baselines are exponentially weighted over about SPAN_DAYS days and trusted
+# after WARMUP_DAYS days. A day is flagged once its mentions (or mean sentiment)
+# lie Z_THRESHOLD deviations from the baseline; deviations below the MIN_STD
+# floors are raised to them, so a flat history does not make every change a spike.
+SPAN_DAYS = 14
+WARMUP_DAYS = 7
+Z_THRESHOLD = 3.0
+MIN_MENTIONS = 5
+MIN_SENTIMENT_ENTRIES = 5
+MIN_STD = {"mentions": 1.0, "sentiment": 0.1}
+MAX_GAP_DAYS = 366
+
+class Ewma:
+    """Exponentially weighted mean and variance of one daily series."""
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.mean = None
+        self.var = 0.0
+        self.days = 0
+
+    def update(self, value):
+        self.days += 1
+        if self.mean is None:
+            self.mean = value
+            return
+        diff = value - self.mean
+        increment = self.alpha * diff
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + diff * increment)
+
+    def z_score(self, value, min_std):
+        return (value - self.mean) / max(math.sqrt(self.var), min_std)
+
+class ProductRates:
+    """The open day's mention count and sentiment sum for one product, with EWMA baselines of closed days."""
+
+    def __init__(self, alpha):
+        self.day = None
+        self.mentions = 0
+        self.sentiment_sum = 0.0
+        self.sentiment_entries = 0
+        self.baselines = {"mentions": Ewma(alpha), "sentiment": Ewma(alpha)}
+        self.alerted = set()  # Metrics already flagged for the open day
+        self.late = 0
+
+    def close_day(self):
+        self.baselines["mentions"].update(self.mentions)
+        if self.sentiment_entries:
+            self.baselines["sentiment"].update(self.sentiment_sum / self.sentiment_entries)
+
+    def advance(self, day):
+        """Close the open day and any empty days up to ``day``."""
+        if self.day is not None:
+            self.close_day()
+            gap = min((day - self.day).days - 1, MAX_GAP_DAYS)
+            for _ in range(gap):
+                self.baselines["mentions"].update(0)
+        self.day = day
+        self.mentions = 0
+        self.sentiment_sum = 0.0
+        self.sentiment_entries = 0
+        self.alerted = set()
+
+class SpikeDetector:
+    """Online per-product spike detection on daily mention counts and mean sentiment.
+
+    Entries are bucketed by their created_at day. Each product holds only its
+    open day and two EWMA baselines, so memory stays constant however long the
+    stream runs. ``add`` checks the open day against the baselines as each
+    entry arrives and returns any new alerts, at most one per metric and day.
+    Entries dated before a product's open day are counted as late and left
+    out, since the baselines cannot take them back.
+    """
+
+    def __init__(self, span_days=SPAN_DAYS, warmup_days=WARMUP_DAYS, z_threshold=Z_THRESHOLD,
+                 min_mentions=MIN_MENTIONS, min_sentiment_entries=MIN_SENTIMENT_ENTRIES):
+        self.alpha = 2 / (span_days + 1)
+        self.warmup_days = warmup_days
+        self.z_threshold = z_threshold
+        self.min_mentions = min_mentions
+        self.min_sentiment_entries = min_sentiment_entries
+        self.products = {}
+
+    def add(self, product, created_at, sentiment=None):
+        """Count one entry of a product; returns the alerts it triggers (usually none)."""
+        try:
+            day = date.fromisoformat(str(created_at)[:10])
+        except ValueError:
+            return []
+        rates = self.products.get(product)
+        if rates is None:
+            rates = self.products[product] = ProductRates(self.alpha)
+        if rates.day is not None and day < rates.day:
+            rates.late += 1
+            return []
+        if day != rates.day:
+            rates.advance(day)
+
+        rates.mentions += 1
+        if sentiment is not None:
+            rates.sentiment_sum += sentiment
+            rates.sentiment_entries += 1
+        return self._check(product, rates)
+
+    def late_entries(self):
+        """Entries left out so far because they were dated before their product's open day."""
+        return sum(rates.late for rates in self.products.values())
+
+    def _check(self, product, rates):
+        alerts = []
+        baseline = rates.baselines["mentions"]
+        if "mentions" not in rates.alerted and baseline.days >= self.warmup_days and rates.mentions >= self.min_mentions:
+            z = baseline.z_score(rates.mentions, MIN_STD["mentions"])
+            if z >= self.z_threshold:
+                alerts.append(self._alert(product, rates, "mentions", rates.mentions, baseline, z))
+
+        baseline = rates.baselines["sentiment"]
+        if ("sentiment" not in rates.alerted and baseline.days >= self.warmup_days
+                and rates.sentiment_entries >= self.min_sentiment_entries):
+            value = rates.sentiment_sum / rates.sentiment_entries
+            z = baseline.z_score(value, MIN_STD["sentiment"])
+            if abs(z) >= self.z_threshold:
+                alerts.append(self._alert(product, rates, "sentiment", value, baseline, z))
+        return alerts
+
+    def _alert(self, product, rates, metric, value, baseline, z):
+        rates.alerted.add(metric)
+        return {
+            "product": product,
+            "day": rates.day.isoformat(),
+            "metric": metric,
+            "direction": "up" if z > 0 else "down",
+            "value": round(value, 4),
+            "baseline": round(baseline.mean, 4),
+            "z_score": round(z, 2),
+            "detected_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+class AlertSink:
+    """Append alerts to a JSON Lines file and, if a hook URL is set, POST each one to it as JSON."""
+
+    def __init__(self, alerts_file=ALERTS_FILE, hook_url=None, timeout=5):
+        self.alerts_file = alerts_file
+        self.hook_url = hook_url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        if not alerts:
+            return
+        os.makedirs(os.path.dirname(self.alerts_file) or ".", exist_ok=True)
+        with open(self.alerts_file, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert) + "\n")
+        for alert in alerts:
+            direction = "spike" if alert["direction"] == "up" else "drop"
+            print(f"Alert: {alert['metric']} {direction} for {alert['product']} on {alert['day']}: "
+                  f"{alert['value']} against a baseline of {alert['baseline']} (z={alert['z_score']})")
+            if self.hook_url:
+                self._post(alert)
+
+    def _post(self, alert):
+        request = urllib.request.Request(
+            self.hook_url, data=json.dumps(alert).encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except OSError as e:
+            print(f"Error: Alert hook {self.hook_url} failed: {e}")
@@ -0,0 +1,392 @@
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import pickle
+import argparse
+from collections import Counter, deque
+from datetime import datetime
+from src.utils.product_registry import load_registry
+from src.data.clean_data import clean_entries
+from src.data.process_trends import extract_keywords, simple_sentiment_analysis, load_sales_data, estimate_revenue
+from src.data.predict_trends import predict_trend
+from src.utils.record_reader import RecordReader
+from src.pipeline.spike_detection import SpikeDetector, AlertSink, ALERTS_FILE, Z_THRESHOLD
+
+STREAM_DIR = "data/stream"
+QUEUE_FILE = os.path.join(STREAM_DIR, "queue.jsonl")
+CHECKPOINT_FILE = os.path.join(STREAM_DIR, "checkpoint.pkl")
+STREAM_TRENDS_FILE = os.path.join(STREAM_DIR, "stream_trends.csv")
+STREAM_COLUMNS = [
+    "product", "post_count", "keyword_count", "top_keywords", "sentiment", "product_relevance",
+    "individual_cost", "estimated_monthly_revenue", "estimated_yearly_revenue",
+    "current_score", "predicted_score", "trend_direction", "confidence", "change_percentage", "updated_at"
+]
+# Redelivered records are dropped by id. Only the ids of the most recent entries are kept:
+# a broker redelivers at most the records after its last committed offset, one micro-batch
+SEEN_ID_WINDOW = 50000
+
+class MemoryQueue:
+    """In-process queue for tests and for producers running in the same process."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def publish(self, records):
+        for record in records:
+            self._queue.put(record)
+
+    def poll(self, max_records, timeout):
+        try:
+            records = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(records) < max_records:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def position(self):
+        return None
+
+    def seek(self, position):
+        pass
+
+    def commit(self):
+        pass
+
+class FileQueue:
+    """Append-only JSON Lines spool file; the consumer's byte offset is kept in the stream checkpoint.
+
+    Producers in other processes append whole lines, and the consumer only
+    reads up to the last complete line, so it never sees a partial record.
+    """
+
+    def __init__(self, path=QUEUE_FILE):
+        self.path = path
+        self._read_offset = 0
+
+    def publish(self, records):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def poll(self, max_records, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            records = self._read(max_records)
+            if records or time.monotonic() >= deadline:
+                return records
+            time.sleep(min(0.2, timeout))
+
+    def _read(self, max_records):
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "rb") as f:
+            f.seek(self._read_offset)
+            while len(records) < max_records:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                self._read_offset += len(line)
+                if line.strip():
+                    records.append(json.loads(line))
+        return records
+
+    def position(self):
+        return self._read_offset
+
+    def seek(self, position):
+        self._read_offset = position or 0
+
+    def commit(self):
+        pass
+
+class KafkaQueue:
+    """Kafka topic backend; kafka-python is imported only when this backend is used."""
+
+    def __init__(self, topic="forecaster-raw", bootstrap_servers="localhost:9092", group_id="forecaster-stream"):
+        self.topic = topic
+        self.bootstrap_servers = bootstrap_servers
+        self.group_id = group_id
+        self._producer = None
+        self._consumer = None
+
+    def publish(self, records):
+        if self._producer is None:
+            from kafka import KafkaProducer
+            self._producer = KafkaProducer(
+                bootstrap_servers=self.bootstrap_servers,
+                value_serializer=lambda record: json.dumps(record).encode("utf-8")
+            )
+        for record in records:
+            self._producer.send(self.topic, record)
+        self._producer.flush()
+
+    def poll(self, max_records, timeout):
+        if self._consumer is None:
+            from kafka import KafkaConsumer
+            self._consumer = KafkaConsumer(
+                self.topic, bootstrap_servers=self.bootstrap_servers, group_id=self.group_id,
+                enable_auto_commit=False, auto_offset_reset="earliest",
+                value_deserializer=lambda value: json.loads(value.decode("utf-8"))
+            )
+        batches = self._consumer.poll(timeout_ms=int(timeout * 1000), max_records=max_records)
+        return [message.value for messages in batches.values() for message in messages]
+
+    # Kafka keeps the consumer group's committed offsets itself
+    def position(self):
+        return None
+
+    def seek(self, position):
+        pass
+
+    def commit(self):
+        if self._consumer is not None:
+            self._consumer.commit()
+
+QUEUE_BACKENDS = {"file": FileQueue, "memory": MemoryQueue, "kafka": KafkaQueue}
+
+def open_queue(backend="file", **options):
+    return QUEUE_BACKENDS[backend](**options)
+
+class StreamAggregator:
+    """Per-product running aggregates, updated one micro-batch of cleaned and scored entries at a time.
+
+    Uses the clean_data rules and the process_trends scoring, so the trend rows
+    match what the batch stages would produce for the same entries. Relevant
+    posts also feed a SpikeDetector, oldest first within each micro-batch;
+    comments are left out, since fetch dates them by when they were fetched.
+    The detector's alerts wait in ``take_alerts``.
+    """
+
+    def __init__(self, spikes=None, seen_id_window=SEEN_ID_WINDOW):
+        self.seen_id_window = seen_id_window
+        self.recent_ids = deque()
+        self.seen_ids = set()
+        self.stats = {}
+        self.records_in = 0
+        self.spikes = spikes or SpikeDetector()
+        self.pending_alerts = []
+
+    def _first_seen(self, entry_id):
+        if entry_id in self.seen_ids:
+            return False
+        self.seen_ids.add(entry_id)
+        self.recent_ids.append(entry_id)
+        if len(self.recent_ids) > self.seen_id_window:
+            self.seen_ids.discard(self.recent_ids.popleft())
+        return True
+
+    def add_batch(self, raw_entries):
+        """Fold a micro-batch of raw entries, scoring their relevance in one model call; returns how many were kept."""
+        self.records_in += len(raw_entries)
+        fresh = [raw_entry for raw_entry in raw_entries if self._first_seen(raw_entry.get("id", ""))]
+        posts = []
+        accepted = 0
+        for product, entry in clean_entries(fresh, load_registry(), batch_size=max(len(fresh), 1)):
+            sentiment = self._fold(product, entry)
+            if sentiment is None:
+                continue
+            accepted += 1
+            if not entry["id"].startswith("comment_"):
+                posts.append((str(entry.get("created_at") or ""), product, sentiment))
+        # The detector's baselines only move forward in time, so the batch goes in day order
+        posts.sort(key=lambda post: post[0])
+        for created_at, product, sentiment in posts:
+            self.pending_alerts.extend(self.spikes.add(product, created_at, sentiment))
+        return accepted
+
+    def add(self, raw_entry):
+        return self.add_batch([raw_entry]) == 1
+
+    def _fold(self, product, entry):
+        """Add one cleaned entry to its product's aggregates; returns its sentiment, or None when it was not kept."""
+        if product is None:
+            return None
+        stats = self.stats.setdefault(product, {
+            "total": 0, "relevant": 0, "posts": 0, "keyword_count": 0, "sentiment_sum": 0.0, "keywords": Counter()
+        })
+        stats["total"] += 1
+        if entry is None:
+            return None
+
+        stats["relevant"] += 1
+        if not entry["id"].startswith("comment_"):
+            stats["posts"] += 1
+        keywords = extract_keywords(entry["text"], product, stats["posts"])
+        stats["keywords"].update(keywords)
+        stats["keyword_count"] += len(keywords)
+        sentiment = simple_sentiment_analysis(entry["text"])
+        stats["sentiment_sum"] += sentiment
+        return sentiment
+
+    def checkpoint_state(self):
+        """The running aggregates and the recent ids, which is all a restart needs."""
+        return {
+            "stats": self.stats, "records_in": self.records_in, "recent_ids": list(self.recent_ids),
+            "spike_rates": self.spikes.products
+        }
+
+    @classmethod
+    def from_checkpoint(cls, state):
+        aggregator = cls()
+        aggregator.stats = state["stats"]
+        aggregator.records_in = state["records_in"]
+        aggregator.recent_ids = deque(state["recent_ids"][-aggregator.seen_id_window:])
+        aggregator.seen_ids = set(aggregator.recent_ids)
+        aggregator.spikes.products = state["spike_rates"]
+        return aggregator
+
+    def take_alerts(self):
+        alerts, self.pending_alerts = self.pending_alerts, []
+        return alerts
+
+    def trend_rows(self, sales_data, ledger_revenue):
+        rows = []
+        updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for product, stats in sorted(self.stats.items()):
+            if not stats["relevant"]:
+                continue
+            sentiment = stats["sentiment_sum"] / stats["relevant"]
+            relevance = stats["relevant"] / stats["total"] * 100
+            individual_cost, monthly_revenue, yearly_revenue = estimate_revenue(product, sales_data, ledger_revenue)
+            current_score, predicted_score, trend_direction, confidence, change_percentage = predict_trend(
+                stats["posts"], stats["keyword_count"], sentiment, monthly_revenue, relevance
+            )
+            rows.append({
+                "product": product,
+                "post_count": stats["posts"],
+                "keyword_count": stats["keyword_count"],
+                "top_keywords": ", ".join(word for word, count in stats["keywords"].most_common(5) if word != "N/A"),
+                "sentiment": round(sentiment, 4),
+                "product_relevance": round(relevance, 2),
+                "individual_cost": individual_cost,
+                "estimated_monthly_revenue": monthly_revenue,
+                "estimated_yearly_revenue": yearly_revenue,
+                "current_score": round(current_score, 2),
+                "predicted_score": round(predicted_score, 2),
+                "trend_direction": trend_direction,
+                "confidence": round(confidence, 2),
+                "change_percentage": round(change_percentage, 2),
+                "updated_at": updated_at
+            })
+        return rows
+
+def _write_trends(rows, output_file):
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    temp_file = output_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=STREAM_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(temp_file, output_file)
+
+def _save_checkpoint(aggregator, position, checkpoint_file):
+    os.makedirs(os.path.dirname(checkpoint_file) or ".", exist_ok=True)
+    temp_file = checkpoint_file + ".tmp"
+    with open(temp_file, "wb") as f:
+        pickle.dump({"aggregates": aggregator.checkpoint_state(), "position": position}, f)
+    os.replace(temp_file, checkpoint_file)
+
+def load_checkpoint(checkpoint_file=CHECKPOINT_FILE):
+    """Return (aggregator, queue position) from the last committed micro-batch, or a fresh start."""
+    if not os.path.exists(checkpoint_file):
+        return StreamAggregator(), None
+    with open(checkpoint_file, "rb") as f:
+        checkpoint = pickle.load(f)
+    return StreamAggregator.from_checkpoint(checkpoint["aggregates"]), checkpoint["position"]
+
+def run_stream(stream_queue, batch_size=500, max_wait=2.0, idle_exit=None, output_file=STREAM_TRENDS_FILE, checkpoint_file=CHECKPOINT_FILE,
+               alert_sink=None, z_threshold=None):
+    """Consume raw entries in micro-batches, folding each into the running per-product trends.
+
+    After every batch the trend file is rewritten, mention and sentiment
+    spikes found in the batch go to ``alert_sink`` (data/stream/alerts.jsonl
+    by default), and the aggregates are checkpointed together with the
+    position after the batch before the batch is committed. A restart resumes after the last checkpointed batch; records
+    a broker redelivers are dropped by their id (the last SEEN_ID_WINDOW ids are kept).
+    Stops after ``idle_exit`` seconds without records (runs forever if None).
+    Returns the final trend rows.
+    """
+    aggregator, position = load_checkpoint(checkpoint_file)
+    if z_threshold is not None:
+        aggregator.spikes.z_threshold = z_threshold
+    alert_sink = alert_sink or AlertSink()
+    stream_queue.seek(position)
+    sales_data, ledger_revenue = load_sales_data()
+    rows = aggregator.trend_rows(sales_data, ledger_revenue)
+    idle_since = time.monotonic()
+    print(f"Streaming from {type(stream_queue).__name__} in micro-batches of up to {batch_size} records")
+
+    try:
+        while True:
+            records = stream_queue.poll(batch_size, max_wait)
+            if not records:
+                if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                    break
+                continue
+            idle_since = time.monotonic()
+
+            started = time.perf_counter()
+            accepted = aggregator.add_batch(records)
+            rows = aggregator.trend_rows(sales_data, ledger_revenue)
+            _write_trends(rows, output_file)
+            alert_sink.send(aggregator.take_alerts())
+            _save_checkpoint(aggregator, stream_queue.position(), checkpoint_file)
+            stream_queue.commit()
+            elapsed = time.perf_counter() - started
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Folded {accepted}/{len(records)} records in {elapsed:.2f}s "
+                  f"({aggregator.records_in} seen, {len(rows)} products, {aggregator.spikes.late_entries()} posts too late for spike detection)")
+    except KeyboardInterrupt:
+        print("\nStopping stream")
+    return rows
+
+def publish_file(stream_queue, input_file, batch_size=1000):
+    """Replay a raw snapshot (JSON array or JSON Lines) onto the queue; returns the number of records published."""
+    published = 0
+    batch = []
+    for entry in RecordReader(input_file):
+        batch.append(entry)
+        if len(batch) == batch_size:
+            stream_queue.publish(batch)
+            published += len(batch)
+            batch = []
+    if batch:
+        stream_queue.publish(batch)
+        published += len(batch)
+    print(f"Published {published} records from {input_file}")
+    return published
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream raw entries into continuously updated trends.")
+    parser.add_argument("--backend", default="file", choices=sorted(QUEUE_BACKENDS), help="queue backend (default: file)")
+    parser.add_argument("--topic", default="forecaster-raw", help="Kafka topic")
+    parser.add_argument("--bootstrap-servers", default="localhost:9092", help="Kafka brokers")
+    parser.add_argument("--publish", metavar="RAW_FILE", help="publish a raw snapshot onto the queue and exit")
+    parser.add_argument("--batch-size", type=int, default=500, help="records per micro-batch")
+    parser.add_argument("--max-wait", type=float, default=2.0, help="seconds to wait for a micro-batch to fill")
+    parser.add_argument("--idle-exit", type=float, default=None, help="stop after this many idle seconds")
+    parser.add_argument("--alerts-file", default=ALERTS_FILE, help=f"append spike alerts to this JSON Lines file (default: {ALERTS_FILE})")
+    parser.add_argument("--alert-hook", metavar="URL", help="also POST each alert as JSON to this URL")
+    parser.add_argument("--z-threshold", type=float, default=None, help=f"deviations from the daily baseline that count as a spike (default: {Z_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    options = {"topic": args.topic, "bootstrap_servers": args.bootstrap_servers} if args.backend == "kafka" else {}
+    stream_queue = open_queue(args.backend, **options)
+    if args.publish:
+        publish_file(stream_queue, args.publish)
+        return 0
+    run_stream(
+        stream_queue, args.batch_size, args.max_wait, args.idle_exit,
+        alert_sink=AlertSink(args.alerts_file, args.alert_hook), z_threshold=args.z_threshold
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import os
+import re
+import csv
+import json
+from src.utils.product_registry import REGISTRY_FILE, TENANTS_FILE, load_registry
+from src.data.artifact_catalog import latest_artifact, find_artifact, register_artifact
+from src.utils.instrumentation import instrumented, record_counts
+from src.reporting.prepare_powerbi import load_latest_predictions, format_powerbi_rows, write_powerbi_rows, export_run_partition
+from src.data.confidence import MIN_CONFIDENCE
+from src.reporting.trend_cube import CUBE_DIR, read_cube_rows, save_cube_rows
+
+TENANT_DIR = "data/tenants"
+TENANT_ID_PATTERN = re.compile(r"[\w-]+")
+
+def load_tenants(tenants_file=TENANTS_FILE):
+    """Tenants from the tenants file as [{"id", "products", "min_confidence"}], product names resolved through the registry.
+
+    Products missing from the registry and tenants whose id cannot name a
+    folder are left out with a warning. Returns [] without a tenants file.
+    """
+    if not os.path.exists(tenants_file):
+        return []
+    with open(tenants_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    registry = load_registry()
+    tenants = []
+    for tenant in config.get("tenants", []):
+        tenant_id = str(tenant.get("id", ""))
+        if not TENANT_ID_PATTERN.fullmatch(tenant_id):
+            print(f"Warning: Skipping tenant {tenant_id!r}: ids may only use letters, digits, _ and -")
+            continue
+        products = []
+        for name in tenant.get("products", []):
+            product = registry.canonical_name(name)
+            if product is None:
+                print(f"Warning: Tenant {tenant_id} lists {name!r}, which is not in {REGISTRY_FILE}")
+            elif product not in products:
+                products.append(product)
+        tenants.append({"id": tenant_id, "products": products, "min_confidence": tenant.get("min_confidence")})
+    return tenants
+
+def tenant_products(tenants):
+    """Every product some tenant follows, each once, in first-listed order."""
+    return list(dict.fromkeys(product for tenant in tenants for product in tenant["products"]))
+
+def _read_trends(input_file="data/processed/processed_trends.csv"):
+    """processed_trends.csv rows per product, with the file's columns."""
+    if not os.path.exists(input_file):
+        return [], {}
+    with open(input_file, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, {row["product"]: row for row in reader}
+
+@instrumented("tenants")
+def run_tenants(min_confidence_threshold=MIN_CONFIDENCE, file_format="csv", fetch=False, forecast=False, plan_searches=True, tenants_file=TENANTS_FILE):
+    """Fan the shared results out to every tenant in the tenants file; returns {tenant id: Power BI row count}.
+
+    All tenants share one crawl and one cleaned, scored corpus: ``fetch``
+    searches the union of their products once and ``forecast`` runs clean,
+    process and predict once over it. Every score is computed per product,
+    so a tenant's trends, trend cube, predictions and Power BI files are
+    filtered copies of the shared ones, written to data/tenants/<id>/.
+    """
+    # Step 1: Load the tenants and the union of their products
+    tenants = load_tenants(tenants_file)
+    if not tenants:
+        print(f"Error: No tenants found in {tenants_file}")
+        return
+    products = tenant_products(tenants)
+    print(f"{len(tenants)} tenants follow {len(products)} distinct products")
+
+    # Step 2: Crawl and score the union once
+    if fetch:
+        from src.data.fetch_data import fetch_data
+        fetch_data(plan_searches=plan_searches, products=products)
+    if forecast:
+        from src.pipeline.api import run_forecast
+        results = run_forecast(analyze=False, min_confidence_threshold=min_confidence_threshold)
+        if "predictions" not in results:
+            print("Error: The shared forecast failed; tenant files were not updated")
+            return
+
+    # Step 3: Read the shared results once, indexed by product
+    try:
+        run_ts, predictions = load_latest_predictions()
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return
+    predictions_by_product = {prediction["product"]: prediction for prediction in predictions}
+    trend_columns, trends = _read_trends()
+    cube_cells = read_cube_rows() if os.path.exists(os.path.join(CUBE_DIR, "keywords.csv")) else None
+    run_artifact = find_artifact("predictions", run_ts)
+    parent_ids = [run_artifact["id"]] if run_artifact is not None else []
+    trends_artifact = latest_artifact("processed_trends")
+    missing = [product for product in products if product not in predictions_by_product]
+    if missing:
+        print(f"Warning: Run {run_ts} has no predictions for {', '.join(missing)}")
+
+    # Step 4: Project them onto each tenant's products
+    row_counts = {}
+    for tenant in tenants:
+        output_dir = os.path.join(TENANT_DIR, tenant["id"])
+        os.makedirs(output_dir, exist_ok=True)
+        tenant_predictions = [predictions_by_product[product] for product in tenant["products"] if product in predictions_by_product]
+        min_confidence = tenant["min_confidence"] if tenant["min_confidence"] is not None else min_confidence_threshold
+        rows = format_powerbi_rows(tenant_predictions, min_confidence)
+
+        output_file = os.path.join(output_dir, "powerbi_trends_latest.csv")
+        write_powerbi_rows(rows, output_file)
+        register_artifact("tenant_powerbi", output_file, parent_ids, row_count=len(rows), stage="tenants", label=tenant["id"])
+        export_run_partition(rows, run_ts, file_format, os.path.join(output_dir, "history"), parent_ids, kind="tenant_powerbi_history")
+
+        if trends:
+            trends_file = os.path.join(output_dir, "processed_trends.csv")
+            tenant_trends = [trends[product] for product in tenant["products"] if product in trends]
+            with open(trends_file, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=trend_columns)
+                writer.writeheader()
+                writer.writerows(tenant_trends)
+            register_artifact(
+                "tenant_trends", trends_file, [trends_artifact["id"]] if trends_artifact else [],
+                row_count=len(tenant_trends), stage="tenants", label=tenant["id"]
+            )
+        if cube_cells is not None:
+            save_cube_rows(cube_cells, tenant["products"], os.path.join(output_dir, "cube"))
+
+        row_counts[tenant["id"]] = len(rows)
+        print(f"Tenant {tenant['id']}: {len(rows)} of {len(tenant['products'])} products in {output_file}")
+
+    record_counts(records_in=len(predictions), records_out=sum(row_counts.values()))
+    print(f"Fanned run {run_ts} out to {len(tenants)} tenants in {TENANT_DIR}")
+    return row_counts
@@ -1,73 +1,176 @@
 import os
 import csv
-from datetime import datetime
-import pandas as pd
-
-def find_latest_predictions(predictions_dir="data/predictions"):
-    """Find the latest trend_predictions CSV file in the predictions directory."""
-    csv_files = [f for f in os.listdir(predictions_dir) if f.endswith(".csv") and f.startswith("trend_predictions_")]
-    if not csv_files:
-        raise FileNotFoundError("No trend prediction CSV files found in data/predictions/")
-    
-    # Sort files by timestamp (latest first)
-    csv_files.sort(reverse=True)
-    latest_file = os.path.join(predictions_dir, csv_files[0])
-    return latest_file
-
-def prepare_powerbi_data(min_confidence_threshold=60):
-    """Prepare trend prediction data for Power BI visualization."""
-    # Step 1: Find the latest prediction CSV file
-    try:
-        input_file = find_latest_predictions()
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
-        return
-
-    # Step 2: Load the data using pandas
-    try:
-        df = pd.read_csv(input_file)
-    except Exception as e:
-        print(f"Error reading {input_file}: {e}")
-        return
+from src.data.prediction_store import latest_predictions, import_prediction_files, run_timestamps, load_run, run_time, DB_FILE
+from src.data.artifact_catalog import find_artifact, register_artifact
+from src.data.confidence import MIN_CONFIDENCE
+from src.utils.instrumentation import instrumented, record_counts
+
+POWERBI_COLUMNS = {
+    "product": "Product",
+    "current_score": "CurrentScore",
+    "predicted_score": "PredictedScore",
+    "trend_direction": "Trend",
+    "change_percentage": "ChangePercentage",
+    "confidence": "Confidence",
+    "avg_cost": "AverageCost",
+    "approx_income": "EstimatedMonthlyIncome",
+    "current_score_low": "CurrentScoreLow",
+    "current_score_high": "CurrentScoreHigh",
+    "predicted_score_low": "PredictedScoreLow",
+    "predicted_score_high": "PredictedScoreHigh"
+}
+
+# Run history for Power BI incremental refresh: one file per run under a RunDate=YYYY-MM-DD folder
+HISTORY_DIR = "data/powerbi/history"
+RUN_COLUMNS = ["RunKey", "RunDate", "RunTimestamp"]
+HISTORY_COLUMNS = RUN_COLUMNS + list(POWERBI_COLUMNS.values()) + ["PotentialGrowth"]
+
+def load_latest_predictions(db_file=DB_FILE):
+    """Load the newest run from the prediction store, importing legacy CSV/JSON files on first use."""
+    run_ts, predictions = latest_predictions(db_file)
+    if run_ts is None and import_prediction_files(os.path.dirname(db_file), db_file):
+        run_ts, predictions = latest_predictions(db_file)
+    if run_ts is None:
+        raise FileNotFoundError(f"No prediction runs found in {db_file}")
+    return run_ts, predictions
+
+def format_powerbi_rows(predictions, min_confidence_threshold=MIN_CONFIDENCE):
+    """Turn stored predictions into Power BI rows: renamed, rounded, filtered by confidence, best first."""
+    # Step 2: Rename columns for clarity in Power BI (a dozen rows need no DataFrame)
+    rows = [
+        {powerbi_column: prediction.get(column) for column, powerbi_column in POWERBI_COLUMNS.items()}
+        for prediction in predictions
+    ]
 
     # Step 3: Apply transformations
-    # Rename columns for clarity in Power BI
-    df = df.rename(columns={
-        "product": "Product",
-        "current_score": "CurrentScore",
-        "predicted_score": "PredictedScore",
-        "trend_direction": "Trend",
-        "change_percentage": "ChangePercentage",
-        "confidence": "Confidence",
-        "avg_cost": "AverageCost",
-        "approx_income": "EstimatedMonthlyIncome"
-    })
-
-    # Round numerical columns for readability
-    df["CurrentScore"] = df["CurrentScore"].round(2)
-    df["PredictedScore"] = df["PredictedScore"].round(2)
-    df["ChangePercentage"] = df["ChangePercentage"].round(2)
-    df["Confidence"] = df["Confidence"].round(0).astype(int)
-    df["AverageCost"] = df["AverageCost"].round(2)
-    df["EstimatedMonthlyIncome"] = df["EstimatedMonthlyIncome"].round(2)
+    for row in rows:
+        # Round numerical columns for readability
+        for column in ["CurrentScore", "PredictedScore", "ChangePercentage", "AverageCost", "EstimatedMonthlyIncome"]:
+            row[column] = round(float(row[column]), 2)
+        row["Confidence"] = int(round(float(row["Confidence"])))
+        # Runs imported from older prediction files have no bootstrap intervals
+        for column in ["CurrentScoreLow", "CurrentScoreHigh", "PredictedScoreLow", "PredictedScoreHigh"]:
+            row[column] = round(float(row[column]), 2) if row[column] not in (None, "") else None
 
     # Filter by minimum confidence threshold
-    df = df[df["Confidence"] >= min_confidence_threshold]
+    rows = [row for row in rows if row["Confidence"] >= min_confidence_threshold]
 
     # Add a calculated column for Potential Growth (based on PredictedScore and ChangePercentage)
-    df["PotentialGrowth"] = (df["PredictedScore"] * df["ChangePercentage"] / 100).round(2)
+    for row in rows:
+        row["PotentialGrowth"] = round(row["PredictedScore"] * row["ChangePercentage"] / 100, 2)
 
     # Sort by PredictedScore (descending)
-    df = df.sort_values(by="PredictedScore", ascending=False)
+    rows.sort(key=lambda row: row["PredictedScore"], reverse=True)
+    return rows
+
+def write_powerbi_rows(rows, output_file):
+    with open(output_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(POWERBI_COLUMNS.values()) + ["PotentialGrowth"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+def partition_file(run_ts, file_format="csv", history_dir=HISTORY_DIR):
+    """Path of one run's history file, in the folder of the date the run was made."""
+    return os.path.join(history_dir, f"RunDate={run_time(run_ts):%Y-%m-%d}", f"powerbi_trends_{run_ts}.{file_format}")
+
+def _write_parquet(history_rows, path):
+    # pyarrow is only needed for the parquet format
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    text, number = pa.string(), pa.float64()
+    schema = pa.schema([
+        ("RunKey", text), ("RunDate", pa.date32()), ("RunTimestamp", pa.timestamp("s")),
+        ("Product", text), ("CurrentScore", number), ("PredictedScore", number), ("Trend", text),
+        ("ChangePercentage", number), ("Confidence", pa.int64()), ("AverageCost", number),
+        ("EstimatedMonthlyIncome", number), ("CurrentScoreLow", number), ("CurrentScoreHigh", number),
+        ("PredictedScoreLow", number), ("PredictedScoreHigh", number), ("PotentialGrowth", number)
+    ])
+    table = pa.Table.from_pylist(history_rows, schema=schema)
+    pq.write_table(table, path)
+
+def export_run_partition(rows, run_ts, file_format="csv", history_dir=HISTORY_DIR, parent_ids=None, kind="powerbi_history"):
+    """Add one run's Power BI rows to the history; returns the file path, or None if the run is already there.
+
+    Files are never rewritten, so Power BI only has to load new ones. The
+    RunKey, RunDate and RunTimestamp columns lead every file in the same order.
+    """
+    output_file = partition_file(run_ts, file_format, history_dir)
+    if os.path.exists(output_file):
+        return None
+    # RunKey tells apart runs made in the same second; RunTimestamp is shown to the second
+    made_at = run_time(run_ts).replace(microsecond=0)
+    history_rows = [
+        dict({"RunKey": run_ts, "RunDate": made_at.date(), "RunTimestamp": made_at}, **row)
+        for row in rows
+    ]
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    temp_file = output_file + ".tmp"
+    if file_format == "parquet":
+        _write_parquet(history_rows, temp_file)
+    else:
+        with open(temp_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=HISTORY_COLUMNS)
+            writer.writeheader()
+            for row in history_rows:
+                writer.writerow(dict(row, RunDate=f"{made_at:%Y-%m-%d}", RunTimestamp=f"{made_at:%Y-%m-%d %H:%M:%S}"))
+    os.replace(temp_file, output_file)
+    register_artifact(kind, output_file, parent_ids or [], row_count=len(rows), stage="powerbi", label=run_ts)
+    return output_file
+
+@instrumented("powerbi")
+def prepare_powerbi_data(min_confidence_threshold=MIN_CONFIDENCE, predictions=None, save=True, parent_ids=None, run_ts=None, file_format="csv"):
+    """Prepare trend prediction data for Power BI visualization and return its rows.
+
+    Besides the latest-run file, a saved run is added to the partitioned
+    history (csv or parquet) when its run timestamp is known.
+    """
+    # Step 1: Find the latest prediction run, unless predictions were passed in
+    if predictions is None:
+        try:
+            run_ts, predictions = load_latest_predictions()
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return
+        run_artifact = find_artifact("predictions", run_ts)
+        parent_ids = [run_artifact["id"]] if run_artifact is not None else []
+    elif run_ts is None:
+        run_ts = "in-memory"
+
+    # Steps 2-3: Rename, round, filter and sort the rows
+    rows = format_powerbi_rows(predictions, min_confidence_threshold)
+    record_counts(records_in=len(predictions), records_out=len(rows))
 
     # Step 4: Save the formatted data for Power BI
-    output_dir = "data/powerbi"
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, f"powerbi_trends_latest.csv")
+    if save:
+        output_dir = "data/powerbi"
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, f"powerbi_trends_latest.csv")
+
+        write_powerbi_rows(rows, output_file)
+        register_artifact("powerbi", output_file, parent_ids or [], row_count=len(rows), stage="powerbi")
+        print(f"Prepared data for Power BI from run {run_ts} and saved to {output_file}")
+
+        if run_ts != "in-memory":
+            history_file = export_run_partition(rows, run_ts, file_format, parent_ids=parent_ids)
+            if history_file:
+                print(f"Added run {run_ts} to the Power BI history in {history_file}")
+
+    return rows
 
-    df.to_csv(output_file, index=False)
-    print(f"Prepared data for Power BI and saved to {output_file}")
+def backfill_powerbi_history(min_confidence_threshold=MIN_CONFIDENCE, file_format="csv", db_file=DB_FILE):
+    """Add every stored run missing from the Power BI history; returns the number of runs added."""
+    added = 0
+    for run_ts in run_timestamps(db_file):
+        if os.path.exists(partition_file(run_ts, file_format)):
+            continue
+        rows = format_powerbi_rows(load_run(run_ts, db_file), min_confidence_threshold)
+        run_artifact = find_artifact("predictions", run_ts)
+        export_run_partition(rows, run_ts, file_format, parent_ids=[run_artifact["id"]] if run_artifact else [])
+        added += 1
+    print(f"Added {added} runs to the Power BI history in {HISTORY_DIR}")
+    return added
 
 if __name__ == "__main__":
-    # Set a minimum confidence threshold (e.g., 60%) to filter out low-confidence predictions
-    prepare_powerbi_data(min_confidence_threshold=60)
\ No newline at end of file
+    # Drop predictions whose trend direction most bootstrap resamples disagree with
+    prepare_powerbi_data(min_confidence_threshold=MIN_CONFIDENCE)
\ No newline at end of file
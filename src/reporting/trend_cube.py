@@ -0,0 +1,168 @@
+import os
+import csv
+import bisect
+import shutil
+import numpy as np
+from src.data.artifact_catalog import register_artifact
+from src.data.trend_aggregation import top_per_group
+
+CUBE_DIR = "data/powerbi/cube"
+GRAINS = ("day", "week", "month")
+CUBE_COLUMNS = ["product", "period", "type", "mentions", "sentiment_sum", "sentiment_count", "top_keyword_ids"]
+MISSING_KEYWORD = "N/A"  # extract_keywords pads short keyword lists with it
+
+def cube_file(grain, output_dir=CUBE_DIR):
+    return os.path.join(output_dir, f"trend_cube_{grain}.csv")
+
+def period_starts(dates, grain):
+    """First day of the day, week (starting Monday) or month each datetime64[D] date falls in; NaT stays NaT."""
+    if grain == "day":
+        return dates
+    if grain == "week":
+        # Day 0, 1970-01-01, was a Thursday
+        return dates - ((dates.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    return dates.astype("datetime64[M]").astype("datetime64[D]")
+
+def build_cube(aggregator, grain, n_keywords=5):
+    """Roll a TrendAggregator's scored entries up into product x period x post/comment cells.
+
+    Each cell holds its mention count, sentiment sum and count (so averages
+    of any set of cells can be combined exactly) and its most frequent
+    keyword ids. Entries without a date land in cells with an empty period.
+    """
+    codes = aggregator.entry_products.values().astype(np.int64)
+    periods, period_codes = np.unique(period_starts(aggregator.entry_dates.values(), grain), return_inverse=True)
+    cell_keys, entry_cells = np.unique((codes * len(periods) + period_codes) * 2 + aggregator.entry_is_post.values(), return_inverse=True)
+    n_cells = len(cell_keys)
+
+    sentiment = aggregator.entry_sentiment.values()
+    scored = ~np.isnan(sentiment)
+    mentions = np.bincount(entry_cells, minlength=n_cells)
+    sentiment_sum = np.bincount(entry_cells, weights=np.where(scored, sentiment, 0.0), minlength=n_cells)
+    sentiment_count = np.bincount(entry_cells, weights=scored, minlength=n_cells).astype(np.int64)
+
+    # Keyword events follow the entries in order, entry_keyword_count of them per entry
+    keyword_cells = np.repeat(entry_cells, aggregator.entry_keyword_count.values())
+    keyword_ids = aggregator.keyword_ids.values()
+    missing = aggregator.keyword_codes.get(MISSING_KEYWORD)
+    if missing is not None:
+        keep = keyword_ids != missing
+        keyword_cells, keyword_ids = keyword_cells[keep], keyword_ids[keep]
+    top = top_per_group(keyword_cells, keyword_ids, n_cells, len(aggregator.vocabulary), n_keywords)
+
+    rows = []
+    for i, key in enumerate(cell_keys.tolist()):
+        period = periods[key // 2 % len(periods)]
+        rows.append({
+            "product": aggregator.products[key // 2 // len(periods)],
+            "period": "" if np.isnat(period) else str(period),
+            "type": "post" if key % 2 else "comment",
+            "mentions": int(mentions[i]),
+            "sentiment_sum": round(float(sentiment_sum[i]), 6),
+            "sentiment_count": int(sentiment_count[i]),
+            "top_keyword_ids": " ".join(str(keyword_id) for keyword_id in top[i])
+        })
+    rows.sort(key=lambda row: (row["product"], row["period"], row["type"]))
+    return rows
+
+def _write_csv(output_file, columns, rows):
+    temp_file = output_file + ".tmp"
+    with open(temp_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(temp_file, output_file)
+
+def save_trend_cube(aggregator, parent_ids=None, output_dir=CUBE_DIR):
+    """Write the day, week and month cubes plus the keyword id table; returns {grain: row count}."""
+    os.makedirs(output_dir, exist_ok=True)
+    _write_csv(
+        os.path.join(output_dir, "keywords.csv"), ["keyword_id", "keyword"],
+        [{"keyword_id": code, "keyword": keyword} for code, keyword in enumerate(aggregator.vocabulary)]
+    )
+    counts = {}
+    for grain in GRAINS:
+        rows = build_cube(aggregator, grain)
+        _write_csv(cube_file(grain, output_dir), CUBE_COLUMNS, rows)
+        register_artifact(f"trend_cube_{grain}", cube_file(grain, output_dir), parent_ids or [], row_count=len(rows), stage="process")
+        counts[grain] = len(rows)
+    return counts
+
+def read_cube_rows(directory=CUBE_DIR):
+    """The saved cube's rows as written, as {grain: {product: rows}}."""
+    cells = {grain: {} for grain in GRAINS}
+    for grain in GRAINS:
+        if not os.path.exists(cube_file(grain, directory)):
+            continue
+        with open(cube_file(grain, directory), "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                cells[grain].setdefault(row["product"], []).append(row)
+    return cells
+
+def save_cube_rows(cells, products, output_dir, source_dir=CUBE_DIR):
+    """Write the cells of some products (from read_cube_rows) as a cube of their own; returns {grain: row count}.
+
+    Keyword ids stay valid because the keyword table is copied whole.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    shutil.copyfile(os.path.join(source_dir, "keywords.csv"), os.path.join(output_dir, "keywords.csv"))
+    counts = {}
+    for grain in GRAINS:
+        rows = [row for product in sorted(products) for row in cells[grain].get(product, [])]
+        _write_csv(cube_file(grain, output_dir), CUBE_COLUMNS, rows)
+        counts[grain] = len(rows)
+    return counts
+
+class TrendCube:
+    """A saved cube indexed for lookups: each product's cells per grain, in period order.
+
+    ``slice`` answers a product and period range with two bisects over that
+    product's cells instead of a scan of the entries. A missing cube (or a
+    directory of None) loads empty.
+    """
+
+    def __init__(self, directory=CUBE_DIR):
+        self.directory = directory
+        self.vocabulary = []
+        self.cells = {grain: {} for grain in GRAINS}
+        self._periods = {grain: {} for grain in GRAINS}
+        if directory is None or not os.path.exists(os.path.join(directory, "keywords.csv")):
+            return
+        with open(os.path.join(directory, "keywords.csv"), "r", encoding="utf-8") as f:
+            self.vocabulary = [row["keyword"] for row in csv.DictReader(f)]
+
+        for grain in GRAINS:
+            if not os.path.exists(cube_file(grain, directory)):
+                continue
+            with open(cube_file(grain, directory), "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    row["mentions"] = int(row["mentions"])
+                    row["sentiment_sum"] = float(row["sentiment_sum"])
+                    row["sentiment_count"] = int(row["sentiment_count"])
+                    row["top_keywords"] = [self.vocabulary[int(code)] for code in row.pop("top_keyword_ids").split()]
+                    self.cells[grain].setdefault(row["product"], []).append(row)
+            # Rows are saved sorted by product and period
+            self._periods[grain] = {product: [row["period"] for row in rows] for product, rows in self.cells[grain].items()}
+
+    def products(self):
+        return sorted(self.cells["day"])
+
+    def slice(self, grain, product, start=None, end=None, entry_type=None):
+        """Cells of one product with start <= period <= end (YYYY-MM-DD, either open), optionally of one type."""
+        rows = self.cells[grain].get(product, [])
+        periods = self._periods[grain].get(product, [])
+        low = bisect.bisect_left(periods, start) if start else 0
+        high = bisect.bisect_right(periods, end) if end else len(periods)
+        return [row for row in rows[low:high] if entry_type is None or row["type"] == entry_type]
+
+def cube_totals(rows):
+    """Mentions and sentiment over a set of cells."""
+    mentions = sum(row["mentions"] for row in rows)
+    sentiment_sum = sum(row["sentiment_sum"] for row in rows)
+    sentiment_count = sum(row["sentiment_count"] for row in rows)
+    return {
+        "mentions": mentions,
+        "sentiment_sum": round(sentiment_sum, 6),
+        "sentiment_count": sentiment_count,
+        "avg_sentiment": round(sentiment_sum / sentiment_count, 6) if sentiment_count else None
+    }
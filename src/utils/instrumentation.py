@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+REPORT_DIR = "data/reports"
+PROMETHEUS_FILE = os.path.join(REPORT_DIR, "forecaster.prom")
+# Comma-separated stage names (or "all") to capture with cProfile / tracemalloc
+PROFILE_ENV = "FORECASTER_PROFILE"
+TRACEMALLOC_ENV = "FORECASTER_TRACEMALLOC"
+
+# Each thread keeps its own stack of running stages and its own collect_stages() list, so
+# stages run by the daemon's or the service's threads don't nest into each other's metrics
+_state = threading.local()
+
+def _active():
+    if not hasattr(_state, "active"):
+        _state.active = []
+    return _state.active
+
+def _collected():
+    return getattr(_state, "collected", None)
+
+def _enabled(env, stage):
+    stages = {name.strip() for name in os.getenv(env, "").split(",") if name.strip()}
+    return "all" in stages or stage in stages
+
+def peak_rss_mb():
+    """High-water resident set size of this process in MB, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+def current_metrics():
+    """Metrics dict of the innermost running stage (a scratch dict outside any stage)."""
+    active = _active()
+    return active[-1] if active else {"records_in": None, "records_out": None, "caches": {}}
+
+def record_counts(records_in=None, records_out=None):
+    metrics = current_metrics()
+    if records_in is not None:
+        metrics["records_in"] = records_in
+    if records_out is not None:
+        metrics["records_out"] = records_out
+
+def record_cache(cache, hit):
+    """Count one lookup in a named cache for the running stage."""
+    counts = current_metrics()["caches"].setdefault(cache, {"hits": 0, "misses": 0})
+    counts["hits" if hit else "misses"] += 1
+
+def _finish(metrics, wall_start, cpu_start):
+    metrics["wall_seconds"] = round(time.perf_counter() - wall_start, 4)
+    metrics["cpu_seconds"] = round(time.process_time() - cpu_start, 4)
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    records = metrics["records_in"] if metrics["records_in"] is not None else metrics["records_out"]
+    metrics["records_per_second"] = round(records / metrics["wall_seconds"], 2) if records and metrics["wall_seconds"] > 0 else None
+    for counts in metrics["caches"].values():
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else None
+
+@contextmanager
+def instrument(stage):
+    """Measure a stage: wall and CPU time, peak RSS, record counts, throughput and cache hit rates.
+
+    Metrics go to the surrounding collect_stages() block, to the enclosing
+    stage's substages when nested in another stage, or straight to a
+    one-stage run report when the stage runs on its own.
+    """
+    metrics = {
+        "stage": stage,
+        "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "status": "ok",
+        "records_in": None,
+        "records_out": None,
+        "caches": {}
+    }
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    profiler = cProfile.Profile() if _enabled(PROFILE_ENV, stage) else None
+    tracing = _enabled(TRACEMALLOC_ENV, stage) and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    active = _active()
+    active.append(metrics)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield metrics
+    except BaseException:
+        metrics["status"] = "error"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _finish(metrics, wall_start, cpu_start)
+        active.pop()
+        if tracing:
+            metrics["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            tracemalloc.stop()
+        if profiler is not None:
+            os.makedirs(REPORT_DIR, exist_ok=True)
+            metrics["profile_file"] = os.path.join(REPORT_DIR, f"profile_{stage}_{timestamp}.prof")
+            profiler.dump_stats(metrics["profile_file"])
+
+        # A stage nested in one started inside the same collect_stages() block belongs to
+        # its parent, so only the block's outermost stages are collected and wall time
+        # isn't counted twice
+        collected = _collected()
+        if collected is not None and len(active) == _state.collect_depth:
+            collected.append(metrics)
+        elif active:
+            active[-1].setdefault("substages", []).append(metrics)
+        else:
+            report_file = write_run_report([metrics], run_name=stage)
+            print_stage_summary([metrics])
+            print(f"Saved run report to {report_file}")
+
+def instrumented(stage):
+    """Decorator form of instrument() for a stage's entry function."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with instrument(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def collect_stages():
+    """Gather the metrics of the outermost stages run inside the block into the yielded list.
+
+    Stages they run in turn are kept in their substages. Stages already running
+    when the block opens (such as the parent's stage in a forked worker) are
+    left alone.
+    """
+    previous = _collected()
+    previous_depth = getattr(_state, "collect_depth", 0)
+    stages = _state.collected = []
+    _state.collect_depth = len(_active())
+    try:
+        yield stages
+    finally:
+        _state.collected = previous
+        _state.collect_depth = previous_depth
+        if previous is not None:
+            previous.extend(stages)
+
+def flatten_stages(stages):
+    """Stages followed by the stages nested inside them, depth first."""
+    flat = []
+    for metrics in stages:
+        flat.append(metrics)
+        flat.extend(flatten_stages(metrics.get("substages", [])))
+    return flat
+
+def _prometheus_lines(run_name, stages):
+    gauges = [
+        ("wall_seconds", "Wall-clock time of the stage"),
+        ("cpu_seconds", "CPU time of the stage"),
+        ("peak_rss_mb", "Peak resident set size of the process running the stage"),
+        ("records_in", "Records read by the stage"),
+        ("records_out", "Records written by the stage"),
+        ("records_per_second", "Stage throughput")
+    ]
+    lines = []
+    for key, help_text in gauges:
+        lines.append(f"# HELP forecaster_stage_{key} {help_text}")
+        lines.append(f"# TYPE forecaster_stage_{key} gauge")
+        for metrics in stages:
+            if metrics.get(key) is not None:
+                lines.append(f'forecaster_stage_{key}{{run="{run_name}",stage="{metrics["stage"]}"}} {metrics[key]}')
+
+    lines.append("# HELP forecaster_stage_cache_hit_rate Share of cache lookups that hit")
+    lines.append("# TYPE forecaster_stage_cache_hit_rate gauge")
+    for metrics in stages:
+        for cache, counts in metrics["caches"].items():
+            if counts.get("hit_rate") is not None:
+                lines.append(f'forecaster_stage_cache_hit_rate{{run="{run_name}",stage="{metrics["stage"]}",cache="{cache}"}} {counts["hit_rate"]}')
+
+    lines.append("# HELP forecaster_stage_success Whether the stage finished without an exception")
+    lines.append("# TYPE forecaster_stage_success gauge")
+    for metrics in stages:
+        lines.append(f'forecaster_stage_success{{run="{run_name}",stage="{metrics["stage"]}"}} {1 if metrics["status"] == "ok" else 0}')
+    return lines
+
+def write_run_report(stages, run_name="run", report_dir=REPORT_DIR, prometheus_file=PROMETHEUS_FILE):
+    """Write a JSON run report and refresh the Prometheus text-format metrics file; returns the report path."""
+    os.makedirs(report_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report = {
+        "run": run_name,
+        "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total_wall_seconds": round(sum(metrics.get("wall_seconds") or 0 for metrics in stages), 4),
+        "stages": stages
+    }
+    report_file = os.path.join(report_dir, f"run_report_{run_name}_{timestamp}.json")
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    # Write then rename so a scraping textfile collector never sees a partial file
+    os.makedirs(os.path.dirname(prometheus_file) or ".", exist_ok=True)
+    temp_file = f"{prometheus_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(_prometheus_lines(run_name, flatten_stages(stages))) + "\n")
+    os.replace(temp_file, prometheus_file)
+    return report_file
+
+def print_stage_summary(stages):
+    print(f"\n{'Stage':<24} {'Wall s':>8} {'CPU s':>8} {'RSS MB':>8} {'In':>9} {'Out':>9} {'Rec/s':>10}")
+    print("-" * 80)
+    for metrics in flatten_stages(stages):
+        values = [metrics.get(key) for key in ("wall_seconds", "cpu_seconds", "peak_rss_mb", "records_in", "records_out", "records_per_second")]
+        print(f"{metrics['stage']:<24} " + " ".join(f"{'-' if value is None else value:>{width}}" for value, width in zip(values, (8, 8, 8, 9, 9, 10))))
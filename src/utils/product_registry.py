@@ -0,0 +1,168 @@
+import os
+import re
+import json
+from collections import deque
+from functools import lru_cache
+
+REGISTRY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config", "products.json")
+# Which tenants follow which registered products (read by src.pipeline.tenants)
+TENANTS_FILE = os.path.join(os.path.dirname(REGISTRY_FILE), "tenants.json")
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text):
+    """Lowercase word tokens, the unit every registry lookup works on."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def plural(word):
+    if word.endswith("s"):
+        return word
+    return word[:-1] + "ies" if word.endswith("y") else word + "s"
+
+def word_forms(word, pluralize=True):
+    """Generic morphology shared by every product: plurals and hand- prefixes."""
+    forms = {word}
+    if pluralize:
+        forms.add(plural(word))
+    if word.startswith("hand") and len(word) > 4:
+        forms.add(word[4:])
+        forms.add("hand")
+    return forms
+
+class TokenAutomaton:
+    """Aho-Corasick automaton over word tokens.
+
+    Scanning a text costs one dictionary transition per token regardless of
+    how many phrases were added, so matching stays flat as products grow.
+    """
+
+    def __init__(self, phrases):
+        self.transitions = [{}]
+        self.failure = [0]
+        self.outputs = [set()]
+        for phrase in phrases:
+            state = 0
+            for token in tokenize(phrase):
+                next_state = self.transitions[state].get(token)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][token] = next_state
+                    self.transitions.append({})
+                    self.failure.append(0)
+                    self.outputs.append(set())
+                state = next_state
+            if state:
+                self.outputs[state].add(phrase)
+
+        # Breadth-first pass wires failure links and inherits their outputs
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self.transitions[state].items():
+                fallback = self.failure[state]
+                while fallback and token not in self.transitions[fallback]:
+                    fallback = self.failure[fallback]
+                self.failure[next_state] = self.transitions[fallback].get(token, 0)
+                self.outputs[next_state] |= self.outputs[self.failure[next_state]]
+                queue.append(next_state)
+        self.outputs = [frozenset(output) for output in self.outputs]
+
+    def scan(self, tokens):
+        """Return the set of phrases that occur in a token sequence."""
+        transitions, failure, outputs = self.transitions, self.failure, self.outputs
+        hits = set()
+        state = 0
+        for token in tokens:
+            while state and token not in transitions[state]:
+                state = failure[state]
+            state = transitions[state].get(token, 0)
+            if outputs[state]:
+                hits |= outputs[state]
+        return hits
+
+class ProductRegistry:
+    """Products, aliases, variants, queries and boost keywords from one registry file."""
+
+    def __init__(self, registry):
+        self.products = registry["products"]
+        self.names = [product["name"] for product in self.products]
+        self.descriptive_terms = frozenset(term.lower() for term in registry.get("descriptive_terms", []))
+        # Extra spellings of a name word (jewelry -> jewellery) that are still the product, not a keyword
+        self._word_forms = {word.lower(): [form.lower() for form in forms] for word, forms in registry.get("word_forms", {}).items()}
+
+        self._aliases = {}
+        self._match_terms = {}
+        self._product_words = {}
+        self._boost_keywords = {}
+        for product in self.products:
+            name = product["name"]
+            for alias in [name] + product.get("aliases", []):
+                self._aliases[" ".join(tokenize(alias))] = name
+
+            variants = [variant.lower() for variant in product.get("variants", [])]
+            match_terms = set(variants)
+            product_words = set()
+            for word in tokenize(name):
+                product_words |= word_forms(word)
+                product_words.update(self._word_forms.get(word, []))
+                match_terms |= {word, plural(word)}
+            match_terms |= {" ".join(tokenize(alias)) for alias in product.get("aliases", [])}
+            self._match_terms[name] = frozenset(match_terms)
+            self._product_words[name] = frozenset(product_words)
+            self._boost_keywords[name] = frozenset(keyword.lower() for keyword in product.get("boost_keywords", []))
+
+        # Broader category vocabulary counts as a product mention, but for no product in particular
+        category_terms = {" ".join(tokenize(term)) for term in registry.get("category_terms", [])}
+        self.product_terms = frozenset().union(category_terms, *self._match_terms.values())
+        # Single tokens are answered by set lookups; only phrases need the automaton
+        self._automaton = TokenAutomaton(term for term in self.product_terms | self.descriptive_terms if " " in term)
+
+    def canonical_name(self, product):
+        """Resolve a product name or alias to its registered name, or None."""
+        return self._aliases.get(" ".join(tokenize(product)))
+
+    def product_words(self, product):
+        """Words that name the product itself, excluded from its keywords."""
+        if product in self._product_words:
+            return self._product_words[product]
+        words = set()
+        for word in tokenize(product):
+            words |= word_forms(word)
+            words.update(self._word_forms.get(word, []))
+        return frozenset(words)
+
+    def boost_keywords(self, product):
+        return self._boost_keywords.get(product, frozenset())
+
+    def queries(self, data_tier=None):
+        """Return (query, product) search pairs, optionally for one data tier."""
+        return [
+            (query, product["name"])
+            for product in self.products
+            if data_tier is None or product.get("data_tier") == data_tier
+            for query in product.get("queries", [])
+        ]
+
+    def scan(self, text):
+        """Return the text's tokens plus every registered phrase found in it."""
+        tokens = tokenize(text)
+        return self._automaton.scan(tokens).union(tokens)
+
+    def mentions_product(self, hits, product):
+        """True if scan hits include a term of the product (its name tokens if unregistered)."""
+        terms = self._match_terms.get(product)
+        if terms is None:
+            terms = tokenize(product)
+        return not hits.isdisjoint(terms)
+
+    def mentions_any_product(self, hits):
+        return not hits.isdisjoint(self.product_terms)
+
+    def has_descriptive_term(self, hits):
+        return not hits.isdisjoint(self.descriptive_terms)
+
+@lru_cache(maxsize=None)
+def load_registry(registry_file=REGISTRY_FILE):
+    """Load and compile the product registry once per process."""
+    with open(registry_file, "r", encoding="utf-8") as f:
+        return ProductRegistry(json.load(f))
@@ -0,0 +1,166 @@
+import json
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = " \t\n\r"
+NUMBER_CHARACTERS = frozenset("0123456789+-.eE")
+
+def batches(records, size):
+    """Group a stream of records into lists of up to ``size``."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class RecordReader:
+    """Iterate the records of a JSON array, JSON Lines file, or an object wrapping an array.
+
+    Only one chunk of the file plus the record being decoded are held in
+    memory, so snapshots can grow well beyond RAM. For an object such as a
+    cleaned file ({"entries": [...], "overall_relevance": ..., ...}) the
+    records come from the first of ``records_keys`` present and every other
+    top-level value is collected in ``metadata``; values after the array are
+    filled in once iteration reaches them. After iterating, ``source`` names
+    where the records came from ("array", "lines", the key, or None if the
+    object held no records). Each iteration re-reads the file.
+    """
+
+    def __init__(self, path, records_keys=("entries",), chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.records_keys = (records_keys,) if isinstance(records_keys, str) else tuple(records_keys)
+        self.chunk_size = chunk_size
+        self.metadata = {}
+        self.source = None
+
+    def __iter__(self):
+        if self.path.endswith(".jsonl"):
+            return self._iter_lines()
+        return self._iter_json()
+
+    def _iter_lines(self):
+        self.source = "lines"
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _iter_json(self):
+        decoder = json.JSONDecoder()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self._file = f
+            self._buffer = ""
+            self._pos = 0
+            self._eof = False
+            self._decoder = decoder
+
+            first = self._peek()
+            if first == "[":
+                self._pos += 1
+                self.source = "array"
+                yield from self._iter_array()
+            elif first == "{":
+                self._pos += 1
+                yield from self._iter_object()
+            elif first is not None:
+                raise ValueError(f"{self.path} is not a JSON array or object")
+
+    def _fill(self):
+        """Read the next chunk, dropping what has already been consumed."""
+        chunk = self._file.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Return the next non-whitespace character without consuming it, or None at end of file."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, character):
+        if self._peek() != character:
+            raise ValueError(f"Expected '{character}' at offset {self._pos} of the current chunk in {self.path}")
+        self._pos += 1
+
+    def _decode(self):
+        """Decode the next JSON value, reading more chunks until it is complete."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number running up to the chunk boundary ("85." or "12") may continue in the next chunk
+            if not self._eof and NUMBER_CHARACTERS.issuperset(self._buffer[end:]) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _iter_array(self):
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._decode()
+            separator = self._peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Malformed JSON array in {self.path}")
+
+    def _iter_object(self):
+        self.metadata = {}
+        self.source = None
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._decode()
+            self._expect(":")
+            if self.source is None and key in self.records_keys and self._peek() == "[":
+                self._pos += 1
+                self.source = key
+                yield from self._iter_array()
+            else:
+                self.metadata[key] = self._decode()
+            separator = self._peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Malformed JSON object in {self.path}")
+
+class JsonArrayWriter:
+    """Write a JSON object whose records array is streamed, followed by the remaining fields.
+
+    The output reads back with json.load or RecordReader.
+    """
+
+    def __init__(self, f, records_key="entries"):
+        self.f = f
+        self.count = 0
+        f.write("{" + json.dumps(records_key) + ": [")
+
+    def write(self, record):
+        self.f.write(",\n" if self.count else "\n")
+        self.f.write(json.dumps(record))
+        self.count += 1
+
+    def close(self, **fields):
+        self.f.write("\n]")
+        for key, value in fields.items():
+            self.f.write(f", {json.dumps(key)}: {json.dumps(value)}")
+        self.f.write("}")
@@ -0,0 +1,200 @@
+import os
+import re
+import json
+import zlib
+from functools import lru_cache
+import numpy as np
+
+MODEL_FILE = "data/models/relevance_model.npz"
+LABELS_FILE = "data/models/relevance_labels.jsonl"  # Hand-checked {"text", "relevant"} lines, added to the bootstrap labels
+FEATURE_BITS = 18
+RELEVANCE_THRESHOLD = 0.5
+
+URL_PATTERN = re.compile(r'http[s]?://\S+|www\.\S+')
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# The hand-written rules the model is bootstrapped from (formerly clean_data.is_relevant_entry)
+SPAM_INDICATORS = ["check out my", "buy now", "shop at", "visit my", "click here", "for sale"]
+OFF_TOPIC_INDICATORS = ["subreddit", "reddit", "discord", "rules", "mods", "post removed"]
+GENERIC_WORDS = ["nice", "great", "cool", "awesome", "thanks", "love it", "good", "amazing", "wonderful"]
+
+def rule_relevance(text):
+    """The rule chain: no spam or off-topic phrases, at least 10 words, at most 2 generic words."""
+    text = text.lower()
+    if any(indicator in text for indicator in SPAM_INDICATORS):
+        return False
+    if len(text.split()) < 10:
+        return False
+    if any(indicator in text for indicator in OFF_TOPIC_INDICATORS):
+        return False
+    return sum(text.count(word) for word in GENERIC_WORDS) <= 2
+
+def text_features(text):
+    """Word unigrams and bigrams plus a length bucket (5-word steps), URLs left out."""
+    words = TOKEN_PATTERN.findall(URL_PATTERN.sub(" ", text.lower()))
+    features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    features.append(f"__words_{min(len(words) // 5, 8)}")
+    return features
+
+def hash_features(texts, feature_bits=FEATURE_BITS):
+    """Hash each text's features into a sparse matrix, as COO arrays (rows, columns, values, n_rows).
+
+    A feature's column is the low bits of its CRC-32 and its sign the top bit,
+    so collisions tend to cancel out rather than add up. Repeated features add.
+    """
+    mask = (1 << feature_bits) - 1
+    rows, columns, values = [], [], []
+    n_rows = 0
+    for row, text in enumerate(texts):
+        n_rows += 1
+        for feature in text_features(text):
+            digest = zlib.crc32(feature.encode("utf-8"))
+            rows.append(row)
+            columns.append(digest & mask)
+            values.append(-1.0 if digest >> 31 else 1.0)
+    return np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64), np.array(values), n_rows
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-np.clip(x, -30, 30)))
+
+class RelevanceModel:
+    """Logistic regression over hashed n-gram features, with the one threshold every filter uses.
+
+    ``scores`` featurizes a batch and computes all its margins with a single
+    sparse matrix-vector product; ``predict`` applies the threshold.
+    """
+
+    def __init__(self, weights, bias=0.0, threshold=RELEVANCE_THRESHOLD):
+        self.weights = weights
+        self.bias = bias
+        self.threshold = threshold
+        self.feature_bits = int(np.log2(len(weights)))
+
+    def scores(self, texts):
+        rows, columns, values, n_rows = hash_features(texts, self.feature_bits)
+        margins = np.bincount(rows, weights=values * self.weights[columns], minlength=n_rows)
+        return _sigmoid(margins + self.bias)
+
+    def predict(self, texts):
+        return self.scores(texts) >= self.threshold
+
+    def is_relevant(self, text):
+        return bool(self.predict([text])[0])
+
+    @classmethod
+    def train(cls, texts, labels, feature_bits=FEATURE_BITS, epochs=500, learning_rate=2.0, l2=1e-6, threshold=RELEVANCE_THRESHOLD):
+        """Fit by full-batch AdaGrad on the logistic loss; labels are booleans."""
+        rows, columns, values, n_rows = hash_features(texts, feature_bits)
+        targets = np.asarray(labels, dtype=np.float64)
+        weights = np.zeros(1 << feature_bits)
+        squared_gradients = np.zeros(1 << feature_bits)
+        bias, bias_squared_gradient = 0.0, 0.0
+        for _ in range(epochs):
+            margins = np.bincount(rows, weights=values * weights[columns], minlength=n_rows) + bias
+            residuals = _sigmoid(margins) - targets
+            gradient = np.bincount(columns, weights=values * residuals[rows], minlength=len(weights)) / n_rows + l2 * weights
+            squared_gradients += gradient ** 2
+            weights -= learning_rate * gradient / (np.sqrt(squared_gradients) + 1e-8)
+            bias_gradient = residuals.mean()
+            bias_squared_gradient += bias_gradient ** 2
+            bias -= learning_rate * bias_gradient / (np.sqrt(bias_squared_gradient) + 1e-8)
+        return cls(weights, bias, threshold)
+
+    def save(self, model_file=MODEL_FILE):
+        os.makedirs(os.path.dirname(model_file) or ".", exist_ok=True)
+        temp_file = model_file + ".tmp.npz"
+        np.savez_compressed(temp_file, weights=self.weights, bias=self.bias, threshold=self.threshold)
+        os.replace(temp_file, model_file)
+
+    @classmethod
+    def load(cls, model_file=MODEL_FILE):
+        with np.load(model_file) as saved:
+            return cls(saved["weights"], float(saved["bias"]), float(saved["threshold"]))
+
+class RuleRelevance:
+    """The rule chain behind the model's interface, used until a model has been trained."""
+
+    threshold = RELEVANCE_THRESHOLD
+
+    def scores(self, texts):
+        return np.array([1.0 if rule_relevance(text) else 0.0 for text in texts])
+
+    def predict(self, texts):
+        return self.scores(texts) >= self.threshold
+
+    def is_relevant(self, text):
+        return rule_relevance(text)
+
+@lru_cache(maxsize=4)
+def _load_model(model_file, mtime):
+    if mtime is None:
+        print(f"Warning: No relevance model at {model_file}; using the relevance rules. Run forecaster train-relevance to train one.")
+        return RuleRelevance()
+    return RelevanceModel.load(model_file)
+
+def load_relevance_model(model_file=MODEL_FILE):
+    """The trained relevance model, the rule chain when none is trained yet.
+
+    Loaded once per version of the model file: long-running processes (the
+    daemon, the stream, the service) pick up a retrained model on their next call.
+    """
+    mtime = os.path.getmtime(model_file) if os.path.exists(model_file) else None
+    return _load_model(model_file, mtime)
+
+def load_labels(labels_file=LABELS_FILE):
+    """Hand-checked (text, relevant) pairs, if any have been written."""
+    if not os.path.exists(labels_file):
+        return []
+    with open(labels_file, "r", encoding="utf-8") as f:
+        return [(record["text"], bool(record["relevant"])) for record in map(json.loads, f) if record.get("text")]
+
+def train_relevance_model(threshold=RELEVANCE_THRESHOLD, epochs=500, model_file=MODEL_FILE):
+    """Train the relevance model on the latest raw snapshot, labelled by the rule chain plus any hand-checked labels.
+
+    Every fifth example is held out to report how closely the model follows
+    its labels. Returns the model, or None without a raw snapshot.
+    """
+    from src.data.artifact_catalog import resolve_input, register_artifact
+    from src.data.clean_data import clean_text
+    from src.utils.product_registry import load_registry
+    from src.utils.record_reader import RecordReader
+
+    raw_artifact = resolve_input("raw", "data/raw", "raw_social_data_", ".json")
+    if raw_artifact is None:
+        print("Error: No raw data files found in data/raw/")
+        return
+
+    # Step 1: Bootstrap labels from the rules, on the text clean_data would score
+    registry = load_registry()
+    texts, labels = [], []
+    for entry in RecordReader(raw_artifact["path"]):
+        text = clean_text(entry.get("text") or "")
+        if not text or registry.canonical_name(entry.get("product", "")) is None:
+            continue
+        texts.append(text)
+        labels.append(rule_relevance(text))
+    hand_labels = load_labels()
+    texts.extend(text for text, _ in hand_labels)
+    labels.extend(label for _, label in hand_labels)
+    if not texts:
+        print(f"Error: No entries of registered products in {raw_artifact['path']}")
+        return
+
+    # Step 2: Fit on four fifths and check agreement on the rest
+    labels = np.array(labels)
+    held_out = np.arange(len(texts)) % 5 == 4
+    model = RelevanceModel.train([text for text, hold in zip(texts, held_out) if not hold], labels[~held_out], epochs=epochs, threshold=threshold)
+    predicted = model.predict([text for text, hold in zip(texts, held_out) if hold])
+    expected = labels[held_out]
+    true_positives = int(np.sum(predicted & expected))
+    print(f"Trained on {int(np.sum(~held_out))} entries ({len(hand_labels)} hand-labelled), {labels.mean() * 100:.1f}% relevant")
+    if len(expected):
+        print(f"Held-out agreement with the labels: {np.mean(predicted == expected) * 100:.2f}% "
+              f"(precision {true_positives / max(int(predicted.sum()), 1):.3f}, recall {true_positives / max(int(expected.sum()), 1):.3f})")
+
+    # Step 3: Save the model for every filter site
+    model.save(model_file)
+    register_artifact("relevance_model", model_file, [raw_artifact["id"]], row_count=len(texts), stage="relevance")
+    _load_model.cache_clear()
+    print(f"Saved relevance model (threshold {threshold}) to {model_file}")
+    return model
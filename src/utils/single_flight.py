@@ -0,0 +1,52 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class SingleFlight:
+    """Coalesce concurrent loads of the same key and serve stale results while they refresh.
+
+    ``get(key, load)`` returns the remembered value while it is younger than
+    ``max_age`` seconds. A caller that finds nothing waits for the load, and
+    callers arriving meanwhile wait for that same load rather than starting
+    their own. A caller that finds a stale value gets it straight away while
+    one background load replaces it. ``load(stale)`` is told whether it is
+    revalidating and returns ``(value, fetched_at)``, ``fetched_at`` being a
+    time.time() timestamp. A failed background refresh keeps the stale value.
+    """
+
+    def __init__(self, max_age, max_workers=4):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._results = {}
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="single-flight")
+
+    def get(self, key, load):
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and time.time() - cached[1] < self.max_age:
+                return cached[0]
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = self._executor.submit(self._load, key, load, cached is not None)
+            if cached is not None:
+                return cached[0]
+        return future.result()
+
+    def _load(self, key, load, stale):
+        try:
+            value, fetched_at = load(stale)
+            with self._lock:
+                self._results[key] = (value, fetched_at)
+            return value
+        except Exception as e:
+            if stale:
+                print(f"Error: Refreshing {key} failed, keeping the stale result: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._inflight)
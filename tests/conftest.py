@@ -0,0 +1,12 @@
+import os
+import sys
+import pytest
+
+# The stages import from the src package at the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(autouse=True)
+def in_tmp_dir(tmp_path, monkeypatch):
+    """Run every test in its own folder, since the stages read and write data/ relative to it."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,26 @@
+import os
+from src.data.artifact_catalog import register_artifact, latest_artifact, child_artifact, find_artifact, lineage, resolve_input
+
+def test_entry_scores_are_found_through_their_trends():
+    raw_id = register_artifact("raw", "raw.json", stage="fetch")
+    first_trends = register_artifact("processed_trends", "trends.csv", [raw_id], stage="process")
+    first_scores = register_artifact("entry_scores", "scores.csv", [first_trends], stage="process")
+    second_trends = register_artifact("processed_trends", "trends.csv", [raw_id], stage="process")
+
+    # The newest scores belong to the older trends, so the newest trends have none
+    assert latest_artifact("processed_trends")["id"] == second_trends
+    assert child_artifact(second_trends, "entry_scores") is None
+    assert child_artifact(first_trends, "entry_scores")["id"] == first_scores
+
+def test_lineage_labels_and_legacy_files():
+    raw_id = register_artifact("raw", "raw.json", stage="fetch")
+    run_id = register_artifact("predictions", "predictions.db", [raw_id], stage="predict", label="20250101_120000_000001")
+    assert find_artifact("predictions", "20250101_120000_000001")["id"] == run_id
+    assert [ancestor["id"] for ancestor in lineage(run_id)] == [raw_id]
+
+    os.makedirs("data/cleaned")
+    with open("data/cleaned/cleaned_social_data_1.json", "w") as f:
+        f.write("[]")
+    artifact = resolve_input("cleaned", "data/cleaned", "cleaned_social_data_", ".json")
+    assert artifact["stage"] == "legacy-import"
+    assert resolve_input("cleaned", "data/cleaned", "cleaned_social_data_", ".json")["id"] == artifact["id"]
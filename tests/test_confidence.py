@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from src.data.confidence import (
+    bootstrap_confidence, compute_trend_scores, entry_scores_from_rows, trend_directions, DECLINING_THRESHOLD
+)
+
+def _rows(product, n, rng):
+    return [(product, int(rng.random() < 0.3), float(rng.normal(0.1, 0.3)), int(rng.integers(0, 8))) for _ in range(n)]
+
+def _point_score(rows, income):
+    posts = sum(row[1] for row in rows)
+    keywords = sum(row[3] for row in rows)
+    sentiment = sum(row[2] for row in rows) / len(rows)
+    return compute_trend_scores(posts, keywords, sentiment, income)[0]
+
+def _income_near_declining(rows, offset):
+    """The income that puts a product's observed score ``offset`` above the declining threshold."""
+    return (DECLINING_THRESHOLD + offset - _point_score(rows, 0.0)) / 0.03
+
+def _loop_bootstrap(rows_by_product, incomes, n_resamples, seed):
+    """The per-product, per-resample loop the vectorized bootstrap replaced."""
+    rng = np.random.default_rng(seed)
+    results = {}
+    for product, rows in rows_by_product.items():
+        values = np.array([row[1:] for row in rows], dtype=np.float64)
+        point = trend_directions(np.array(_point_score(rows, incomes[product])))
+        current = []
+        for _ in range(n_resamples):
+            sample = values[rng.integers(0, len(values), len(values))]
+            current.append(compute_trend_scores(sample[:, 0].sum(), sample[:, 2].sum(), sample[:, 1].mean(), incomes[product])[0])
+        current = np.array(current)
+        results[product] = {
+            "current_score_low": np.percentile(current, 2.5),
+            "current_score_high": np.percentile(current, 97.5),
+            "confidence": float((trend_directions(current) == point).mean() * 100)
+        }
+    return results
+
+def test_identical_entries_give_point_intervals_and_full_confidence():
+    rows = [("soap", 1, 0.5, 3)] * 50
+    result = bootstrap_confidence(entry_scores_from_rows(rows), {"soap": 1000.0}, n_resamples=200, seed=0)["soap"]
+    current, predicted = compute_trend_scores(50, 150, 0.5, 1000.0)
+    assert result["current_score_low"] == pytest.approx(current)
+    assert result["current_score_high"] == pytest.approx(current)
+    assert result["predicted_score_low"] == pytest.approx(predicted)
+    assert result["confidence"] == 100.0
+
+def test_matches_the_per_product_loop():
+    rng = np.random.default_rng(7)
+    far = _rows("far", 300, rng)
+    near = _rows("near", 300, rng)
+    rows_by_product = {"far": far, "near": near}
+    incomes = {"far": 0.0, "near": _income_near_declining(near, 5)}
+    entry_scores = entry_scores_from_rows(far + near)
+
+    vectorized = bootstrap_confidence(entry_scores, incomes, n_resamples=4000, seed=1)
+    reference = _loop_bootstrap(rows_by_product, incomes, n_resamples=4000, seed=2)
+    for product in rows_by_product:
+        assert vectorized[product]["confidence"] == pytest.approx(reference[product]["confidence"], abs=4)
+        for bound in ("current_score_low", "current_score_high"):
+            assert vectorized[product][bound] == pytest.approx(reference[product][bound], rel=0.02)
+    assert vectorized["far"]["confidence"] == 100.0
+    assert 30 < vectorized["near"]["confidence"] < 90
+
+def test_confidence_falls_towards_half_at_a_threshold():
+    rng = np.random.default_rng(3)
+    rows = _rows("soap", 400, rng)
+    at_threshold = bootstrap_confidence(entry_scores_from_rows(rows), {"soap": _income_near_declining(rows, 0.01)}, n_resamples=3000, seed=0)
+    assert at_threshold["soap"]["confidence"] == pytest.approx(50, abs=6)
+
+def test_entry_order_and_batching_do_not_matter():
+    rng = np.random.default_rng(5)
+    rows = _rows("a", 120, rng) + _rows("b", 80, rng) + _rows("c", 1, rng)
+    incomes = {"a": 5000.0, "b": 100.0}
+    sorted_result = bootstrap_confidence(entry_scores_from_rows(rows), incomes, n_resamples=500, seed=11)
+    shuffled = [rows[i] for i in rng.permutation(len(rows))]
+    shuffled_result = bootstrap_confidence(entry_scores_from_rows(shuffled), incomes, n_resamples=500, seed=11)
+    small_batches = bootstrap_confidence(entry_scores_from_rows(rows), incomes, n_resamples=500, seed=11, max_batch_cells=1000)
+
+    assert set(sorted_result) == {"a", "b", "c"}
+    for product in sorted_result:
+        # Shuffling changes which entry each draw lands on, so only the distribution is compared
+        assert shuffled_result[product]["confidence"] == pytest.approx(sorted_result[product]["confidence"], abs=8)
+        assert small_batches[product] == pytest.approx(sorted_result[product])
+
+def test_single_entry_product_and_empty_input():
+    result = bootstrap_confidence(entry_scores_from_rows([("solo", 1, 0.2, 4)]), {}, n_resamples=50, seed=0)
+    assert result["solo"]["confidence"] == 100.0
+    assert result["solo"]["current_score_low"] == result["solo"]["current_score_high"]
+    assert bootstrap_confidence(entry_scores_from_rows([]), {}, n_resamples=50) == {}
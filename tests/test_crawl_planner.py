@@ -0,0 +1,62 @@
+from src.data.crawl_planner import CrawlPlanner, search_api_calls
+
+def _planner(tmp_path, **options):
+    return CrawlPlanner(str(tmp_path / "crawl_history.db"), **options)
+
+def test_low_yield_subreddit_is_pruned_then_reprobed(tmp_path):
+    planner = _planner(tmp_path, reprobe_every=3)
+    candidates = ["Crafts", "Soapmakers"]
+    planner.record_search("soap", candidates, {"Crafts": 30, "soapmakers": 10}, {"Crafts": 0, "Soapmakers": 8})
+    assert planner.subreddits("soap", candidates) == ["Soapmakers"]
+    assert planner.subreddits("pottery", candidates) == candidates
+
+    for _ in range(2):
+        planner.record_search("soap", ["Soapmakers"], {"Soapmakers": 5}, {"Soapmakers": 5})
+    assert planner.subreddits("soap", candidates) == ["Soapmakers"]
+    # Three searches after Crafts was last searched, it gets another chance
+    planner.record_search("soap", ["Soapmakers"], {"Soapmakers": 5}, {"Soapmakers": 5})
+    assert planner.subreddits("soap", candidates) == candidates
+
+def test_silent_subreddit_is_pruned_and_the_plan_is_never_empty(tmp_path):
+    planner = _planner(tmp_path, max_empty_searches=2)
+    for _ in range(2):
+        planner.record_search("soap", ["Quiet"], {}, {})
+    assert planner.is_pruned("soap", "quiet")
+    assert planner.subreddits("soap", ["Quiet"]) == ["Quiet"]
+
+def test_new_share_counts_only_relevant_results(tmp_path):
+    planner = _planner(tmp_path)
+    assert planner.new_share("handmade soap", "soap") is None
+    # Mostly off-topic results, but half of the relevant ones are new
+    planner.record_query("handmade soap", "soap", 200, 20, 10, 3)
+    assert planner.new_share("handmade soap", "soap") == 0.5
+    planner.record_query("soap bars", "soap", 50, 0, 0, 1)
+    assert planner.new_share("soap bars", "soap") == 0.0
+
+def test_redundant_queries_are_skipped_but_the_best_is_kept(tmp_path):
+    planner = _planner(tmp_path, min_query_searches=2)
+    pairs = [("artisan soap", "soap"), ("handmade soap", "soap"), ("new soap", "soap")]
+    for _ in range(2):
+        planner.record_search("soap", ["Crafts"], {}, {})
+        planner.record_query("handmade soap", "soap", 100, 40, 20, 2)
+        planner.record_query("artisan soap", "soap", 100, 40, 1, 2)
+    plan, skipped = planner.queries(pairs)
+    # Queries without history first, then by falling new-post share
+    assert plan == [("new soap", "soap"), ("handmade soap", "soap")]
+    assert skipped == [("artisan soap", "soap")]
+    assert planner.record_skip("artisan soap", "soap") == 2
+
+    planner = _planner(tmp_path, min_query_searches=2, min_new_share=0.9)
+    plan, skipped = planner.queries(pairs[:2])
+    assert plan == [("handmade soap", "soap")]
+    assert skipped == [("artisan soap", "soap")]
+
+def test_history_persists_between_planners(tmp_path):
+    _planner(tmp_path).record_search("soap", ["Crafts"], {"Crafts": 30}, {"Crafts": 0})
+    planner = _planner(tmp_path)
+    assert planner.searches == {"soap": 1}
+    assert planner.is_pruned("soap", "CRAFTS")
+
+def test_search_api_calls():
+    assert search_api_calls(0, 0) == 1
+    assert search_api_calls(250, 4) == 7
@@ -0,0 +1,54 @@
+import threading
+import time
+from src.utils.instrumentation import instrument, collect_stages, record_counts, record_cache, current_metrics
+
+def test_counts_and_cache_hit_rates():
+    with collect_stages() as stages:
+        with instrument("outer"):
+            record_counts(records_in=10, records_out=4)
+            record_cache("lookups", hit=True)
+            record_cache("lookups", hit=False)
+    assert [metrics["stage"] for metrics in stages] == ["outer"]
+    assert stages[0]["records_in"] == 10
+    assert stages[0]["caches"]["lookups"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    # Outside any stage the counters go to a scratch dict
+    record_counts(records_in=1)
+    assert current_metrics()["records_in"] is None
+
+def test_threads_keep_their_own_stages():
+    collected = {}
+
+    def run(i):
+        with collect_stages() as stages:
+            with instrument(f"stage{i}"):
+                record_counts(records_in=i)
+                time.sleep(0.02)
+        collected[i] = stages
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i, stages in collected.items():
+        assert [(metrics["stage"], metrics["records_in"]) for metrics in stages] == [(f"stage{i}", i)]
+
+def test_nested_stages_stay_under_their_parent():
+    with collect_stages() as stages:
+        with instrument("outer"):
+            with instrument("inner"):
+                time.sleep(0.01)
+    assert [metrics["stage"] for metrics in stages] == ["outer"]
+    assert [metrics["stage"] for metrics in stages[0]["substages"]] == ["inner"]
+    assert stages[0]["wall_seconds"] >= stages[0]["substages"][0]["wall_seconds"]
+
+def test_stages_collected_inside_a_running_stage():
+    # As in a forked pipeline worker, which still sees the parent's running stage
+    with instrument("pipeline") as pipeline:
+        with collect_stages() as stages:
+            with instrument("clean"):
+                with instrument("inner"):
+                    pass
+    assert [metrics["stage"] for metrics in stages] == ["clean"]
+    assert [metrics["stage"] for metrics in stages[0]["substages"]] == ["inner"]
+    assert "substages" not in pipeline
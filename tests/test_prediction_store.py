@@ -0,0 +1,32 @@
+import sqlite3
+import pytest
+from src.data.prediction_store import save_predictions, latest_predictions, run_timestamps, load_run, run_time
+
+PREDICTIONS = [
+    {"product": "soap", "current_score": 600.0, "predicted_score": 600.0, "trend_direction": "Stable", "confidence": 80.0},
+    {"product": "pottery", "current_score": 2500.0, "predicted_score": 2625.0, "trend_direction": "Rising", "confidence": 100.0}
+]
+
+def test_runs_saved_back_to_back_get_their_own_ids(tmp_path):
+    db_file = str(tmp_path / "predictions.db")
+    run_ids = [save_predictions(PREDICTIONS, db_file=db_file) for _ in range(5)]
+    assert len(set(run_ids)) == 5
+    assert run_timestamps(db_file) == sorted(run_ids)
+    assert all(len(load_run(run_ts, db_file)) == 2 for run_ts in run_ids)
+
+def test_an_explicit_run_is_never_overwritten(tmp_path):
+    db_file = str(tmp_path / "predictions.db")
+    save_predictions(PREDICTIONS, run_ts="20250101_120000", db_file=db_file)
+    with pytest.raises(sqlite3.IntegrityError):
+        save_predictions(PREDICTIONS[:1], run_ts="20250101_120000", db_file=db_file)
+    assert len(load_run("20250101_120000", db_file)) == 2
+
+def test_legacy_runs_sort_before_new_ones(tmp_path):
+    db_file = str(tmp_path / "predictions.db")
+    save_predictions(PREDICTIONS[:1], run_ts="20250101_120000", db_file=db_file)
+    new_run = save_predictions(PREDICTIONS, db_file=db_file)
+    run_ts, predictions = latest_predictions(db_file)
+    assert run_ts == new_run
+    assert [prediction["product"] for prediction in predictions] == ["pottery", "soap"]
+    assert run_time("20250101_120000").year == 2025
+    assert run_time(new_run).microsecond == int(new_run[-6:])
@@ -0,0 +1,66 @@
+import itertools
+import random
+from src.utils.product_registry import ProductRegistry, TokenAutomaton, tokenize
+
+REGISTRY = {
+    "descriptive_terms": ["handmade", "for sale"],
+    "word_forms": {"soap": ["soapmaking"]},
+    "category_terms": ["pottery", "clay pot"],
+    "products": [
+        {
+            "name": "handmade soap", "data_tier": "high", "aliases": ["artisan soap"], "variants": ["soapbar"],
+            "queries": ["handmade soap", "artisan soap"], "boost_keywords": ["Lavender"]
+        },
+        {"name": "pottery", "data_tier": "low", "variants": ["ceramic"], "queries": ["pottery"]}
+    ]
+}
+
+def _naive_scan(phrases, tokens):
+    """Every phrase whose tokens occur consecutively, by checking each position."""
+    hits = set()
+    for phrase in phrases:
+        words = tokenize(phrase)
+        if any(tokens[i:i + len(words)] == words for i in range(len(tokens) - len(words) + 1)):
+            hits.add(phrase)
+    return hits
+
+def test_canonical_name_resolves_aliases_case_and_punctuation():
+    registry = ProductRegistry(REGISTRY)
+    assert registry.canonical_name("Handmade  Soap") == "handmade soap"
+    assert registry.canonical_name("artisan-soap") == "handmade soap"
+    assert registry.canonical_name("ceramic") is None
+
+def test_scan_finds_phrases_and_tokens():
+    registry = ProductRegistry(REGISTRY)
+    hits = registry.scan("Lovely clay pot, not for sale!")
+    assert {"clay pot", "for sale", "lovely", "pot"} <= hits
+    assert registry.has_descriptive_term(hits)
+    assert registry.mentions_any_product(hits)
+    assert not registry.mentions_product(hits, "handmade soap")
+
+def test_mentions_product_uses_plurals_variants_and_aliases():
+    registry = ProductRegistry(REGISTRY)
+    assert registry.mentions_product(registry.scan("two new soaps today"), "handmade soap")
+    assert registry.mentions_product(registry.scan("a soapbar"), "handmade soap")
+    assert registry.mentions_product(registry.scan("my Artisan Soap shop"), "handmade soap")
+    assert registry.mentions_product(registry.scan("ceramic bowls"), "pottery")
+    # Unregistered products fall back to their own name tokens
+    assert registry.mentions_product(registry.scan("a wool scarf"), "scarf")
+
+def test_product_words_boost_keywords_and_queries():
+    registry = ProductRegistry(REGISTRY)
+    assert registry.product_words("handmade soap") == {"soap", "soaps", "soapmaking", "handmade", "handmades", "made", "hand"}
+    # Variants widen matching but stay usable as keywords
+    assert "soapbar" not in registry.product_words("handmade soap")
+    assert registry.boost_keywords("handmade soap") == {"lavender"}
+    assert registry.queries() == [("handmade soap", "handmade soap"), ("artisan soap", "handmade soap"), ("pottery", "pottery")]
+    assert registry.queries("low") == [("pottery", "pottery")]
+
+def test_automaton_matches_naive_scan_with_overlapping_phrases():
+    vocabulary = ["a", "b", "c", "d"]
+    phrases = [" ".join(words) for n in (2, 3) for words in itertools.product(vocabulary, repeat=n)][::3]
+    automaton = TokenAutomaton(phrases)
+    rng = random.Random(0)
+    for _ in range(300):
+        tokens = [rng.choice(vocabulary) for _ in range(rng.randint(0, 12))]
+        assert automaton.scan(tokens) == _naive_scan(phrases, tokens)
@@ -0,0 +1,51 @@
+import os
+import numpy as np
+from src.utils.relevance_model import RelevanceModel, RuleRelevance, load_relevance_model, rule_relevance
+
+RELEVANT = [
+    "my handmade soap batch came out with a lovely lavender scent this week",
+    "glazed a new set of pottery bowls in the studio and they look great",
+    "finished knitting a wool scarf with a cable pattern for my sister",
+    "carved a small wooden spoon from cherry wood over the weekend"
+]
+SPAM = [
+    "buy now cheap soap click here",
+    "check out my shop buy now",
+    "click here for sale now",
+    "visit my store buy now discount"
+]
+
+def test_model_learns_separable_labels_and_scores_batches_like_single_texts():
+    model = RelevanceModel.train(RELEVANT + SPAM, [True] * 4 + [False] * 4, feature_bits=12, epochs=200)
+    assert model.predict(RELEVANT + SPAM).tolist() == [True] * 4 + [False] * 4
+    batch = model.scores(RELEVANT + SPAM)
+    singles = np.concatenate([model.scores([text]) for text in RELEVANT + SPAM])
+    assert np.allclose(batch, singles)
+    assert model.feature_bits == 12
+
+def test_save_load_round_trip(tmp_path):
+    model = RelevanceModel.train(RELEVANT + SPAM, [True] * 4 + [False] * 4, feature_bits=10, epochs=50, threshold=0.7)
+    model_file = str(tmp_path / "model.npz")
+    model.save(model_file)
+    loaded = RelevanceModel.load(model_file)
+    assert loaded.threshold == 0.7
+    assert np.allclose(loaded.scores(SPAM), model.scores(SPAM))
+
+def test_rules_until_a_model_is_trained_and_reload_when_the_file_changes(tmp_path):
+    model_file = str(tmp_path / "model.npz")
+    assert isinstance(load_relevance_model(model_file), RuleRelevance)
+
+    RelevanceModel(np.zeros(1 << 10), 0.0, 0.4).save(model_file)
+    first = load_relevance_model(model_file)
+    assert first.threshold == 0.4
+    assert load_relevance_model(model_file) is first
+
+    RelevanceModel(np.zeros(1 << 10), 0.0, 0.6).save(model_file)
+    os.utime(model_file, (os.path.getmtime(model_file) + 10,) * 2)
+    assert load_relevance_model(model_file).threshold == 0.6
+
+def test_rule_chain():
+    assert rule_relevance(RELEVANT[0])
+    assert not rule_relevance("too short to count")
+    assert not rule_relevance(SPAM[1] + " with plenty of extra words to pass the length rule")
+    assert not rule_relevance("nice nice nice and so many more words to get past the ten word rule")
@@ -0,0 +1,55 @@
+import os
+import pytest
+from src.pipeline import run_pipeline as pipeline
+
+STAGE_MODULE = '''
+def fetch():
+    with open("fetched.txt", "a") as f:
+        f.write("x")
+    return "fetched.txt"
+
+def build():
+    return "built"
+
+def broken():
+    print("Error: nothing to build")
+    return None
+'''
+
+@pytest.fixture
+def stages(tmp_path, monkeypatch):
+    (tmp_path / "fake_stages.py").write_text(STAGE_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "input.txt").write_text("input")
+
+    def stage(run, deps, always=False):
+        return {"run": f"fake_stages:{run}", "deps": deps, "always": always, "code": ["fake_stages"], "inputs": lambda: (["input.txt"], [])}
+
+    table = {
+        "fetch": stage("fetch", [], always=True),
+        "build": stage("build", ["fetch"]),
+        "broken": stage("broken", ["fetch"]),
+        "after_broken": stage("build", ["broken"])
+    }
+    monkeypatch.setattr(pipeline, "STAGES", table)
+    return str(tmp_path / "state.json")
+
+def test_unchanged_stages_are_skipped_but_always_stages_rerun(stages):
+    assert pipeline.run_pipeline(["build"], workers=1, state_file=stages) == {"fetch": "ran", "build": "ran"}
+    assert pipeline.run_pipeline(["build"], workers=1, state_file=stages) == {"fetch": "ran", "build": "up-to-date"}
+    with open("fetched.txt") as f:
+        assert f.read() == "xx"
+
+def test_a_stage_returning_none_fails_and_blocks_its_dependents(stages):
+    outcomes = pipeline.run_pipeline(["after_broken"], workers=1, state_file=stages)
+    assert outcomes == {"fetch": "ran", "broken": "failed", "after_broken": "blocked"}
+    state = pipeline._load_state(stages)
+    assert "broken" not in state and "after_broken" not in state
+    # A failed stage is tried again on the next run
+    assert pipeline.run_pipeline(["after_broken"], workers=1, state_file=stages)["broken"] == "failed"
+
+def test_skipped_and_missing_inputs(stages):
+    assert pipeline.run_pipeline(["build"], skip=["fetch"], workers=1, state_file=stages) == {"fetch": "skipped", "build": "ran"}
+    os.remove("input.txt")
+    # A required input is missing: the stage cannot run
+    assert pipeline.run_pipeline(["build"], skip=["fetch"], workers=1, state_file=stages)["build"] == "blocked"
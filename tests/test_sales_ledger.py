@@ -0,0 +1,49 @@
+import csv
+from src.data.sales_ledger import aggregate_sales_ledger, load_monthly_revenue
+
+def _write_ledger(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "region", "product", "units", "price"])
+        writer.writerows(rows)
+
+def test_dates_are_parsed_and_unreadable_rows_dropped(tmp_path, capsys):
+    ledger_file = tmp_path / "ledger.csv"
+    _write_ledger(ledger_file, [
+        ["2025-01-15", "North", "Handmade Soap", 2, 5.0],
+        ["2025-01-31T18:00:00", "North", "handmade soap", 1, 5.0],
+        ["03/02/2025", "South", "pottery", 1, 40.0],
+        ["15 Feb 2025", "South", "pottery", 2, 40.0],
+        ["not a date", "South", "pottery", 9, 40.0],
+        ["2025-13-45", "South", "pottery", 9, 40.0],
+        ["", "South", "pottery", 9, 40.0]
+    ])
+    totals = aggregate_sales_ledger(str(ledger_file), str(tmp_path / "revenue.csv"))
+
+    groups = {(row["product"], row["region"], row["month"]): row for row in totals.to_dict("records")}
+    assert groups[("handmade soap", "North", "2025-01")]["units"] == 3
+    assert groups[("handmade soap", "North", "2025-01")]["revenue"] == 15.0
+    assert groups[("pottery", "South", "2025-03")]["units"] == 1
+    assert groups[("pottery", "South", "2025-02")]["units"] == 2
+    assert len(groups) == 3
+    output = capsys.readouterr().out
+    assert "Skipped 2 ledger rows with unreadable dates" in output
+    assert "Skipped 1 incomplete ledger rows" in output
+
+def test_missing_ledger(tmp_path):
+    assert aggregate_sales_ledger(str(tmp_path / "missing.csv"), str(tmp_path / "revenue.csv")) is None
+
+def test_monthly_revenue_averages_over_the_whole_ledger_span(tmp_path):
+    ledger_file, revenue_file = tmp_path / "ledger.csv", tmp_path / "revenue.csv"
+    _write_ledger(ledger_file, [
+        ["2024-11-03", "North", "pottery", 1, 40.0],
+        ["2025-01-10", "North", "handmade soap", 2, 5.0],
+        ["2025-02-20", "South", "pottery", 2, 40.0]
+    ])
+    aggregate_sales_ledger(str(ledger_file), str(revenue_file))
+    revenue = load_monthly_revenue(str(revenue_file))
+    # November to February is four months, sales or not
+    assert revenue["pottery"]["monthly_revenue"] == 30.0
+    assert revenue["handmade soap"]["monthly_revenue"] == 2.5
+    assert revenue["pottery"]["avg_price"] == 40.0
+    assert revenue["pottery"]["regions"] == 2
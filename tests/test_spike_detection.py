@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+from src.pipeline.spike_detection import SpikeDetector
+
+START = date(2025, 1, 1)
+
+def _day(offset):
+    return (START + timedelta(days=offset)).isoformat()
+
+def _feed(detector, offset, mentions, sentiment=0.2, product="soap"):
+    alerts = []
+    for _ in range(mentions):
+        alerts.extend(detector.add(product, _day(offset), sentiment))
+    return alerts
+
+def test_mention_spike_alerts_once_after_warmup():
+    detector = SpikeDetector()
+    for offset in range(10):
+        assert _feed(detector, offset, 10 + offset % 2) == []
+    alerts = _feed(detector, 10, 40)
+    assert [(alert["metric"], alert["direction"], alert["day"]) for alert in alerts] == [("mentions", "up", _day(10))]
+    assert alerts[0]["z_score"] >= detector.z_threshold
+
+def test_no_alerts_during_warmup():
+    detector = SpikeDetector()
+    _feed(detector, 0, 10)
+    assert _feed(detector, 1, 200) == []
+
+def test_sentiment_swing_alerts():
+    detector = SpikeDetector()
+    for offset in range(10):
+        _feed(detector, offset, 10, sentiment=0.3)
+    alerts = _feed(detector, 10, 10, sentiment=-0.6)
+    assert [(alert["metric"], alert["direction"]) for alert in alerts] == [("sentiment", "down")]
+
+def test_late_and_undated_entries_are_left_out():
+    detector = SpikeDetector()
+    _feed(detector, 5, 3)
+    assert detector.add("soap", _day(4)) == []
+    assert detector.add("soap", "not a date") == []
+    assert detector.late_entries() == 1
+    assert detector.products["soap"].mentions == 3
+
+def test_empty_days_count_as_zero_mentions():
+    detector = SpikeDetector()
+    _feed(detector, 0, 10)
+    _feed(detector, 4, 10)
+    baseline = detector.products["soap"].baselines["mentions"]
+    # Day 0 closed, then days 1-3 with no mentions
+    assert baseline.days == 4
+    assert baseline.mean < 10
@@ -0,0 +1,66 @@
+from src.pipeline.streaming import StreamAggregator, MemoryQueue, FileQueue, run_stream, load_checkpoint, _save_checkpoint
+
+TEXT = "I finished a new batch of lavender handmade soap this weekend and the scent turned out lovely and calm"
+
+def _post(i, day, product="handmade soap", kind="post"):
+    entry_id = f"comment_{i}" if kind == "comment" else f"p{i}"
+    return {"id": entry_id, "product": product, "text": f"{TEXT} {i}", "type": kind, "created_at": day}
+
+def test_redelivered_records_are_dropped_within_the_window():
+    aggregator = StreamAggregator(seen_id_window=3)
+    posts = [_post(i, "2025-01-01") for i in range(5)]
+    assert aggregator.add_batch(posts) == 5
+    assert aggregator.add_batch(posts[3:]) == 0
+    assert len(aggregator.seen_ids) == len(aggregator.recent_ids) == 3
+    # Ids older than the window are forgotten
+    assert aggregator.add_batch(posts[:1]) == 1
+    assert aggregator.records_in == 8
+
+def test_unregistered_and_irrelevant_entries():
+    aggregator = StreamAggregator()
+    short = {"id": "p1", "product": "handmade soap", "text": "nice", "created_at": "2025-01-01"}
+    unknown = _post(2, "2025-01-01", product="unicorn dust")
+    assert aggregator.add_batch([short, unknown]) == 0
+    assert aggregator.stats["handmade soap"]["total"] == 1
+    assert "unicorn dust" not in aggregator.stats
+
+def test_spikes_see_posts_in_day_order_and_not_comments():
+    aggregator = StreamAggregator()
+    batch = [_post(1, "2025-01-03"), _post(2, "2025-01-01"), _post(3, "2025-01-02"), _post(4, "2025-01-09", kind="comment")]
+    assert aggregator.add_batch(batch) == 4
+    rates = aggregator.spikes.products["handmade soap"]
+    assert aggregator.spikes.late_entries() == 0
+    assert rates.day.isoformat() == "2025-01-03"
+    assert aggregator.stats["handmade soap"]["posts"] == 3
+
+def test_checkpoint_round_trip_keeps_aggregates_and_ids(tmp_path):
+    aggregator = StreamAggregator()
+    aggregator.add_batch([_post(i, "2025-01-01") for i in range(4)])
+    checkpoint_file = str(tmp_path / "checkpoint.pkl")
+    _save_checkpoint(aggregator, 42, checkpoint_file)
+
+    restored, position = load_checkpoint(checkpoint_file)
+    assert position == 42
+    assert restored.stats == aggregator.stats
+    assert restored.seen_ids == aggregator.seen_ids
+    assert restored.add_batch([_post(0, "2025-01-01")]) == 0
+    assert restored.spikes.products["handmade soap"].mentions == 4
+
+def test_run_stream_resumes_after_the_checkpointed_position(tmp_path):
+    queue = FileQueue(str(tmp_path / "queue.jsonl"))
+    queue.publish([_post(i, "2025-01-01") for i in range(3)])
+    options = {"max_wait": 0.05, "idle_exit": 0, "output_file": str(tmp_path / "trends.csv"), "checkpoint_file": str(tmp_path / "checkpoint.pkl")}
+    rows = run_stream(queue, **options)
+    assert rows[0]["post_count"] == 3
+
+    queue = FileQueue(str(tmp_path / "queue.jsonl"))
+    queue.publish([_post(3, "2025-01-02")])
+    rows = run_stream(queue, **options)
+    assert rows[0]["post_count"] == 4
+
+def test_memory_queue_polls_in_batches():
+    queue = MemoryQueue()
+    queue.publish([_post(i, "2025-01-01") for i in range(5)])
+    assert len(queue.poll(3, 0.01)) == 3
+    assert len(queue.poll(3, 0.01)) == 2
+    assert queue.poll(3, 0.01) == []
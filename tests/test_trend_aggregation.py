@@ -0,0 +1,69 @@
+import random
+from collections import Counter
+import numpy as np
+import pytest
+from src.data.trend_aggregation import GrowableArray, TrendAggregator, to_day, top_per_group
+
+def _random_entries(seed, n=500):
+    rng = random.Random(seed)
+    products = ["soap", "pottery", "scarf"]
+    words = [f"word{i}" for i in range(12)]
+    return [
+        (rng.choice(products), rng.random() < 0.3, [rng.choice(words) for _ in range(rng.randint(0, 6))], rng.uniform(-1, 1))
+        for _ in range(n)
+    ]
+
+def _counter_totals(entries):
+    """Per-product totals the way process_trends built them before the aggregator: dicts of Counters."""
+    totals = {}
+    for product, is_post, keywords, sentiment in entries:
+        stats = totals.setdefault(product, {"entries": 0, "posts": 0, "keyword_count": 0, "sentiment_sum": 0.0, "keywords": Counter()})
+        stats["entries"] += 1
+        stats["posts"] += int(is_post)
+        stats["keyword_count"] += len(keywords)
+        stats["sentiment_sum"] += sentiment
+        stats["keywords"].update(keywords)
+    return totals
+
+def test_summary_matches_the_counter_path():
+    entries = _random_entries(1)
+    aggregator = TrendAggregator()
+    for product, is_post, keywords, sentiment in entries:
+        aggregator.add(aggregator.product_code(product), is_post, keywords, sentiment, "2025-01-01")
+    summary = aggregator.summarize()
+    expected = _counter_totals(entries)
+
+    assert sorted(summary["products"]) == sorted(expected)
+    for code, product in enumerate(summary["products"]):
+        stats = expected[product]
+        assert summary["entries"][code] == stats["entries"]
+        assert summary["posts"][code] == stats["posts"]
+        assert summary["keyword_count"][code] == stats["keyword_count"]
+        assert summary["avg_sentiment"][code] == pytest.approx(stats["sentiment_sum"] / stats["entries"])
+        assert summary["top_keywords"][code] == [word for word, _ in stats["keywords"].most_common(5)]
+
+def test_top_per_group_breaks_ties_like_most_common():
+    groups = np.array([0, 0, 0, 0, 1, 1, 0])
+    items = np.array([3, 1, 1, 3, 2, 0, 2])
+    # Group 0: items 3 and 1 twice each (3 seen first), then 2; group 1: 2 then 0
+    assert top_per_group(groups, items, 3, 4, n=2) == [[3, 1], [2, 0], []]
+    assert top_per_group(np.array([], dtype=np.int64), np.array([], dtype=np.int64), 2, 1) == [[], []]
+
+def test_entry_scores_and_product_without_keywords():
+    aggregator = TrendAggregator()
+    aggregator.add(aggregator.product_code("soap"), True, [], 0.5)
+    aggregator.add(aggregator.product_code("soap"), False, ["lavender"], -0.5)
+    scores = aggregator.entry_scores()
+    assert scores["products"] == ["soap"]
+    assert scores["is_post"].tolist() == [1.0, 0.0]
+    assert scores["keyword_count"].tolist() == [0.0, 1.0]
+    assert aggregator.summarize()["top_keywords"] == [["lavender"]]
+
+def test_growable_array_and_dates():
+    array = GrowableArray(np.int32, capacity=2)
+    array.extend([1, 2, 3])
+    array.append(4)
+    assert array.values().tolist() == [1, 2, 3, 4]
+    assert to_day("2025-03-04T10:00:00") == np.datetime64("2025-03-04")
+    assert np.isnat(to_day(None))
+    assert np.isnat(to_day("yesterday"))
@@ -1,3 +1,2 @@
 cd C:\Users\harsh\OneDrive\Desktop\documents\micro-entrepreneur-forecaster
-python -m src.data.predict_trends
-python -m src.reporting.prepare_powerbi
+python -m src.pipeline.run_pipeline --skip fetch
\ No newline at end of file